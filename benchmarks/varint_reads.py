@@ -0,0 +1,58 @@
+# Compares StreamUtils.readUnsigned, which indexes the buffer of a Stream, with
+# the reader it replaced, which called read(1) on a BytesIO for every byte, over
+# varints of each length found in snapshots. Run it with:
+#   python3 benchmarks/varint_reads.py
+from io import BytesIO
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from v2_12.Utils import Stream, StreamUtils
+
+kVarintLengths = [1, 2, 3, 5]
+kVarintsPerMeasure = 100000
+
+def encodeUnsigned(value):
+	encoded = bytearray()
+	while value > StreamUtils.kMaxUnsignedDataPerByte:
+		encoded.append(value & StreamUtils.kByteMask)
+		value >>= StreamUtils.kDataBitsPerByte
+	encoded.append(value + StreamUtils.kEndUnsignedByteMarker)
+	return encoded
+
+# Reader of unsigned varints from a BytesIO, one byte read at a time
+def readUnsignedBytesIO(stream):
+	b = int.from_bytes(stream.read(1), 'big', signed=False)
+	r = 0
+	s = 0
+	while b <= StreamUtils.kMaxUnsignedDataPerByte:
+		r |= b << s
+		s += StreamUtils.kDataBitsPerByte
+		b = int.from_bytes(stream.read(1), 'big', signed=False)
+	return r | ((b - StreamUtils.kEndUnsignedByteMarker) << s)
+
+# Mean time in nanoseconds of one varint read from the blob
+def timeReads(reader, makeStream, blob, count):
+	def run():
+		stream = makeStream(blob)
+		for _ in range(count):
+			reader(stream)
+	return min(timeit.repeat(run, number=1, repeat=5)) / count * 1e9
+
+def main():
+	random.seed(0)
+	print('{:>8} {:>14} {:>14} {:>8}'.format('bytes', 'BytesIO (ns)', 'Stream (ns)', 'speedup'))
+	for length in kVarintLengths:
+		values = [ random.randrange(1 << (7 * (length - 1)), 1 << (7 * length)) for _ in range(kVarintsPerMeasure) ]
+		blob = b''.join(encodeUnsigned(v) for v in values)
+		stream = Stream(blob)
+		assert [ StreamUtils.readUnsigned(stream) for _ in values ] == values
+		before = timeReads(readUnsignedBytesIO, BytesIO, blob, len(values))
+		after = timeReads(StreamUtils.readUnsigned, Stream, blob, len(values))
+		print('{:>8} {:>14.1f} {:>14.1f} {:>7.2f}x'.format(length, before, after, before / after))
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,58 @@
+# Compares the pure Python and NumPy backends of StreamUtils.readUnsignedRun
+# over runs of refs of increasing length, and reports the run length from
+# which NumPy wins (see StreamUtils.kNumPyMinRunLength). Run it with:
+#   python3 benchmarks/varint_runs.py
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import v2_12.Utils as Utils
+from v2_12.Utils import Stream, StreamUtils
+
+kRunLengths = [1, 2, 4, 8, 16, 24, 32, 48, 64, 96, 128, 256, 1024, 8192, 65536]
+kDecodedPerMeasure = 200000
+
+def encodeUnsigned(value):
+	encoded = bytearray()
+	while value > StreamUtils.kMaxUnsignedDataPerByte:
+		encoded.append(value & StreamUtils.kByteMask)
+		value >>= StreamUtils.kDataBitsPerByte
+	encoded.append(value + StreamUtils.kEndUnsignedByteMarker)
+	return encoded
+
+# Mean time in microseconds of one readUnsignedRun call, with the NumPy
+# threshold forced so that the requested backend is always used
+def timeRun(blob, count, useNumPy):
+	StreamUtils.kNumPyMinRunLength = 0 if useNumPy else float('inf')
+	number = max(1, kDecodedPerMeasure // count)
+	best = min(timeit.repeat(lambda: StreamUtils.readUnsignedRun(Stream(blob), count), number=number, repeat=3))
+	return best / number * 1e6
+
+def main():
+	if Utils.numpy is None:
+		print('NumPy is not installed, nothing to compare')
+		return
+
+	random.seed(0)
+	threshold = StreamUtils.kNumPyMinRunLength
+	crossover = None
+	print('{:>8} {:>14} {:>14} {:>8}'.format('length', 'python (us)', 'numpy (us)', 'speedup'))
+	for count in kRunLengths:
+		# Refs in a real snapshot are mostly 2 and 3 byte varints
+		values = [ random.randrange(1, 1 << 17) for _ in range(count) ]
+		blob = b''.join(encodeUnsigned(v) for v in values)
+		assert list(StreamUtils.readUnsignedRun(Stream(blob), count)) == values
+		python = timeRun(blob, count, False)
+		vectorized = timeRun(blob, count, True)
+		if crossover is None and vectorized < python:
+			crossover = count
+		print('{:>8} {:>14.2f} {:>14.2f} {:>7.2f}x'.format(count, python, vectorized, python / vectorized))
+	StreamUtils.kNumPyMinRunLength = threshold
+
+	print('\nNumPy is faster from runs of {} varints (kNumPyMinRunLength = {})'.format(crossover, threshold))
+
+if __name__ == '__main__':
+	main()
@@ -1,14 +1,29 @@
 kMagicOffset = 0
 kMagicSize = 4
+kSnapshotMagic = 0xdcdcf5f5
 kLengthOffset = kMagicOffset + kMagicSize
 kLengthSize = 8
 kKindOffset = kLengthOffset + kLengthSize
 kKindSize = 8
 kHeaderSize = kKindOffset + kKindSize
 hashSize = 32
+kMaxFeaturesSize = 1024 # Upper bound of the features string, for header-only reads
 kAppAOTSymbols = [
     '_kDartVmSnapshotData',
     '_kDartVmSnapshotInstructions',
     '_kDartIsolateSnapshotData',
     '_kDartIsolateSnapshotInstructions'
-]
\ No newline at end of file
+]
+
+# Snapshot container: magic, then one entry per kAppAOTSymbols blob
+kContainerMagic = b'DOLDRUMS'
+kContainerEntryFormat = '<QQQ' # File offset, size and load address
+
+# Snapshot version hashes, and the package parsing each version
+kSupportedSnapshots = {
+    '8ee4ef7a67df9845fba331734198a953': 'v2_10',
+    '5b97292b25f0a715613b7a28e0734f77': 'v2_12'
+}
+kWIPSnapshots = {
+    'e4a09dbf2bb120fe4674e0576617a0dc': 'v2_13'
+}
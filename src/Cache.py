@@ -0,0 +1,143 @@
+import gc
+import hashlib
+import logging
+import os
+import pickle
+import struct
+import tempfile
+import zlib
+
+# On-disk cache of parsed snapshots. Each entry is a pickled snapshot, compressed
+# with zlib: either the isolate snapshot of an app, keyed by the SHA-256 of its
+# snapshot blobs and their load addresses (so the same build hits the cache
+# whether it is given as a binary, a container or raw blobs), or a VM snapshot
+# shared by the apps of an engine build (see vmKeyFor). Reading an entry
+# refreshes its modification time, and the least recently used entries are
+# evicted once the directory grows past its size cap. Since loading an entry
+# unpickles it, the directory and its entries must belong to the current user
+# and must not be writable by anyone else
+
+kCacheSuffix = '.snapshot'
+kVMKeyPrefix = 'vm-'
+kDefaultCacheSize = 1024 * 1024 * 1024
+# Bumped whenever the layout of the pickled objects changes, which invalidates
+# every existing entry
+kCacheFormatVersion = 6
+kCacheDirectoryMode = 0o700
+# Permission bits that let other users replace the contents of a file
+kForeignWriteMask = 0o022
+
+def keyFor(blobs, offsets):
+	digest = hashlib.sha256(struct.pack('<I', kCacheFormatVersion))
+	for blob, address in zip(blobs, offsets):
+		digest.update(struct.pack('<QQ', len(blob), address))
+		digest.update(blob)
+	return digest.hexdigest()
+
+# Key of a VM snapshot, from the content of its data and instructions blobs.
+# Apps built with the same engine share their VM snapshot, which is stored
+# without the load addresses of the file it was parsed from (see detach in
+# Snapshot), so they hit the same entry whatever binary they come from
+def vmKeyFor(data, instructions):
+	digest = hashlib.sha256(struct.pack('<I', kCacheFormatVersion))
+	for blob in (data, instructions):
+		digest.update(struct.pack('<Q', len(blob)))
+		digest.update(blob)
+	return kVMKeyPrefix + digest.hexdigest()
+
+# Why a file or directory of the cache cannot be trusted, given its stat, or None
+# if it can. Nothing is checked on platforms without user IDs
+def untrustedReason(stat):
+	if not hasattr(os, 'getuid'):
+		return None
+	if stat.st_uid != os.getuid():
+		return 'is owned by user ID {}'.format(stat.st_uid)
+	if stat.st_mode & kForeignWriteMask:
+		return 'is writable by other users (mode {:o})'.format(stat.st_mode & 0o777)
+	return None
+
+class ParseCache:
+	def __init__(self, directory, maxSize=kDefaultCacheSize):
+		self.directory = directory
+		self.maxSize = maxSize
+		os.makedirs(directory, mode=kCacheDirectoryMode, exist_ok=True)
+		problem = untrustedReason(os.stat(directory))
+		if problem is not None:
+			raise Exception('Refusing to use cache directory {}, which {}'.format(directory, problem))
+
+	def path(self, key):
+		return os.path.join(self.directory, key + kCacheSuffix)
+
+	# Returns the cached object for the given key, or None on a miss. Unreadable
+	# entries are treated as misses and removed, while entries that could have
+	# been written by another user are treated as misses and left untouched
+	def load(self, key):
+		path = self.path(key)
+		try:
+			with open(path, 'rb') as f:
+				problem = untrustedReason(os.fstat(f.fileno()))
+				if problem is not None:
+					logging.warning('Ignoring cache entry %s, which %s', key, problem)
+					return None
+				data = zlib.decompress(f.read())
+			# Unpickling creates tens of thousands of objects at once, and would keep
+			# triggering collections that cannot find any garbage
+			gcEnabled = gc.isenabled()
+			gc.disable()
+			try:
+				obj = pickle.loads(data)
+			finally:
+				if gcEnabled:
+					gc.enable()
+		except FileNotFoundError:
+			logging.info('Cache miss: %s', key)
+			return None
+		except Exception as e:
+			logging.info('Discarding unreadable cache entry %s (%s)', key, e)
+			self._remove(path)
+			return None
+		# The entry may have been evicted by another process since it was read
+		try:
+			os.utime(path)
+		except OSError:
+			pass
+		logging.info('Cache hit: %s', key)
+		return obj
+
+	# Stores an object under the given key, then evicts entries until the cache
+	# fits its size cap. Entries are written to a temporary file first, so that
+	# concurrent readers never see a partial entry
+	def store(self, key, obj):
+		data = zlib.compress(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), 1)
+		if len(data) > self.maxSize:
+			logging.info('Not caching %s: %d bytes exceed the cache size', key, len(data))
+			return
+		fd, tmpPath = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+		try:
+			with os.fdopen(fd, 'wb') as f:
+				f.write(data)
+			os.replace(tmpPath, self.path(key))
+		except BaseException:
+			self._remove(tmpPath)
+			raise
+		self.evict()
+
+	# Removes the least recently used entries until the cache fits its size cap
+	def evict(self):
+		entries = []
+		for entry in os.scandir(self.directory):
+			if entry.name.endswith(kCacheSuffix) and entry.is_file():
+				stat = entry.stat()
+				entries.append((stat.st_mtime, stat.st_size, entry.path))
+		total = sum(size for _, size, _ in entries)
+		for _, size, path in sorted(entries):
+			if total <= self.maxSize:
+				break
+			self._remove(path)
+			total -= size
+
+	def _remove(self, path):
+		try:
+			os.remove(path)
+		except OSError:
+			pass
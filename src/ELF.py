@@ -0,0 +1,107 @@
+from bisect import bisect_right
+import struct
+
+# Minimal ELF reader, only able to locate a handful of symbols. It parses the
+# ELF header and the section headers, walks the dynamic symbol table until all
+# requested symbols are found, and maps their addresses to file offsets
+
+kELFMagic = b'\x7fELF'
+kELFClass32 = 1
+kELFClass64 = 2
+kELFDataLSB = 1
+kELFDataMSB = 2
+
+kSectionTypeSymbolTable = 2
+kSectionTypeNoBits = 8
+kSectionTypeDynamicSymbolTable = 11
+kSectionFlagAlloc = 0x2
+
+# Layouts per ELF class of the header (only e_shoff, e_shentsize and e_shnum
+# are unpacked), of a section header and of a symbol
+kLayouts = {
+	kELFClass32: {
+		'header': '32xI10xHH',
+		'section': 'IIIIIIIIII',
+		'symbol': 'IIIBBH'
+	},
+	kELFClass64: {
+		'header': '40xQ10xHH',
+		'section': 'IIQQQQIIQQ',
+		'symbol': 'IBBHQQ'
+	}
+}
+
+class Section:
+	def __init__(self, fields):
+		self.name, self.type, self.flags, self.address, self.offset, self.size, self.link, _, _, self.entrySize = fields
+
+class ELF:
+	def __init__(self, buffer):
+		self.buffer = buffer
+		ident = bytes(buffer[:6])
+		if ident[:4] != kELFMagic:
+			raise Exception('Not an ELF file')
+		self.elfClass = ident[4]
+		if self.elfClass not in kLayouts:
+			raise Exception('Unknown ELF class: ' + str(self.elfClass))
+		if ident[5] == kELFDataLSB:
+			self.endianness = '<'
+		elif ident[5] == kELFDataMSB:
+			self.endianness = '>'
+		else:
+			raise Exception('Unknown ELF data encoding: ' + str(ident[5]))
+		layout = kLayouts[self.elfClass]
+		self.is64 = self.elfClass == kELFClass64
+
+		sectionsOffset, sectionSize, sectionCount = struct.unpack_from(self.endianness + layout['header'], buffer, 0)
+		sectionStruct = struct.Struct(self.endianness + layout['section'])
+		if sectionsOffset == 0 or sectionSize < sectionStruct.size:
+			raise Exception('ELF file has no section headers')
+		self.sections = [ Section(sectionStruct.unpack_from(buffer, sectionsOffset + i * sectionSize)) for i in range(sectionCount) ]
+		self.symbolStruct = struct.Struct(self.endianness + layout['symbol'])
+
+		# Sorted address ranges of the sections present in the file, for bisection
+		loaded = sorted((s.address, s.address + s.size, s.offset) for s in self.sections
+			if s.flags & kSectionFlagAlloc and s.type != kSectionTypeNoBits and s.size > 0)
+		self.rangeStarts = [ r[0] for r in loaded ]
+		self.ranges = loaded
+
+	# Returns a dictionary from each of the given names to a tuple of file offset,
+	# size and address. The dynamic symbol table is preferred, and the scan stops
+	# as soon as all symbols are found
+	def findSymbols(self, names):
+		wanted = { name.encode('UTF-8'): name for name in names }
+		maxLength = max(len(name) for name in wanted) + 1
+		found = { }
+		tables = [ s for s in self.sections if s.type == kSectionTypeDynamicSymbolTable ]
+		tables += [ s for s in self.sections if s.type == kSectionTypeSymbolTable ]
+		for table in tables:
+			strings = self.sections[table.link]
+			entrySize = table.entrySize or self.symbolStruct.size
+			for offset in range(table.offset, table.offset + table.size, entrySize):
+				symbol = self.symbolStruct.unpack_from(self.buffer, offset)
+				if self.is64:
+					nameOffset, _, _, _, address, size = symbol
+				else:
+					nameOffset, address, size, _, _, _ = symbol
+				name = self._readString(strings.offset + nameOffset, maxLength)
+				if name in wanted and wanted[name] not in found:
+					found[wanted[name]] = (self.addressToOffset(address), size, address)
+					if len(found) == len(wanted):
+						return found
+		missing = [ name for name in names if name not in found ]
+		raise Exception('Symbols not found: ' + ', '.join(missing))
+
+	def addressToOffset(self, address):
+		i = bisect_right(self.rangeStarts, address) - 1
+		if i < 0 or not (address < self.ranges[i][1]):
+			raise Exception('Address is not backed by the file: ' + hex(address))
+		start, _, offset = self.ranges[i]
+		return offset + address - start
+
+	# Reads a NUL-terminated name, giving up after maxLength bytes since longer
+	# names cannot be among the requested ones
+	def _readString(self, offset, maxLength):
+		raw = bytes(self.buffer[offset:offset + maxLength])
+		end = raw.find(b'\x00')
+		return None if end < 0 else raw[:end]
@@ -1,55 +1,213 @@
 import argparse
+from collections import OrderedDict, namedtuple
 import importlib
-from io import BytesIO
+import json
 import logging
+import mmap
+import struct
 import sys
 
-from elftools.elf.elffile import ELFFile
-from elftools.elf.sections import SymbolTableSection
-
 import BaseConstants
+from Cache import ParseCache, keyFor, vmKeyFor, kDefaultCacheSize
+from ELF import ELF
 
-def parseELF(fname, **kwargs):
-    f = ELFFile(open(fname, 'rb'))
-    sections = list(f.iter_sections())
-    tables = [ s for s in sections if isinstance(s, SymbolTableSection) ]
-    symbols = { sym.name: sym.entry for table in tables for sym in table.iter_symbols() }
+def parseELF(fname, cache=None, only=None, **kwargs):
+    blobs, offsets = readELFBlobs(fname)
+    return parseBlobs(blobs, offsets, cache, only)
+
+def readELFBlobs(fname, names=BaseConstants.kAppAOTSymbols):
+    # The whole pipeline runs on a single read-only mapping of the file: the
+    # snapshot blobs below are memoryview slices of it, never copies
+    buffer = mapFile(fname)
+
+    try:
+        symbols = ELF(buffer).findSymbols(names)
+    except Exception as e:
+        logging.info('Built-in ELF reader failed (%s), falling back to pyelftools', e)
+        symbols = findSymbolsWithPyelftools(buffer.obj, names)
 
     blobs, offsets = [], []
-    for s in BaseConstants.kAppAOTSymbols:
-        s = symbols[s]
-        section = next(S for S in sections if 0 <= s.st_value - S['sh_addr'] < S.data_size)
-        blob = section.data()[(s.st_value - section['sh_addr']):][:s.st_size]
-        assert len(blob) == s.st_size
-        blobs.append(blob), offsets.append(s.st_value)
+    for s in names:
+        start, size, address = symbols[s]
+        blob = buffer[start:start + size]
+        assert len(blob) == size
+        blobs.append(blob), offsets.append(address)
+
+    return blobs, offsets
+
+# Parses snapshot blobs extracted from the binary beforehand, one file per blob
+# in the order of kAppAOTSymbols. Raw blobs carry no load address, so code
+# offsets are relative to the instructions blob unless addresses are given
+def parseRaw(fnames, addresses=None, cache=None, only=None):
+    if len(fnames) != len(BaseConstants.kAppAOTSymbols):
+        raise Exception('Expected {} snapshot blobs, got {}'.format(len(BaseConstants.kAppAOTSymbols), len(fnames)))
+    blobs = [ mapFile(fname) for fname in fnames ]
+    return parseBlobs(blobs, addresses or [ 0 ] * len(blobs), cache, only)
+
+# Parses a snapshot container, as written by writeContainer
+def parseContainer(fname, cache=None, only=None):
+    blobs, offsets = readContainerBlobs(fname)
+    return parseBlobs(blobs, offsets, cache, only)
+
+def readContainerBlobs(fname):
+    buffer = mapFile(fname)
+    if bytes(buffer[:len(BaseConstants.kContainerMagic)]) != BaseConstants.kContainerMagic:
+        raise Exception('Not a snapshot container: ' + fname)
+
+    blobs, offsets = [], []
+    entrySize = struct.calcsize(BaseConstants.kContainerEntryFormat)
+    for i in range(len(BaseConstants.kAppAOTSymbols)):
+        entryOffset = len(BaseConstants.kContainerMagic) + i * entrySize
+        start, size, address = struct.unpack_from(BaseConstants.kContainerEntryFormat, buffer, entryOffset)
+        blob = buffer[start:start + size]
+        if len(blob) != size:
+            raise Exception('Truncated snapshot container: ' + fname)
+        blobs.append(blob), offsets.append(address)
+
+    return blobs, offsets
+
+# Writes the four snapshot blobs to a single container file: the magic, then an
+# offset table with the file offset, size and load address of each blob (in the
+# order of kAppAOTSymbols), then the blobs themselves
+def writeContainer(fname, blobs, offsets):
+    entrySize = struct.calcsize(BaseConstants.kContainerEntryFormat)
+    start = len(BaseConstants.kContainerMagic) + len(blobs) * entrySize
+    with open(fname, 'wb') as f:
+        f.write(BaseConstants.kContainerMagic)
+        for blob, address in zip(blobs, offsets):
+            f.write(struct.pack(BaseConstants.kContainerEntryFormat, start, len(blob), address))
+            start += len(blob)
+        for blob in blobs:
+            f.write(blob)
+
+# Parses an ELF binary or a snapshot container, telling them apart by their magic
+def parseFile(fname, cache=None, only=None):
+    if isContainer(fname):
+        return parseContainer(fname, cache, only)
+    return parseELF(fname, cache, only)
+
+def isContainer(fname):
+    with open(fname, 'rb') as f:
+        magic = f.read(len(BaseConstants.kContainerMagic))
+    return magic == BaseConstants.kContainerMagic
+
+# What the header of an isolate snapshot tells about an app. Kinds are numbered
+# differently across Dart versions, so the kind is named after the Kind of
+# supported versions, and 'unknown' otherwise. Object counts are likewise only
+# known for supported versions, and are None otherwise
+Identity = namedtuple('Identity', [ 'file', 'status', 'version', 'hash', 'kind', 'arch', 'features', 'size',
+    'numBaseObjects', 'numObjects', 'numClusters', 'fieldTableLength' ])
+
+# Features naming the architecture the snapshot was compiled for
+kArchFeatures = { 'x64-sysv': 'X64', 'x64-win': 'X64', 'arm-eabi': 'ARM', 'arm64-sysv': 'ARM64', 'ia32': 'IA32' }
+
+# Identifies an ELF binary or a snapshot container without parsing it: only the
+# isolate data symbol is looked up, and only the header of its snapshot is read
+def identifyFile(fname):
+    if isContainer(fname):
+        blob = readContainerBlobs(fname)[0][2]
+    else:
+        blob = readELFBlobs(fname, [ BaseConstants.kAppAOTSymbols[2] ])[0][0]
+    return identifyBlob(blob, fname)
 
+def identifyBlob(blob, fname=None):
+    magic = int.from_bytes(blob[BaseConstants.kMagicOffset:BaseConstants.kMagicOffset + BaseConstants.kMagicSize], 'little')
+    if magic != BaseConstants.kSnapshotMagic:
+        raise Exception('Not a Dart snapshot, magic: ' + hex(magic))
+    hashEnd = BaseConstants.kHeaderSize + BaseConstants.hashSize
+    featuresEnd = bytes(blob[hashEnd:hashEnd + BaseConstants.kMaxFeaturesSize]).find(b'\x00')
+    if featuresEnd < 0:
+        raise Exception('Snapshot header has no features string')
+    snapshotHash = bytes(blob[BaseConstants.kHeaderSize:hashEnd]).decode('UTF-8')
+    features = bytes(blob[hashEnd:hashEnd + featuresEnd]).decode('UTF-8').split(' ')
+    arch = next((kArchFeatures[f] for f in features if f in kArchFeatures), None)
+    size = int.from_bytes(blob[BaseConstants.kLengthOffset:BaseConstants.kLengthOffset + BaseConstants.kLengthSize], 'little')
+
+    if snapshotHash in BaseConstants.kSupportedSnapshots:
+        version = BaseConstants.kSupportedSnapshots[snapshotHash]
+        header = importlib.import_module('{}.Snapshot'.format(version)).readHeader(blob)
+        counts = (header.numBaseObjects, header.numObjects, header.numClusters + getattr(header, 'numCanonicalClusters', 0), header.fieldTableLength)
+        return Identity(fname, 'supported', version, snapshotHash, header.kind.name, arch, features, size, *counts)
+
+    if snapshotHash in BaseConstants.kWIPSnapshots:
+        status, version = 'work in progress', BaseConstants.kWIPSnapshots[snapshotHash]
+    else:
+        status, version = 'unsupported', None
+    return Identity(fname, status, version, snapshotHash, 'unknown', arch, features, size, None, None, None, None)
+
+# Parses the VM and isolate snapshots, or loads the parsed isolate snapshot from
+# the given ParseCache when the same blobs were parsed before. When only is
+# given, only the clusters of these object kinds (see kObjectKinds in Cluster)
+# are filled right away, and the others when first read
+def parseBlobs(blobs, offsets, cache=None, only=None):
     loadLibraries(blobs[0])
 
-    vm = Snapshot(blobs[0], offsets[0], blobs[1], offsets[1])
-    isolate = Snapshot(blobs[2], offsets[2], blobs[3], offsets[3], vm)
+    if cache is not None:
+        key = keyFor(blobs, offsets)
+        isolate = cache.load(key)
+        if isolate is not None:
+            return isolate
+
+    vm = loadVMSnapshot(blobs, offsets, cache)
+    isolate = Snapshot(blobs[2], offsets[2], blobs[3], offsets[3], vm, only)
 
+    if cache is not None:
+        cache.store(key, isolate)
     return isolate
 
+# Parsed VM snapshots of this process, by vmKeyFor key, the least recently used
+# first. The isolate snapshot reads the references of the VM snapshot through
+# its own reference table, without copying or modifying them, so a VM snapshot
+# is shared by every isolate of the same engine build. Shared VM snapshots are
+# detached from the file they were parsed from, and at most kMaxVMSnapshots of
+# them are kept
+kMaxVMSnapshots = 4
+vmSnapshots = OrderedDict()
+
+def loadVMSnapshot(blobs, offsets, cache=None):
+    key = vmKeyFor(blobs[0], blobs[1])
+    vm = vmSnapshots.pop(key, None)
+    if vm is None and cache is not None:
+        vm = cache.load(key)
+    if vm is None:
+        vm = Snapshot(blobs[0], offsets[0], blobs[1], offsets[1])
+        vm.detach()
+        if cache is not None:
+            cache.store(key, vm)
+    vmSnapshots[key] = vm
+    while len(vmSnapshots) > kMaxVMSnapshots:
+        vmSnapshots.popitem(last=False)
+    return vm
+
+def mapFile(fname):
+    with open(fname, 'rb') as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+def findSymbolsWithPyelftools(stream, names=BaseConstants.kAppAOTSymbols):
+    from elftools.elf.elffile import ELFFile
+    from elftools.elf.sections import SymbolTableSection
+
+    f = ELFFile(stream)
+    sections = list(f.iter_sections())
+    tables = [ s for s in sections if isinstance(s, SymbolTableSection) ]
+    symbols = { sym.name: sym.entry for table in tables for sym in table.iter_symbols() }
+
+    found = { }
+    for s in names:
+        s, name = symbols[s], s
+        section = next(S for S in sections if 0 <= s.st_value - S['sh_addr'] < S.data_size)
+        found[name] = (section['sh_offset'] + s.st_value - section['sh_addr'], s.st_size, s.st_value)
+    return found
+
 def loadLibraries(blob):
-    stream = BytesIO(blob)
-    stream.seek(20)
-    snapshotHash = stream.read(32).decode('UTF-8')
-    
-    SUPPORTED_SNAPSHOT = {
-        "8ee4ef7a67df9845fba331734198a953": "v2_10",
-        "5b97292b25f0a715613b7a28e0734f77": "v2_12"
-    }
-
-    WIP_SNAPSHOT = {
-        "e4a09dbf2bb120fe4674e0576617a0dc": "v2_13"
-    }
-
-    if snapshotHash in SUPPORTED_SNAPSHOT.keys():
-        snapshotModule = importlib.import_module('{}.Snapshot'.format(SUPPORTED_SNAPSHOT[snapshotHash]))
-        resolverModule = importlib.import_module('{}.Resolver'.format(SUPPORTED_SNAPSHOT[snapshotHash]))
-        classIdModule = importlib.import_module('{}.ClassId'.format(SUPPORTED_SNAPSHOT[snapshotHash]))      
-    elif snapshotHash in WIP_SNAPSHOT.keys():
-        raise Exception('Still Work in Progress for Dart SDK ' + WIP_SNAPSHOT[snapshotHash])
+    snapshotHash = bytes(blob[BaseConstants.kHeaderSize:BaseConstants.kHeaderSize + BaseConstants.hashSize]).decode('UTF-8')
+
+    if snapshotHash in BaseConstants.kSupportedSnapshots.keys():
+        snapshotModule = importlib.import_module('{}.Snapshot'.format(BaseConstants.kSupportedSnapshots[snapshotHash]))
+        resolverModule = importlib.import_module('{}.Resolver'.format(BaseConstants.kSupportedSnapshots[snapshotHash]))
+        classIdModule = importlib.import_module('{}.ClassId'.format(BaseConstants.kSupportedSnapshots[snapshotHash]))      
+    elif snapshotHash in BaseConstants.kWIPSnapshots.keys():
+        raise Exception('Still Work in Progress for Dart SDK ' + BaseConstants.kWIPSnapshots[snapshotHash])
     else:
         raise Exception('Unsupported Dart SDK, snapshot hash: ' + snapshotHash)
     
@@ -57,6 +215,8 @@ def loadLibraries(blob):
     Snapshot = getattr(snapshotModule, 'Snapshot')
     global DartClass
     DartClass = getattr(resolverModule, 'DartClass')
+    global getTypeCache
+    getTypeCache = getattr(resolverModule, 'getTypeCache')
 
 def dump(snapshot, output):
     f = open(output, 'w')
@@ -73,14 +233,63 @@ def dump(snapshot, output):
         f.write(str(dartClass))
         f.write('\n\n')
     f.close()
+    typeCache = getTypeCache(snapshot)
+    logging.info('Resolved %d types, with %d cache hits', typeCache.misses, typeCache.hits)
+
+# Prints the identity of each file, one JSON object per line. Files that cannot
+# be identified get an error instead of stopping the run
+def identifyMain(argv):
+    parser = argparse.ArgumentParser(prog='main.py identify', description='Identify Flutter binaries from their snapshot header, without parsing them.')
+    parser.add_argument('files', nargs='+', metavar='file', help='target Flutter binary, or snapshot container')
+    args = parser.parse_args(argv)
+    for fname in args.files:
+        try:
+            entry = identifyFile(fname)._asdict()
+        except Exception as e:
+            entry = { 'file': fname, 'status': 'error', 'error': str(e) }
+        print(json.dumps(entry))
 
-parser = argparse.ArgumentParser(description='Parse the libapp.so file in Flutter apps for Android.')
-parser.add_argument('file', help='target Flutter binary')
-parser.add_argument('output', help='output file')
-parser.add_argument('-v', '--verbose', action='store_true', help='verbose')
+# Writes the summary and the cluster census of a snapshot parsed without filling
+# any skippable cluster
+def census(snapshot, output):
+    with open(output, 'w') as f:
+        f.write('# SUMMARY\n\n')
+        f.write(snapshot.getSummary())
+        f.write('\n\n# CLUSTERS\n\n')
+        f.write(snapshot.getCensus())
+        f.write('\n')
 
-args = parser.parse_args()
-if args.verbose:
-    logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
-isolate = parseELF(args.file)
-dump(isolate, args.output)
+if __name__ == '__main__':
+    if sys.argv[1:2] == [ 'identify' ]:
+        identifyMain(sys.argv[2:])
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description='Parse the libapp.so file in Flutter apps for Android.')
+    parser.add_argument('file', nargs='?', help='target Flutter binary, or snapshot container')
+    parser.add_argument('output', help='output file')
+    parser.add_argument('-v', '--verbose', action='store_true', help='verbose')
+    parser.add_argument('--raw', nargs=4, metavar=('VM_DATA', 'VM_INSTRUCTIONS', 'ISOLATE_DATA', 'ISOLATE_INSTRUCTIONS'), help='parse raw snapshot blobs instead of a binary')
+    parser.add_argument('-x', '--extract', action='store_true', help='write the snapshot blobs of the binary to a container at the output path, instead of dumping classes')
+    parser.add_argument('--cache-dir', help='directory of a cache of parsed snapshots, reused across runs (created with mode 0700; directories and entries owned by other users or writable by them are refused, as entries are pickles)')
+    parser.add_argument('--cache-size', type=int, default=kDefaultCacheSize // (1024 * 1024), metavar='MB', help='size cap of the cache directory, in megabytes (default: %(default)s)')
+    parser.add_argument('--census', action='store_true', help='write a table of the clusters of the isolate snapshot, with their object counts and fill sizes, instead of dumping classes (only class clusters are filled, as the layout of instances depends on them, and the cache is not used)')
+    parser.add_argument('--only', default='all', metavar='KINDS', help='comma-separated object kinds to fill eagerly, the others being filled when first read, or "all" (default: %(default)s)')
+
+    args = parser.parse_args()
+    if (args.file is None) == (args.raw is None):
+        parser.error('expected either a target file or --raw blobs')
+    if args.verbose:
+        logging.basicConfig(format='%(levelname)s:%(message)s', level=logging.INFO)
+    if args.extract:
+        if args.file is None:
+            parser.error('--extract needs a target binary')
+        writeContainer(args.output, *readELFBlobs(args.file))
+        sys.exit(0)
+    only = None if args.only == 'all' else args.only.split(',')
+    cache = ParseCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir is not None else None
+    if args.census:
+        only, cache = [ ], None
+    isolate = parseRaw(args.raw, cache=cache, only=only) if args.raw is not None else parseFile(args.file, cache, only)
+    if args.census:
+        census(isolate, args.output)
+    else:
+        dump(isolate, args.output)
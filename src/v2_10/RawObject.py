@@ -0,0 +1,282 @@
+from v2_10 import TypedData
+
+# Deserialized objects. Each kind of object has a fixed set of fields, declared
+# with __slots__ so that objects do not carry a dictionary of their own. The
+# mapping accessors are kept so that objects can still be read as dictionaries.
+# Slots starting with an underscore are internal and not listed as fields, while
+# lazyFieldNames lists fields computed on first read
+class RawObject():
+	__slots__ = ( 'cid', 'refId' )
+	fieldNames = __slots__
+	isBase = False
+
+	def __init__(self, cid, refId=None):
+		self.cid = cid
+		self.refId = refId
+
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		slots = tuple(name for name in cls.__dict__.get('__slots__', ()) if not name.startswith('_'))
+		cls.fieldNames = cls.__base__.fieldNames + cls.__dict__.get('lazyFieldNames', ()) + slots
+
+	def __getitem__(self, key):
+		try:
+			return getattr(self, key)
+		except AttributeError:
+			raise KeyError(key) from None
+
+	def __setitem__(self, key, value):
+		setattr(self, key, value)
+
+	def __contains__(self, key):
+		return hasattr(self, key)
+
+	def get(self, key, default=None):
+		return getattr(self, key, default)
+
+	def keys(self):
+		return [ name for name in self.fieldNames if hasattr(self, name) ]
+
+	def __repr__(self):
+		return '{}({})'.format(self.__class__.__name__, ', '.join('{}={!r}'.format(name, getattr(self, name)) for name in self.keys()))
+
+# Objects of the VM isolate that are not serialized in snapshots
+class RawBaseObject(RawObject):
+	__slots__ = ( 'name', 'data' )
+	isBase = True
+
+	def __init__(self, cid, name, data=None):
+		super().__init__(cid)
+		self.name = name
+		if data is not None:
+			self.data = data
+
+class RawClass(RawObject):
+	__slots__ = (
+		'name', 'userName', 'functions', 'functionsHashTable', 'fields', 'offsetInWordsToField',
+		'interfaces', 'script', 'library', 'typeParameters', 'superType', 'signatureFunction',
+		'constants', 'declarationType', 'invocationDispatcherCache', 'allocationStub',
+		'directImplementors', 'directSubclasses', 'dependentCode', 'id', 'binaryDeclaration',
+		'hostInstanceSizeInWords', 'hostNextFieldOffsetInWords',
+		'hostTypeArgumentsFieldOffsetInWords', 'targetInstanceSizeInWords',
+		'targetNextFieldOffsetInWords', 'targetTypeArgumentsFieldOffsetInWords',
+		'numTypeArguments', 'numNativeFields', 'tokenPos', 'endTokenPos', 'stateBits'
+	)
+
+class RawPatchClass(RawObject):
+	__slots__ = ( 'patchedClass', 'originClass', 'script', 'libraryKernelData', 'libraryKernelOffset' )
+
+class RawFunction(RawObject):
+	__slots__ = (
+		'name', 'owner', 'resultType', 'parameterTypes', 'parameterNames', 'typeParameters',
+		'data', 'code', 'tokenPos', 'endTokenPos', 'binaryDeclaration', 'packedFields',
+		'kindTag', 'usageCounter', 'optimizedInstructionCount', 'optimizedCallSiteCount',
+		'deoptimizationCounter', 'stateBits', 'inliningDepth'
+	)
+
+class RawClosureData(RawObject):
+	__slots__ = ( 'contextScope', 'parentFunction', 'signatureType', 'closure' )
+
+class RawSignatureData(RawObject):
+	__slots__ = ( 'parentFunction', 'signatureType' )
+
+class RawFfiTrampolineData(RawObject):
+	__slots__ = (
+		'signatureType', 'CSignature', 'callbackTarget', 'callbackExceptionalReturn',
+		'callbackId'
+	)
+
+class RawField(RawObject):
+	__slots__ = (
+		'name', 'owner', 'type', 'initializerFunction', 'savedInitialValue',
+		'guardedListLength', 'dependentCode', 'tokenPos', 'endTokenPos', 'guardedCid',
+		'isNullable', 'staticTypeExactnessState', 'binaryDeclaration', 'kindBits',
+		'hostOffsetOrFieldId', 'targetOffset'
+	)
+
+class RawScript(RawObject):
+	__slots__ = (
+		'url', 'resolvedUrl', 'compileTimeConstants', 'lineStarts', 'debugPositions',
+		'kernelProgramInfo', 'lineOffset', 'colOffset', 'flags', 'kernelScriptIndex',
+		'loadTimestamp'
+	)
+
+class RawLibrary(RawObject):
+	__slots__ = (
+		'name', 'url', 'privateKey', 'dictionary', 'metadata', 'toplevelClass', 'usedScripts',
+		'loadingUnit', 'imports', 'exports', 'dependencies', 'kernelData',
+		'nativeEntryResolver', 'nativeEntrySymbolResolver', 'index', 'numImports', 'loadState',
+		'flags', 'binaryDeclaration'
+	)
+
+class RawNamespace(RawObject):
+	__slots__ = ( 'library', 'showNames', 'hideNames', 'metadataField' )
+
+class RawCode(RawObject):
+	__slots__ = (
+		'objectPool', 'owner', 'exceptionHandlers', 'pcDescriptors', 'catchEntry',
+		'compressedStackMaps', 'inlinedIdToFunction', 'codeSourceMap', 'deoptInfoArray',
+		'staticCallsTargetTable', 'returnAddressMetadata', 'varDescriptors', 'comments',
+		'compileTimestamp', 'stateBits', 'entryPoint', 'uncheckedEntryPoint',
+		'monomorphicEntryPoint', 'monomorphicUncheckedEntryPoint', 'instructionsLength',
+		'uncheckedOffset'
+	)
+
+class RawBytecode(RawObject):
+	__slots__ = (
+		'instructions', 'instructionsSize', 'objectPool', 'function', 'closures',
+		'exceptionHandlers', 'pcDescriptors', 'instructionsBinaryOffset',
+		'sourcePositionsBinaryOffset', 'localVariablesBinaryOffset'
+	)
+
+class RawObjectPool(RawObject):
+	__slots__ = ( 'length', 'entryBits', 'data' )
+
+# Objects whose data is only decoded on first read, from a view of the snapshot
+# and the offset of the data in it. Pickled objects hold their decoded data
+# instead, views being tied to the mapping of the input file
+class RawLazyData(RawObject):
+	__slots__ = ( 'length', '_data', '_buffer', '_offset' )
+	lazyFieldNames = ( 'data', )
+	itemSize = 1
+
+	def setLazyData(self, buffer, offset):
+		self._buffer = buffer
+		self._offset = offset
+
+	def decode(self, view):
+		return view.tobytes()
+
+	@property
+	def data(self):
+		try:
+			return self._data
+		except AttributeError:
+			pass
+		try:
+			buffer = self._buffer
+		except AttributeError:
+			raise AttributeError('data') from None
+		self._data = self.decode(buffer[self._offset:self._offset + self.length * self.itemSize])
+		del self._buffer, self._offset
+		return self._data
+
+	@data.setter
+	def data(self, value):
+		self._data = value
+
+	def __getstate__(self):
+		return (None, { name: getattr(self, name) for name in self.keys() })
+
+class RawPcDescriptors(RawLazyData):
+	__slots__ = ( )
+
+class RawCodeSourceMap(RawLazyData):
+	__slots__ = ( )
+
+class RawCompressedStackMaps(RawLazyData):
+	__slots__ = ( 'flags', )
+
+class RawExceptionHandlers(RawObject):
+	__slots__ = ( 'numEntries', 'handledTypesData', 'data' )
+
+class RawUnlinkedCall(RawObject):
+	__slots__ = ( 'targetName', 'argsDescriptor', 'canPatchToMonomorphic' )
+
+class RawMegamorphicCache(RawObject):
+	__slots__ = ( 'targetName', 'argsDescriptor', 'buckets', 'mask', 'filledEntryCount' )
+
+class RawSubtypeTestCache(RawObject):
+	__slots__ = ( 'cache', )
+
+class RawLoadingUnit(RawObject):
+	__slots__ = ( 'parent', 'baseObjects', 'id', 'loaded', 'loadOutstanding' )
+
+# The words of the fields of all instances of a cluster are kept in one array
+# (see InstanceDeserializer), each instance holding the offset of its own words
+class RawInstance(RawObject):
+	__slots__ = ( 'isCanonical', 'length', '_words', '_offset' )
+	lazyFieldNames = ( 'data', )
+
+	def setWords(self, words, offset, length):
+		self._words = words
+		self._offset = offset
+		self.length = length
+
+	def getWord(self, index):
+		return self._words[self._offset + index]
+
+	@property
+	def data(self):
+		return self._words[self._offset:self._offset + self.length]
+
+class RawTypeArguments(RawObject):
+	__slots__ = ( 'length', 'hash', 'nullability', 'instantiations', 'types' )
+
+class RawType(RawObject):
+	__slots__ = (
+		'typeTestStub', 'typeClassId', 'arguments', 'hash', 'signature', 'isCanonical',
+		'tokenPos', 'typeState', 'nullability'
+	)
+
+class RawTypeRef(RawObject):
+	__slots__ = ( 'typeTestStub', 'type' )
+
+class RawTypeParameter(RawObject):
+	__slots__ = (
+		'typeTestStub', 'name', 'hash', 'bound', 'parametrizedFunction', 'parametrizedClassId',
+		'tokenPos', 'index', 'flags', 'nullability'
+	)
+
+class RawClosure(RawObject):
+	__slots__ = (
+		'isCanonical', 'instantiatorTypeArguments', 'functionTypeArguments',
+		'delayedTypeArguments', 'function', 'context', 'hash'
+	)
+
+class RawMint(RawObject):
+	__slots__ = ( 'isCanonical', 'value' )
+
+class RawDouble(RawObject):
+	__slots__ = ( 'isCanonical', 'value' )
+
+class RawGrowableObjectArray(RawObject):
+	__slots__ = ( 'isCanonical', 'typeArguments', 'length', 'data' )
+
+class RawWeakSerializationReference(RawObject):
+	__slots__ = ( 'id', )
+
+class RawArray(RawObject):
+	__slots__ = ( 'isCanonical', 'typeArguments', 'length', 'data' )
+
+class RawString(RawLazyData):
+	__slots__ = ( )
+
+	def decode(self, view):
+		return str(view, self.encoding)
+
+class RawOneByteString(RawString):
+	__slots__ = ( 'isCanonical', 'hash' )
+	itemSize = 1
+	encoding = 'latin-1'
+
+class RawTwoByteString(RawString):
+	__slots__ = ( 'isCanonical', 'hash' )
+	itemSize = 2
+	encoding = 'utf-16-le'
+
+# The data of typed data is a view of the snapshot, pickled as a copy
+class RawTypedData(RawObject):
+	__slots__ = ( 'length', 'data' )
+
+	def toArray(self):
+		return TypedData.toArray(self.cid, self.data)
+
+	def toNumPy(self):
+		return TypedData.toNumPy(self.cid, self.data)
+
+	def __getstate__(self):
+		state = { name: getattr(self, name) for name in self.keys() }
+		if 'data' in state:
+			state['data'] = bytes(state['data'])
+		return (None, state)
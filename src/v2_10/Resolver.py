@@ -1,16 +1,18 @@
 #FIXME: needs to be implemented decently from scratch
+import weakref
+
 from v2_10.ClassId import ClassId
 
 spacing = '    '
 
 class DartClass():
 	def __init__(self, snapshot, clazz):
-		self.name = snapshot.references[clazz['name']]['data']
-		self.superType = DartType(snapshot, snapshot.references[clazz['superType']])
-		self.typeParameters = list(map(lambda i: DartType(snapshot, snapshot.references[i]), snapshot.references[clazz['typeParameters']]['types']) if clazz['typeParameters'] != 1 else [])
-		self.interfaces = list(map(lambda i: DartType(snapshot, snapshot.references[i]), snapshot.references[clazz['interfaces']]['data']))
-		self.functions = list(map(lambda f: DartFunction(snapshot, snapshot.references[f]), snapshot.references[clazz['functions']]['data']))
-		self.fields = list(map(lambda i: DartField(snapshot, snapshot.references[i]), snapshot.references[clazz['fields']]['data']))
+		self.name = snapshot.references[clazz.name].data
+		self.superType = resolveType(snapshot, clazz.superType)
+		self.typeParameters = list(map(lambda i: resolveType(snapshot, i), snapshot.references[clazz.typeParameters].types) if clazz.typeParameters != 1 else [])
+		self.interfaces = list(map(lambda i: resolveType(snapshot, i), snapshot.references[clazz.interfaces].data))
+		self.functions = list(map(lambda f: DartFunction(snapshot, snapshot.references[f]), snapshot.references[clazz.functions].data))
+		self.fields = list(map(lambda i: DartField(snapshot, snapshot.references[i]), snapshot.references[clazz.fields].data))
 
 	def __str__(self):
 		#print(self.fields[0])
@@ -36,10 +38,10 @@ class DartClass():
 
 class DartFunction():
 	def __init__(self, snapshot, function):
-		self.name = snapshot.references[function['name']]['data']
-		self.resultType = DartType(snapshot, snapshot.references[function['resultType']]).name
-		self.typeParameters = list(map(lambda i: DartType(snapshot, snapshot.references[i]), snapshot.references[function['parameterTypes']]['data']))
-		self.codeOffset = snapshot.instructionsOffset + snapshot.references[function['code']]['entryPoint']
+		self.name = snapshot.references[function.name].data
+		self.resultType = resolveType(snapshot, function.resultType).name
+		self.typeParameters = list(map(lambda i: resolveType(snapshot, i), snapshot.references[function.parameterTypes].data))
+		self.codeOffset = snapshot.instructionsOffset + snapshot.references[function.code].entryPoint
 
 	def __str__(self):
 		s = str(self.resultType)
@@ -51,26 +53,67 @@ class DartFunction():
 		s += spacing + '}'
 		return s
 
+# Resolved types of a snapshot, by reference ID, with the number of lookups
+# that found a resolved type (hits) or had to resolve it (misses)
+class TypeCache():
+	def __init__(self):
+		self.types = { }
+		self.hits = 0
+		self.misses = 0
+
+# Type caches are dropped along with their snapshot
+typeCaches = weakref.WeakKeyDictionary()
+
+def getTypeCache(snapshot):
+	cache = typeCaches.get(snapshot)
+	if cache is None:
+		cache = typeCaches[snapshot] = TypeCache()
+	return cache
+
+# Resolves the type of a reference once per snapshot, all of its occurrences
+# sharing the same DartType, which must not be modified. The type is cached
+# before being resolved, so that a cycle of TypeRefs leads back to it instead
+# of recursing forever
+def resolveType(snapshot, refId):
+	cache = getTypeCache(snapshot)
+	dartType = cache.types.get(refId)
+	if dartType is not None:
+		cache.hits += 1
+		return dartType
+	cache.misses += 1
+	dartType = DartType.__new__(DartType)
+	cache.types[refId] = dartType
+	try:
+		dartType.__init__(snapshot, snapshot.references[refId])
+	except BaseException:
+		del cache.types[refId]
+		raise
+	return dartType
+
 class DartType():
 	def __init__(self, snapshot, typee):
-		if typee['cid'] is ClassId.TYPE:
-			if typee['isBase']:
-				self.name = typee['name']
+		if typee.cid is ClassId.TYPE:
+			if typee.isBase:
+				self.name = typee.name
 			else:
-				self.name = snapshot.references[snapshot.classes[snapshot.references[typee['typeClassId']]['value']]['name']]['data']
-		elif typee['cid'] is ClassId.TYPE_PARAMETER:
-			if typee['isBase']:
-				self.name = typee['name']
+				self.name = snapshot.references[snapshot.classes[snapshot.references[typee.typeClassId].value].name].data
+		elif typee.cid is ClassId.TYPE_PARAMETER:
+			if typee.isBase:
+				self.name = typee.name
 			else:
-				self.name = snapshot.references[typee['name']]['data']
+				self.name = snapshot.references[typee.name].data
+		elif typee.cid is ClassId.TYPE_REF:
+			# A type still being resolved has no name yet, which only happens
+			# within a cycle of TypeRefs
+			self.name = getattr(resolveType(snapshot, typee.type), 'name', 'DynamicType')
 
 	def __str__(self):
 		return self.name
 
 class DartField():
 	def __init__(self, snapshot, field):
-		self.name = snapshot.references[field['name']]['data']
-		self.type = DartType(snapshot, snapshot.references[field['type']])
+		self.name = snapshot.references[field.name].data
+		self.type = resolveType(snapshot, field.type)
 
 	def __str__(self):
 		return str(self.type) + ' ' + self.name
\ No newline at end of file
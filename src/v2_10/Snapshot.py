@@ -1,12 +1,25 @@
-from io import BytesIO
+from array import array
+from collections import namedtuple
+from collections.abc import Mapping
+from functools import partial
 
 from . import Cluster
 from . import Constants
 
 from v2_10.ClassId import ClassId
 from v2_10.Kind import Kind
+from v2_10.RawObject import RawBaseObject
 from v2_10.Utils import *
 
+# Byte boundaries of the fill stage of a cluster, and the references it fills
+ClusterExtent = namedtuple('ClusterExtent', [ 'cid', 'startRef', 'stopRef', 'fillOffset', 'fillLength' ])
+# Instance fields of a class and its superclasses: the field at each word
+# offset, the word offset of each field name, and the offsets of unboxed fields
+InstanceFieldIndex = namedtuple('InstanceFieldIndex', [ 'fields', 'offsets', 'unboxed' ])
+# Values of a cluster of numbers, an array of 64-bit integers for mints and of
+# doubles for doubles, and the references they belong to
+NumberRange = namedtuple('NumberRange', [ 'cid', 'startRef', 'stopRef', 'values' ])
+
 class Snapshot:
 	# snapshot = byte array of VM snapshot
 	# magic = snapshot header (size: kHeaderSize)
@@ -15,30 +28,68 @@ class Snapshot:
 	# hash = version hash (32 byte string)
 	# features = string array of features
  
-	def __init__(self, data, dataOffset, instructions, instructionsOffset, base=None):
+	# only = object kinds to fill, the others being filled on first read (see fillSelected)
+	def __init__(self, data, dataOffset, instructions, instructionsOffset, base=None, only=None):
 		# Initialize basic fields
-		self.stream = BytesIO(data)
+		self.stream = Stream(data)
 		self.classes = { } # A dictionary from an ID (see ClassDeserializer) to a deserialized class object
-		self.references = ['INVALID'] # Reference count starts at 1
-		self.nextRefIndex = 1
 		self.unboxedFieldsMapAt = { }
+		self.instanceFieldIndices = { } # A dictionary from a class ID to its InstanceFieldIndex (see getInstanceFieldIndex)
+		self.instanceFieldsByOwner = None
 		self.instructionsOffset = instructionsOffset
 
 		self.parseHeader()
 		self.fieldSetup() # Sets up deterministic information dependent on header entries
-		# Add base objects or copy them over from the VM snapshot
+		# The header counts every object, base objects included, so the reference
+		# table is sized once. Base objects are either added, or read through from
+		# the VM snapshot's table. Reference count starts at 1
 		if base is not None:
-			self.references = base.references
+			self.references = ReferenceTable(self.numObjects + 1, base.references)
 			self.nextRefIndex = base.nextRefIndex
 		else:
+			self.references = ReferenceTable(self.numObjects + 1)
+			self.references[0] = 'INVALID'
+			self.nextRefIndex = 1
 			self.addBaseObjects()
+		if self.nextRefIndex - 1 != self.numBaseObjects:
+			raise Exception('Mismatch between number of base objects: {} in the header, {} added'.format(self.numBaseObjects, self.nextRefIndex - 1))
 		# Alloc stage
+		self.allocations = [ ]
 		self.clusters = [ self.readClusterAlloc() for _ in range(self.numClusters) ]
+		if self.nextRefIndex - 1 != self.numObjects:
+			raise Exception('Mismatch between number of objects: {} in the header, {} allocated'.format(self.numObjects, self.nextRefIndex - 1))
 		# Fill stage
-		for cluster in self.clusters:
-			cluster.readFill(self)
+		if only is not None:
+			self.fillSelected(only)
+		else:
+			for cluster in self.clusters:
+				cluster.readFill(self)
 		self.readRoots()
 
+	# The stream is a view of the input buffer and cannot be pickled (the data
+	# image leaves out its own, see DataImage). It is only needed while parsing,
+	# so cached snapshots are stored without it, and with every deferred cluster
+	# filled
+	def __getstate__(self):
+		self.references.fillDeferred()
+		state = self.__dict__.copy()
+		state['stream'] = None
+		return state
+
+	# Detaches the snapshot from the file it was parsed from, so that it can back
+	# the snapshots of other files (see the VM snapshots of main): deferred
+	# clusters are filled, data still held as views of the file is decoded, and
+	# the stream and the load address of the instructions, which belong to the
+	# file, are dropped
+	def detach(self):
+		for obj in self.references:
+			data = getattr(obj, 'data', None)
+			if isinstance(data, memoryview):
+				obj.data = data.tobytes()
+		self.stream = None
+		self.rodata.buffer = None
+		self.instructionsOffset = None
+
 	def parseHeader(self):
 		self.magic = int.from_bytes(self.stream.read(Constants.kMagicSize), 'little')
 		self.size = int.from_bytes(self.stream.read(Constants.kLengthSize), 'little')
@@ -61,7 +112,6 @@ class Snapshot:
 		self.includesCode = self.kind == Kind.FULL_JIT or self.kind == Kind.FULL_AOT
 		self.instructionsImage = 0 #FIXME
 		self.rodataOffset = NumericUtils.roundUp(self.size + Constants.kMagicSize, Constants.kMaxObjectAlignment)
-		self.rodata = BytesIO(self.stream.getbuffer()[self.rodataOffset:])
 		self.previousTextOffset = 0
 		if 'x64-sysv' in self.features:
 			self.arch = 'X64'
@@ -72,62 +122,48 @@ class Snapshot:
 		else:
 			raise Exception('Unknown architecture')
 		self.setConstants(self.arch)
+		self.rodata = DataImage(self.stream.getbuffer()[self.rodataOffset:], self.is64)
 
 	def setConstants(self, arch):
-		if self.arch == 'X64':
-			self.is64 = True
-			Constants.kMonomorphicEntryOffsetAOT = 8
-			Constants.kPolymorphicEntryOffsetAOT = 22
-		elif self.arch == 'ARM':
-			self.is64 = False
-			Constants.kWordSize = 4
-			Constants.kWordSizeLog2 = 2
-			Constants.kObjectAlignment = 8
-			Constants.kObjectAlignmentLog2 = 3
-			Constants.kMonomorphicEntryOffsetAOT = 0
-			Constants.kPolymorphicEntryOffsetAOT = 12
-			Constants.kNumRead32PerWord = int(4 / Constants.kNumBytesPerRead32)
-		elif self.arch == 'ARM64':
-			self.is64 = True
-			Constants.kMonomorphicEntryOffsetAOT = 8
-			Constants.kPolymorphicEntryOffsetAOT = 20
-		else:
+		if arch not in Constants.kLayouts:
 			raise Exception('Unknown architecture')
+		self.layout = Constants.kLayouts[arch]
+		self.is64 = self.layout.kWordSize == 8
 
 	def addBaseObjects(self):
 		#FIXME: review CIDs
 		baseObjects = [
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'Null' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'Sentinel' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'TransitionSentinel' },
-			{ 'cid': ClassId.ARRAY, 'isBase': True, 'name': 'EmptyArray', 'data': [] },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'ZeroArray' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'DynamicType' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'VoidType' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'EmptyTypeArguments' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'True' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'False' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'ExtractorParameterTypes' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'ExtractorParameterNames' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'EmptyContextScope' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'EmptyDescriptors' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'EmptyVarDescriptors' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'EmptyExceptionHandlers' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'ImplicitGetterBytecode' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'ImplicitSetterBytecode' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'ImplicitStaticGetterBytecode' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'MethodExtractorBytecode' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'InvokeClosureBytecode' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'InvokeFieldBytecode' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'NsmDispatcherBytecode' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'DynamicInvocationForwarderBytecode' },
-			*({ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'CachedArgsDescriptors' } for _ in range(Constants.kCachedDescriptorCount)),
-			*({ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'CachedICDataArrays' } for _ in range(Constants.kCachedICDataArrayCount)),
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'CachedArray' },
-			*({ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'ClassStub' } for cid in range(ClassId.CLASS.value, ClassId.UNWIND_ERROR.value + 1) if (cid != ClassId.ERROR.value and cid != ClassId.CALL_SITE_DATA.value)),
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'Dynamic CID' },
-			{ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'VoidCID' },
-			*({ 'cid': ClassId.TYPE, 'isBase': True, 'name': 'StubCode' } for _ in range(Constants.kNumStubEntries) if not Snapshot.includesCode(self.kind))
+			RawBaseObject(ClassId.TYPE, 'Null'),
+			RawBaseObject(ClassId.TYPE, 'Sentinel'),
+			RawBaseObject(ClassId.TYPE, 'TransitionSentinel'),
+			RawBaseObject(ClassId.ARRAY, 'EmptyArray', []),
+			RawBaseObject(ClassId.TYPE, 'ZeroArray'),
+			RawBaseObject(ClassId.TYPE, 'DynamicType'),
+			RawBaseObject(ClassId.TYPE, 'VoidType'),
+			RawBaseObject(ClassId.TYPE, 'EmptyTypeArguments'),
+			RawBaseObject(ClassId.TYPE, 'True'),
+			RawBaseObject(ClassId.TYPE, 'False'),
+			RawBaseObject(ClassId.TYPE, 'ExtractorParameterTypes'),
+			RawBaseObject(ClassId.TYPE, 'ExtractorParameterNames'),
+			RawBaseObject(ClassId.TYPE, 'EmptyContextScope'),
+			RawBaseObject(ClassId.TYPE, 'EmptyDescriptors'),
+			RawBaseObject(ClassId.TYPE, 'EmptyVarDescriptors'),
+			RawBaseObject(ClassId.TYPE, 'EmptyExceptionHandlers'),
+			RawBaseObject(ClassId.TYPE, 'ImplicitGetterBytecode'),
+			RawBaseObject(ClassId.TYPE, 'ImplicitSetterBytecode'),
+			RawBaseObject(ClassId.TYPE, 'ImplicitStaticGetterBytecode'),
+			RawBaseObject(ClassId.TYPE, 'MethodExtractorBytecode'),
+			RawBaseObject(ClassId.TYPE, 'InvokeClosureBytecode'),
+			RawBaseObject(ClassId.TYPE, 'InvokeFieldBytecode'),
+			RawBaseObject(ClassId.TYPE, 'NsmDispatcherBytecode'),
+			RawBaseObject(ClassId.TYPE, 'DynamicInvocationForwarderBytecode'),
+			*(RawBaseObject(ClassId.TYPE, 'CachedArgsDescriptors') for _ in range(Constants.kCachedDescriptorCount)),
+			*(RawBaseObject(ClassId.TYPE, 'CachedICDataArrays') for _ in range(Constants.kCachedICDataArrayCount)),
+			RawBaseObject(ClassId.TYPE, 'CachedArray'),
+			*(RawBaseObject(ClassId.TYPE, 'ClassStub') for cid in range(ClassId.CLASS.value, ClassId.UNWIND_ERROR.value + 1) if (cid != ClassId.ERROR.value and cid != ClassId.CALL_SITE_DATA.value)),
+			RawBaseObject(ClassId.TYPE, 'Dynamic CID'),
+			RawBaseObject(ClassId.TYPE, 'VoidCID'),
+			*(RawBaseObject(ClassId.TYPE, 'StubCode') for _ in range(Constants.kNumStubEntries) if not Snapshot.includesCode(self.kind))
 		]
 		for obj in baseObjects:
 			self.assignRef(obj)
@@ -140,15 +176,72 @@ class Snapshot:
 
 
 	def assignRef(self, obj):
-		self.references.append(obj)
+		self.references[self.nextRefIndex] = obj
 		self.nextRefIndex += 1
 
+	# Reserves references for objects that are only created in the fill stage
+	def allocateRefs(self, count):
+		self.nextRefIndex += count
+
 	def readClusterAlloc(self):
 		cid = StreamUtils.readCid(self.stream)
 		deserializer = Cluster.getDeserializerForCid(self.includesCode, cid)
+		startRef = self.nextRefIndex
 		deserializer.readAlloc(self)
+		self.allocations.append((deserializer, cid, startRef, self.nextRefIndex))
 		return deserializer
 
+	# Lightweight pass over the fill stage, recording where the fill of each
+	# cluster starts and ends in the manifest. Clusters able to skip their fill
+	# without materializing any object (see skipFill in Cluster) are only
+	# indexed, and left to fillCluster. The others are filled on the way, which
+	# also covers the fills that update the snapshot beyond their references:
+	# classes, and the running text offset of code
+	def scanFill(self):
+		self.manifest = [ ]
+		pending = [ ]
+		for cluster, cid, startRef, stopRef in self.allocations:
+			fillOffset = self.stream.tell()
+			if hasattr(cluster, 'skipFill'):
+				cluster.skipFill(self)
+				if self.stream.tell() > fillOffset:
+					pending.append(len(self.manifest))
+			else:
+				cluster.readFill(self)
+			self.manifest.append(ClusterExtent(cid, startRef, stopRef, fillOffset, self.stream.tell() - fillOffset))
+		return pending
+
+	# Fills a cluster skipped by scanFill, given its index in the manifest. The
+	# stream is left where it was
+	def fillCluster(self, index):
+		extent = self.manifest[index]
+		pos = self.stream.tell()
+		self.stream.seek(extent.fillOffset)
+		self.allocations[index][0].readFill(self)
+		if self.stream.tell() != extent.fillOffset + extent.fillLength:
+			raise Exception('Fill of cluster {} (class ID {}) ended at stream offset {} instead of {}'.format(index, extent.cid, self.stream.tell(), extent.fillOffset + extent.fillLength))
+		self.stream.seek(pos)
+
+	# Fill stage driven by scanFill. The skipped clusters of the wanted object
+	# kinds (see kObjectKinds in Cluster), or of every kind by default, are then
+	# filled. The others are deferred in the reference table, and only filled
+	# once one of their objects is read
+	def fillSelected(self, only=None):
+		if only is not None:
+			unknown = set(only) - Cluster.kObjectKinds.keys()
+			if unknown:
+				raise Exception('Unknown object kinds: ' + ', '.join(sorted(unknown)))
+		pending = [ ]
+		for index in self.scanFill():
+			extent = self.manifest[index]
+			kind = Cluster.getKindForCid(extent.cid)
+			if only is None or kind is None or kind in only:
+				pending.append(index)
+			else:
+				self.references.defer(extent.startRef, extent.stopRef, partial(self.fillCluster, index))
+		for index in pending:
+			self.fillCluster(index)
+
 	# Getter of the snapshot's header
 	def getMagic(self):
 		return self.magic
@@ -204,4 +297,154 @@ class Snapshot:
 		prettyString += 'Clusters count: ' + str(self.getNumClusters()) + '\n'
 		prettyString += 'Field table length: ' + str(self.getFieldTableLength()) + '\n'
 		prettyString += 'Data image offset: ' + str(self.getRODataOffset())
-		return prettyString
\ No newline at end of file
+		return prettyString
+
+	# Pretty printable table of the clusters, with their class ID, object count,
+	# references and the byte span of their fill, followed by totals per class
+	# ID, largest fill first. It is built from the manifest of scanFill, so it is
+	# available whenever the fill went through fillSelected (see only)
+	def getCensus(self):
+		if not hasattr(self, 'manifest'):
+			raise Exception('No cluster manifest, the snapshot was filled without scanning its clusters')
+		rows = [ ('#', 'Class ID', 'Objects', 'References', 'Fill offset', 'Fill bytes') ]
+		totals = { }
+		for index, extent in enumerate(self.manifest):
+			name = getCidName(extent.cid)
+			count = extent.stopRef - extent.startRef
+			rows.append((str(index), name, str(count), '{}-{}'.format(extent.startRef, extent.stopRef - 1) if count else '-', hex(extent.fillOffset), str(extent.fillLength)))
+			clusters, objects, length = totals.get(name, (0, 0, 0))
+			totals[name] = (clusters + 1, objects + count, length + extent.fillLength)
+		prettyString = formatTable(rows)
+
+		objects = sum(extent.stopRef - extent.startRef for extent in self.manifest)
+		fillLength = sum(extent.fillLength for extent in self.manifest)
+		rows = [ ('Class ID', 'Clusters', 'Objects', 'Fill bytes', 'Share') ]
+		for name, (clusters, count, length) in sorted(totals.items(), key=lambda item: item[1][2], reverse=True):
+			rows.append((name, str(clusters), str(count), str(length), '{:.1f}%'.format(100 * length / max(fillLength, 1))))
+		rows.append(('Total', str(len(self.manifest)), str(objects), str(fillLength), '100.0%'))
+		prettyString += '\n\n' + formatTable(rows)
+		return prettyString
+
+	# Instance fields of each class, by class ID. Precompiled snapshots drop the
+	# field arrays of most classes, so fields are found through their owner, the
+	# patched class of a patch class
+	def getInstanceFieldsByOwner(self):
+		if self.instanceFieldsByOwner is None:
+			self.instanceFieldsByOwner = { }
+			for cluster, clusterCid, startRef, stopRef in self.allocations:
+				if clusterCid != ClassId.FIELD.value:
+					continue
+				for refId in range(startRef, stopRef):
+					field = self.references[refId]
+					if DecodeUtils.decodeStaticBit(field.kindBits):
+						continue
+					owner = self.references[field.owner]
+					if owner.cid is ClassId.PATCH_CLASS:
+						owner = self.references[owner.patchedClass]
+					self.instanceFieldsByOwner.setdefault(owner.id, [ ]).append(field)
+		return self.instanceFieldsByOwner
+
+	# Field index of the instances of a class, built on first use. Instance
+	# fields store their offset in words in hostOffsetOrFieldId, and the fields
+	# of superclasses come first in the instance, so the superclass chain is
+	# walked until a type that does not name a class. Words without a field
+	# left in the snapshot are not indexed
+	def getInstanceFieldIndex(self, cid):
+		index = self.instanceFieldIndices.get(cid)
+		if index is not None:
+			return index
+		fieldsByOwner = self.getInstanceFieldsByOwner()
+		fields = { }
+		clazz = self.classes.get(cid)
+		while clazz is not None:
+			for field in fieldsByOwner.get(clazz.id, ()):
+				offset = getattr(self.references[field.hostOffsetOrFieldId[1]], 'value', None)
+				if offset is not None:
+					fields.setdefault(offset, field)
+			superType = self.references[clazz.superType]
+			clazz = self.classes.get(self.references[superType.typeClassId].value) if hasattr(superType, 'typeClassId') else None
+		fields = dict(sorted(fields.items()))
+		offsets = { self.references[field.name].data: offset for offset, field in fields.items() }
+		bitmap = self.unboxedFieldsMapAt.get(cid)
+		unboxed = frozenset(offset for offset in fields if bitmap is not None and bitmap.get(offset))
+		index = InstanceFieldIndex(fields, offsets, unboxed)
+		self.instanceFieldIndices[cid] = index
+		return index
+
+	# Views of the instances of user classes (see InstanceView), in cluster
+	# order, optionally only those of the given class ID. Instances are only
+	# read when their fields are, so deferred clusters stay deferred until then
+	def getInstances(self, cid=None):
+		for cluster, clusterCid, startRef, stopRef in self.allocations:
+			if isinstance(cluster, Cluster.InstanceDeserializer) and (cid is None or clusterCid == cid):
+				index = self.getInstanceFieldIndex(clusterCid)
+				for refId in range(startRef, stopRef):
+					yield InstanceView(self, clusterCid, refId, index)
+
+	# Values of the clusters of mints and doubles (see NumberRange), optionally
+	# only those of the given class ID. Deferred clusters of doubles have no
+	# values until filled, in which case they are filled first
+	def getNumbers(self, cid=None):
+		for cluster, clusterCid, startRef, stopRef in self.allocations:
+			if clusterCid not in (ClassId.MINT.value, ClassId.DOUBLE.value) or (cid is not None and clusterCid != cid):
+				continue
+			if not hasattr(cluster, 'values'):
+				self.references.fillDeferredAt(startRef)
+			# Empty clusters are never filled once deferred
+			values = getattr(cluster, 'values', None)
+			if values is None:
+				values = array('d')
+			yield NumberRange(clusterCid, startRef, stopRef, values)
+
+# Read-only mapping from the field names of an instance to their values: the
+# referenced object for a reference, and the word itself for an unboxed field.
+# The fields of an instance start with the word after its header, at offset 1
+class InstanceView(Mapping):
+	def __init__(self, snapshot, cid, refId, index):
+		self.snapshot = snapshot
+		self.cid = cid
+		self.refId = refId
+		self.index = index
+
+	def getClassName(self):
+		clazz = self.snapshot.classes.get(self.cid)
+		return None if clazz is None else self.snapshot.references[clazz.name].data
+
+	def __getitem__(self, name):
+		return self.getWord(self.index.offsets[name])
+
+	# Value of the word at the given offset, named by a field or not
+	def getWord(self, offset):
+		word = self.snapshot.references[self.refId].getWord(offset - 1)
+		if offset in self.index.unboxed:
+			return word
+		return self.snapshot.references[word]
+
+	def __iter__(self):
+		return iter(self.index.offsets)
+
+	def __len__(self):
+		return len(self.index.offsets)
+
+	def __repr__(self):
+		return 'InstanceView({}, refId={})'.format(self.getClassName(), self.refId)
+
+# Name of a class ID, instances of user classes being named after their class ID
+def getCidName(cid):
+	if cid >= ClassId.NUM_PREDEFINED.value:
+		return 'INSTANCE ' + str(cid)
+	return ClassId(cid).name
+
+# Left-aligned columns of the given rows, the first being the header
+def formatTable(rows):
+	widths = [ max(len(row[i]) for row in rows) for i in range(len(rows[0])) ]
+	lines = [ '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows ]
+	lines.insert(1, '  '.join('-' * width for width in widths))
+	return '\n'.join(lines)
+
+# Snapshot with only its header parsed, for identification without a full parse
+def readHeader(data):
+	snapshot = Snapshot.__new__(Snapshot)
+	snapshot.stream = Stream(data)
+	snapshot.parseHeader()
+	return snapshot
@@ -1,6 +1,20 @@
+from array import array
+import sys
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
 from v2_10.ClassId import ClassId
 import v2_10.Constants as Constants
 
+# Typecodes of the array module and little-endian NumPy types of each element
+# type, in the order of the typed data class IDs. SIMD elements (Float32x4,
+# Int32x4, Float64x2) are read as flat arrays of their lanes
+kArrayTypecodes = [ 'b', 'B', 'B', 'h', 'H', 'i', 'I', 'q', 'Q', 'f', 'd', 'f', 'i', 'd' ]
+kNumPyTypes = [ '<i1', '<u1', '<u1', '<i2', '<u2', '<i4', '<u4', '<i8', '<u8', '<f4', '<f8', '<f4', '<i4', '<f8' ]
+
 def elementSizeInBytes(cid):
 	return elementSize(elementType(cid))
 
@@ -8,11 +22,25 @@ def elementType(cid):
 	if cid == ClassId.BYTE_DATA_VIEW.value:
 		return 1
 	elif ClassId.isTypedDataClass(cid):
-		return (cid - ClassId.TYPED_DATA_INT8_ARRAY.value - Constants.kTypedDataCidRemainderInternal) / 3
+		return (cid - ClassId.TYPED_DATA_INT8_ARRAY.value - Constants.kTypedDataCidRemainderInternal) // 3
 	elif ClassId.isTypedDataViewClass(cid):
-		return (cid - ClassId.TYPED_DATA_INT8_ARRAY.value - Constants.kTypedDataCidRemainderView) / 3
+		return (cid - ClassId.TYPED_DATA_INT8_ARRAY.value - Constants.kTypedDataCidRemainderView) // 3
 	elif ClassId.isExternalTypedDataClass(cid):
-		return (cid - ClassId.TYPED_DATA_INT8_ARRAY.value - Constants.kTypedDataCidRemainderExternal) / 3
+		return (cid - ClassId.TYPED_DATA_INT8_ARRAY.value - Constants.kTypedDataCidRemainderExternal) // 3
 
 def elementSize(index):
-	return [1, 1, 1, 2, 2, 4, 4, 8, 8, 4, 8, 16, 16, 16][int(index)]
\ No newline at end of file
+	return [1, 1, 1, 2, 2, 4, 4, 8, 8, 4, 8, 16, 16, 16][index]
+
+# Copy of the elements of typed data in an array of the matching type
+def toArray(cid, data):
+	elements = array(kArrayTypecodes[elementType(cid)])
+	elements.frombytes(data)
+	if sys.byteorder == 'big':
+		elements.byteswap()
+	return elements
+
+# Read-only NumPy view of the elements of typed data, without copying them
+def toNumPy(cid, data):
+	if numpy is None:
+		raise Exception('NumPy is not installed')
+	return numpy.frombuffer(data, dtype=kNumPyTypes[elementType(cid)])
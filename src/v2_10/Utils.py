@@ -1,4 +1,11 @@
-import math
+from array import array
+import re
+import struct
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 import v2_10.Constants as Constants
 
@@ -9,6 +16,145 @@ class NumericUtils:
 	def roundUp(n, m):
 		return (n - 1) + m - (n - 1) % m
 
+# Read cursor over a snapshot blob. The position is a plain integer into a
+# memoryview of the blob, so reads never copy more than what they return
+class Stream:
+	def __init__(self, data, pos = 0):
+		self.buffer = memoryview(data)
+		self.pos = pos
+
+	def read(self, size):
+		start = self.pos
+		self.pos += size
+		return self.buffer[start:self.pos].tobytes()
+
+	def seek(self, pos):
+		self.pos = pos
+
+	def tell(self):
+		return self.pos
+
+	def getbuffer(self):
+		return self.buffer
+
+# Headers of the objects of the data image, by whether the target is 64-bit:
+# strings, objects with a byte length (PcDescriptors, CodeSourceMap), and
+# CompressedStackMaps. The hash is part of the object header on 64-bit targets
+# only, and a field of strings on 32-bit ones
+kDataImageHeaders = {
+	True: ( struct.Struct('<4xIQ'), struct.Struct('<8xi4x'), struct.Struct('<8xI') ),
+	False: ( struct.Struct('<4xII'), struct.Struct('<4xi'), struct.Struct('<4xI') )
+}
+
+# Read-only data image of a snapshot, holding the objects that clusters refer to
+# by offset instead of serializing them. Object headers are unpacked with
+# structs precompiled for the word size of the target (see kDataImageHeaders).
+# The buffer is a view of the input and is not pickled, the objects read from it
+# holding their decoded data once pickled (see RawLazyData)
+class DataImage:
+	def __init__(self, buffer, is64):
+		self.buffer = buffer
+		self.is64 = is64
+		self.setHeaders()
+
+	def setHeaders(self):
+		self.stringHeader, self.lengthHeader, self.stackMapsHeader = kDataImageHeaders[self.is64]
+
+	def __getstate__(self):
+		return { 'buffer': None, 'is64': self.is64 }
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.setHeaders()
+
+	# Returns the length, hash and data offset of the string at the given offset
+	def readString(self, offset):
+		if self.is64:
+			hsh, length = self.stringHeader.unpack_from(self.buffer, offset)
+		else:
+			length, hsh = self.stringHeader.unpack_from(self.buffer, offset)
+		return length >> 1, hsh, offset + self.stringHeader.size # Smi length
+
+	# Returns the length and data offset of the object at the given offset, for
+	# objects with a byte length field (PcDescriptors, CodeSourceMap)
+	def readLength(self, offset):
+		length, = self.lengthHeader.unpack_from(self.buffer, offset)
+		return length, offset + self.lengthHeader.size
+
+	# Returns the flags, size and data offset of the CompressedStackMaps at the
+	# given offset. The two lowest bits of its size field are flags
+	def readStackMaps(self, offset):
+		flagsAndSize, = self.stackMapsHeader.unpack_from(self.buffer, offset)
+		return flagsAndSize & 0x3, flagsAndSize >> 2, offset + self.stackMapsHeader.size
+
+# Table from reference IDs to deserialized objects. An isolate snapshot's table is
+# layered over the table of its VM snapshot: IDs below the base's length are
+# read from the base, which is never written to, and the others index the
+# isolate's own overlay. One VM snapshot can thus back any number of isolates
+# without its references being copied or modified.
+# Ranges of references can also be deferred, in partial parses or for objects
+# built on demand: they are left empty, and filled by a callback the first time
+# one of them is read. A callback may defer its range again
+class ReferenceTable:
+	def __init__(self, size, base=None):
+		self.base = base
+		self.baseLength = len(base) if base is not None else 0
+		self.objects = [ None ] * (size - self.baseLength)
+		self.deferred = [ ]
+
+	def __getitem__(self, index):
+		if index >= self.baseLength:
+			obj = self.objects[index - self.baseLength]
+			if obj is None and self.deferred:
+				return self._fillDeferred(index)
+			return obj
+		return self.base[index]
+
+	def __setitem__(self, index, obj):
+		if index < self.baseLength:
+			raise Exception('Reference {} belongs to the base snapshot, which is read-only'.format(index))
+		self.objects[index - self.baseLength] = obj
+
+	def __len__(self):
+		return self.baseLength + len(self.objects)
+
+	def setRange(self, start, objects):
+		if start < self.baseLength:
+			raise Exception('Reference {} belongs to the base snapshot, which is read-only'.format(start))
+		start -= self.baseLength
+		self.objects[start:start + len(objects)] = objects
+
+	# Defers the references from start to stop (excluded) until one of them is
+	# read, at which point fill is called to fill them all
+	def defer(self, start, stop, fill):
+		self.deferred.append((start, stop, fill))
+
+	# Fills every deferred range
+	def fillDeferred(self):
+		while self.deferred:
+			_, _, fill = self.deferred.pop()
+			fill()
+
+	# Fills the deferred range holding the given reference, if there is one
+	def fillDeferredAt(self, index):
+		for i, (start, stop, fill) in enumerate(self.deferred):
+			if start <= index < stop:
+				del self.deferred[i]
+				fill()
+				return True
+		return False
+
+	def _fillDeferred(self, index):
+		if self.fillDeferredAt(index):
+			return self[index]
+		return self.objects[index - self.baseLength]
+
+	def __iter__(self):
+		self.fillDeferred()
+		if self.base is not None:
+			yield from self.base
+		yield from self.objects
+
 class StreamUtils:
 	kDataBitsPerByte = 7
 	kByteMask = (1 << kDataBitsPerByte) - 1
@@ -17,66 +163,241 @@ class StreamUtils:
 	kMaxDataPerByte = (~kMinDataPerByte & kByteMask)
 	kEndByteMarker = (255 - kMaxDataPerByte)
 	kEndUnsignedByteMarker = (255 - kMaxUnsignedDataPerByte)
+	kMaxRefBytes = 5 # Refs are at most 35 bits wide
+	kNumPyMinRunLength = 64 # Crossover measured by benchmarks/varint_runs.py
+	kShapePatterns = { 'v': rb'[\x00-\x7f]*[\x80-\xff]', 'b': rb'[\x00-\xff]' }
 
-	#FIXME: find a not so hacky way of reading only one byte
-	def read(stream, endByteMarker, maxLoops = -1):
-		b = int.from_bytes(stream.read(1), 'big', signed=False)
+	def read(stream, endByteMarker):
+		data = stream.buffer
+		pos = stream.pos
+		b = data[pos]
 		r = 0
 		s = 0
 		while (b <= StreamUtils.kMaxUnsignedDataPerByte):
 			r |= b << s
 			s += StreamUtils.kDataBitsPerByte
-			x = stream.read(1)
-			b = int.from_bytes(x, 'big', signed=False)
-			maxLoops -= 1
+			pos += 1
+			b = data[pos]
+		stream.pos = pos + 1
 
 		return r | ((b - endByteMarker) << s)
 
-	# 7 data bits per byte because of marker
+	# 7 data bits per byte because of marker. The single byte case is by far
+	# the most common one, so it is decoded before entering the loop
 	def readUnsigned(stream, size = -7):
+		data = stream.buffer
+		pos = stream.pos
+		b = data[pos]
 		if size == 8:
-			return int.from_bytes(stream.read(1), 'big', signed=False) # No marker
-		return StreamUtils.read(stream, StreamUtils.kEndUnsignedByteMarker, math.ceil(size / 7))
+			stream.pos = pos + 1
+			return b # No marker
+		if b > 0x7f:
+			stream.pos = pos + 1
+			return b - 0x80
+		r = 0
+		s = 0
+		while b <= 0x7f:
+			r |= b << s
+			s += 7
+			pos += 1
+			b = data[pos]
+		stream.pos = pos + 1
+		return r | ((b - 0x80) << s)
 
 	def readInt(stream, size):
+		data = stream.buffer
+		pos = stream.pos
+		b = data[pos]
 		if size == 8:
-			return int.from_bytes(stream.read(1), 'big', signed=True) # No marker
-		return StreamUtils.read(stream, StreamUtils.kEndByteMarker, math.ceil(size / 7))
+			stream.pos = pos + 1
+			return b - 0x100 if b > 0x7f else b # No marker
+		if b > 0x7f:
+			stream.pos = pos + 1
+			return b - 0xc0
+		r = 0
+		s = 0
+		while b <= 0x7f:
+			r |= b << s
+			s += 7
+			pos += 1
+			b = data[pos]
+		stream.pos = pos + 1
+		return r | ((b - 0xc0) << s)
 
 	def readCid(stream):
 		return StreamUtils.readInt(stream, 32)
 
-	def readRef(stream):
-		return StreamUtils.readUnsigned(stream)
+	readRef = readUnsigned
+
+	# Decodes a run of count unsigned varints in a single call, into a compact
+	# array of unsigned integers rather than a list of boxed ints. Long runs
+	# are handed to the vectorized scanner when NumPy is available
+	def readUnsignedRun(stream, count):
+		if numpy is not None and count >= StreamUtils.kNumPyMinRunLength:
+			values = StreamUtils._scanUnsignedRun(stream, count)
+			if values.max() <= 0xffffffff:
+				return array('I', values.astype(numpy.uint32).tobytes())
+			return array('Q', values.tobytes())
+
+		data = stream.buffer
+		pos = stream.pos
+		values = [ ]
+		append = values.append
+		for _ in range(count):
+			b = data[pos]
+			pos += 1
+			if b > 0x7f:
+				append(b - 0x80)
+				continue
+			r = 0
+			s = 0
+			while b <= 0x7f:
+				r |= b << s
+				s += 7
+				b = data[pos]
+				pos += 1
+			append(r | ((b - 0x80) << s))
+		stream.pos = pos
+		try:
+			return array('I', values)
+		except OverflowError:
+			return array('Q', values)
+
+	readRefs = readUnsignedRun
+
+	# Decodes count records of a boolean followed by a signed varint, as written
+	# for numbers with their canonical flag, into a list of the booleans and a
+	# compact array of the 64-bit values
+	def readFlaggedIntRun(stream, count):
+		data = stream.buffer
+		pos = stream.pos
+		flags = [ ]
+		values = array('q')
+		appendFlag = flags.append
+		append = values.append
+		for _ in range(count):
+			flag = data[pos]
+			if flag > 1:
+				raise Exception('Expected boolean, but received non-boolean value while reading at stream offset: ' + str(pos))
+			appendFlag(flag == 1)
+			b = data[pos + 1]
+			pos += 2
+			if b > 0x7f:
+				append(b - 0xc0)
+				continue
+			r = 0
+			s = 0
+			while b <= 0x7f:
+				r |= b << s
+				s += 7
+				b = data[pos]
+				pos += 1
+			append(r | ((b - 0xc0) << s))
+		stream.pos = pos
+		return flags, values
+
+	# Every varint in the run ends on the first byte above kMaxUnsignedDataPerByte,
+	# so the terminators are found with a single comparison over the buffer. Each
+	# byte is then shifted by 7 times its distance to the start of its varint, and
+	# the shifted bytes of each varint are OR-ed together
+	def _scanUnsignedRun(stream, count):
+		pos = stream.pos
+		available = len(stream.buffer) - pos
+		window = numpy.frombuffer(stream.buffer, numpy.uint8, min(available, count * StreamUtils.kMaxRefBytes), pos)
+		ends = numpy.flatnonzero(window > StreamUtils.kMaxUnsignedDataPerByte)[:count]
+		if len(ends) < count and len(window) < available:
+			window = numpy.frombuffer(stream.buffer, numpy.uint8, available, pos)
+			ends = numpy.flatnonzero(window > StreamUtils.kMaxUnsignedDataPerByte)[:count]
+		if len(ends) < count:
+			raise Exception('Unexpected end of stream while reading {} varints at stream offset: {}'.format(count, pos))
+		end = int(ends[-1]) + 1
+		starts = numpy.empty(count, numpy.intp)
+		starts[0] = 0
+		starts[1:] = ends[:-1] + 1
+		shifts = numpy.arange(end, dtype=numpy.uint64)
+		shifts -= numpy.repeat(starts, ends - starts + 1).astype(numpy.uint64)
+		shifts *= StreamUtils.kDataBitsPerByte
+		payload = (window[:end] & StreamUtils.kByteMask).astype(numpy.uint64)
+		stream.pos = pos + end
+		return numpy.bitwise_or.reduceat(payload << shifts, starts)
+
+	# Advances the stream past count varints without decoding them. Raw boolean
+	# bytes never carry the end marker, so a boolean directly followed by a
+	# varint is skipped along with it, as part of that varint
+	def skipVarints(stream, count):
+		if numpy is None or count < StreamUtils.kNumPyMinRunLength:
+			StreamUtils.skipMatching(stream, StreamUtils.kShapePatterns['v'], count)
+			return
+		pos = stream.pos
+		available = len(stream.buffer) - pos
+		window = numpy.frombuffer(stream.buffer, numpy.uint8, min(available, count * StreamUtils.kMaxRefBytes), pos)
+		ends = numpy.flatnonzero(window > StreamUtils.kMaxUnsignedDataPerByte)
+		if len(ends) < count and len(window) < available:
+			window = numpy.frombuffer(stream.buffer, numpy.uint8, available, pos)
+			ends = numpy.flatnonzero(window > StreamUtils.kMaxUnsignedDataPerByte)
+		if len(ends) < count:
+			raise Exception('Unexpected end of stream while skipping {} varints at stream offset: {}'.format(count, pos))
+		stream.pos = pos + int(ends[count - 1]) + 1
+
+	# Advances the stream past count records of the given shape, a string with
+	# a 'v' for each varint and a 'b' for each raw byte (booleans and 8-bit
+	# values). Since every varint ends on its first byte above
+	# kMaxUnsignedDataPerByte, the records are matched by a regular expression
+	# without decoding any value
+	def skipRecords(stream, shape, count):
+		if 'b' not in shape:
+			StreamUtils.skipVarints(stream, len(shape) * count)
+			return
+		StreamUtils.skipMatching(stream, b''.join(StreamUtils.kShapePatterns[c] for c in shape), count)
+
+	def skipMatching(stream, record, count):
+		if count == 0:
+			return
+		match = re.match(b'(?:%s){%d}' % (record, count), stream.buffer[stream.pos:])
+		if match is None:
+			raise Exception('Unexpected end of stream while skipping {} records at stream offset: {}'.format(count, stream.pos))
+		stream.pos += match.end()
 
 	def readTokenPosition(stream):
 		return StreamUtils.readInt(stream, 32)
 
 	def readBool(stream):
-		b = stream.read(1)
-		if b == b'\x00':
+		b = stream.buffer[stream.pos]
+		if b == 0:
+			stream.pos += 1
 			return False
-		elif b == b'\x01':
+		elif b == 1:
+			stream.pos += 1
 			return True
 		else:
 			raise Exception('Expected boolean, but received non-boolean value while reading at stream offset: ' + str(stream.tell()))
 
 	def readString(stream):
-		res = b''
-		b = stream.read(1)
-		while b != b'\x00':
-			res += b
-			b = stream.read(1)
-		return res
-
-	def readWordWith32BitReads(stream):
+		data = stream.buffer
+		start = pos = stream.pos
+		while data[pos] != 0:
+			pos += 1
+		stream.pos = pos + 1
+		return data[start:pos].tobytes()
+
+	# Words are written as kNumRead32PerWord 32-bit values, least significant
+	# first, each with the signed encoding of readInt
+	def readWordWith32BitReads(stream, layout):
 		value = 0
-		for j in range(Constants.kNumRead32PerWord):
-			partialValue = StreamUtils.readUnsigned(stream, 32)
+		for j in range(layout.kNumRead32PerWord):
+			partialValue = StreamUtils.readInt(stream, 32) & 0xffffffff
 			value |= partialValue << (j * 32)
 		return value
 
 class DecodeUtils:
+	def decodeBool(value):
+		if value == 0:
+			return False
+		elif value == 1:
+			return True
+		else:
+			raise Exception('Expected boolean, but received non-boolean value: ' + str(value))
+
 	def decodeStaticBit(value):
 		r = (value >> 1) & 1
 		if r == 0:
@@ -1,3 +1,7 @@
+from array import array
+from functools import partial
+from itertools import accumulate
+import re
 import logging
 
 from . import Constants
@@ -5,942 +9,1254 @@ from . import TypedData
 
 from v2_12.ClassId import ClassId
 from v2_12.Kind import Kind
+from v2_12.RawObject import RawArray, RawClass, RawClosure, RawClosureData, RawCode, RawCodeSourceMap, RawCompressedStackMaps, RawDouble, RawExceptionHandlers, RawFfiTrampolineData, RawField, RawFunction, RawFunctionType, RawGrowableObjectArray, RawInstance, RawLibrary, RawLoadingUnit, RawMegamorphicCache, RawMint, RawNamespace, RawObjectPool, RawOneByteString, RawPatchClass, RawPcDescriptors, RawScript, RawSubtypeTestCache, RawTwoByteString, RawType, RawTypeArguments, RawTypeParameter, RawTypeRef, RawTypedData, RawUnlinkedCall, RawWeakSerializationReference
 from v2_12.UnboxedFieldBitmap import UnboxedFieldBitmap
-from v2_12.Utils import DecodeUtils, NumericUtils, StreamUtils, isTopLevelCid
-
-def getDeserializerForCid(includesCode, cid):
-	class LoggingDeserializer():
-		def readAlloc(self, snapshot, isCanonical):
-			logging.info('%s alloc stage at offset: %s', self.__class__.__name__, snapshot.stream.tell())
-			self._readAlloc(snapshot, isCanonical)
-
-		def readFill(self, snapshot, isCanonical):
-			logging.info('%s fill stage at offset: %s', self.__class__.__name__, snapshot.stream.tell())
-			self._readFill(snapshot, isCanonical)
-
-	# Abstract deserializer for class IDs: 22, 23, 81, 82
-	class RODataDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			runningOffset = 0
-			for x in range(count):
-				runningOffset += StreamUtils.readUnsigned(snapshot.stream) << Constants.kObjectAlignmentLog2
-				snapshot.rodata.seek(runningOffset)
-				snapshot.assignRef({ 'cid': self.cid, 'refId': x,'data': self.getObjectAt(snapshot) })
-			self.stopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
+from v2_12.Utils import DecodeUtils, StreamUtils, isTopLevelCid
+
+class LoggingDeserializer():
+	def readAlloc(self, snapshot, isCanonical):
+		logging.info('%s alloc stage at offset: %s', self.__class__.__name__, snapshot.stream.tell())
+		self._readAlloc(snapshot, isCanonical)
+
+	def readFill(self, snapshot, isCanonical):
+		logging.info('%s fill stage at offset: %s', self.__class__.__name__, snapshot.stream.tell())
+		self._readFill(snapshot, isCanonical)
+
+# Abstract deserializer for class IDs: 22, 23, 81, 82
+class RODataDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		rodata = snapshot.rodata
+		alignmentLog2 = snapshot.layout.kObjectAlignmentLog2
+		rawClass, cid, readObjectAt = self.rawClass, self.cid, self.readObjectAt
+		objects = [ ]
+		# Objects are listed in offset order, each offset being a delta from the
+		# previous one in units of the object alignment
+		for refId, offset in enumerate(accumulate(StreamUtils.readUnsignedRun(snapshot.stream, count)), snapshot.nextRefIndex):
+			offset <<= alignmentLog2
+			objectPtr = rawClass(cid, refId)
+			readObjectAt(rodata, offset, objectPtr)
+			objects.append(objectPtr)
+		snapshot.references.setRange(snapshot.nextRefIndex, objects)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		return
+
+	# Reads the header of the object at the given offset of the data image (see
+	# DataImage), its data being left there until first read. Objects have a
+	# byte length field by default
+	def readObjectAt(self, rodata, offset, objectPtr):
+		objectPtr.length, dataOffset = rodata.readLength(offset)
+		objectPtr.setLazyData(rodata.buffer, dataOffset)
+
+# Base class for deserializers with simple counting alloc stages
+class CountDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+# Class ID: 4
+class ClassDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.predefinedStartIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		for _ in range(count):
+			classId = StreamUtils.readCid(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.predefinedStopIndex = snapshot.nextRefIndex
+
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.predefinedStartIndex, self.predefinedStopIndex):
+			classPtr = self._readFromTo(snapshot)
+			classId = StreamUtils.readCid(snapshot.stream)
+			classPtr.id = classId
+			classPtr.refId = snapshot.nextRefIndex
+
+			if (not snapshot.isPrecompiled) and (not snapshot.kind is Kind.FULL_AOT):
+				classPtr.kernelOffset = StreamUtils.readUnsigned(snapshot.stream, 32)
+
+			# The two next fields are skipped IsInternalVMdefinedClassId fails
+			# for the current class ID. Assigning them should be irrelevant.
+			classPtr.hostInstanceSizeInWords = StreamUtils.readInt(snapshot.stream, 32)
+			classPtr.hostNextFieldOffsetInWords = StreamUtils.readInt(snapshot.stream, 32)
+			classPtr.hostTypeArgumentsFieldOffsetInWords = StreamUtils.readInt(snapshot.stream, 32)
+
+			if not snapshot.isPrecompiled:
+				classPtr.targetInstanceSizeInWords = classPtr.hostInstanceSizeInWords
+				classPtr.targetNextFieldOffsetInWords = classPtr.hostNextFieldOffsetInWords
+				classPtr.targetTypeArgumentsFieldOffsetInWords = classPtr.hostTypeArgumentsFieldOffsetInWords
+
+			classPtr.numTypeArguments = StreamUtils.readInt(snapshot.stream, 16)
+			classPtr.numNativeFields = StreamUtils.readUnsigned(snapshot.stream, 16)
+			classPtr.tokenPos = StreamUtils.readTokenPosition(snapshot.stream)
+			classPtr.endTokenPos = StreamUtils.readTokenPosition(snapshot.stream)
+			classPtr.stateBits = StreamUtils.readUnsigned(snapshot.stream, 32)
+
+			if snapshot.isPrecompiled:
+				StreamUtils.readUnsigned(snapshot.stream, 64)
+
+			snapshot.references[refId] = classPtr
+			snapshot.classes[classId] = classPtr
+
+		for refId in range(self.startIndex, self.stopIndex):
+			classPtr = self._readFromTo(snapshot)
+			classId = StreamUtils.readCid(snapshot.stream)
+			classPtr.id = classId
+			#TODO: verify necessity
+			classPtr.refId = snapshot.nextRefIndex
+
+			if (not snapshot.isPrecompiled) and (not snapshot.kind is Kind.FULL_AOT):
+				classPtr.kernelOffset = StreamUtils.readUnsigned(snapshot.stream, 32)
+			classPtr.hostInstanceSizeInWords = StreamUtils.readInt(snapshot.stream, 32)
+			classPtr.hostNextFieldOffsetInWords = StreamUtils.readInt(snapshot.stream, 32)
+			classPtr.hostTypeArgumentsFieldOffsetInWords = StreamUtils.readInt(snapshot.stream, 32)
+
+			if not snapshot.isPrecompiled:
+				classPtr.targetInstanceSizeInWords = classPtr.hostInstanceSizeInWords
+				classPtr.targetNextFieldOffsetInWords = classPtr.hostNextFieldOffsetInWords
+				classPtr.targetTypeArgumentsFieldOffsetInWords = classPtr.hostTypeArgumentsFieldOffsetInWords
+
+			classPtr.numTypeArguments = StreamUtils.readInt(snapshot.stream, 16)
+			classPtr.numNativeFields = StreamUtils.readUnsigned(snapshot.stream, 16)
+			classPtr.tokenPos = StreamUtils.readTokenPosition(snapshot.stream)
+			classPtr.endTokenPos = StreamUtils.readTokenPosition(snapshot.stream)
+			classPtr.stateBits = StreamUtils.readUnsigned(snapshot.stream, 32)
+
+			if snapshot.isPrecompiled and not isTopLevelCid(classId):
+				snapshot.unboxedFieldsMapAt[classId] = UnboxedFieldBitmap(StreamUtils.readUnsigned(snapshot.stream, 64))
+
+			snapshot.references[refId] = classPtr
+			snapshot.classes[classId] = classPtr
+
+	def _readFromTo(self, snapshot):
+		classPtr = RawClass(ClassId.CLASS)
+		classPtr.name = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.userName = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.functions = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.functionsHashTable = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.fields = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.offsetInWordsToField = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.interfaces = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.script = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.library = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.typeParameters = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.superType = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.constants = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.declarationType = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.invocationDispatcherCache = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.allocationStub = StreamUtils.readUnsigned(snapshot.stream)
+		if not (snapshot.kind is Kind.FULL_AOT):
+			classPtr.directImplementors = StreamUtils.readUnsigned(snapshot.stream)
+			if not (snapshot.kind is Kind.FULL or snapshot.kind is Kind.FULL_CORE):
+				classPtr.directSubclasses = StreamUtils.readUnsigned(snapshot.stream)
+				if not (snapshot.kind is Kind.FULL_JIT):
+					classPtr.dependentCode = StreamUtils.readUnsigned(snapshot.stream)
+		return classPtr
+
+# Class ID: 5
+class PatchClassDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			classPtr = self._readFromTo(snapshot, refId)
+			if (not snapshot.isPrecompiled) and (not snapshot.kind is Kind.FULL_AOT):
+				classPtr.libraryKernelOffset = StreamUtils.readInt(snapshot.stream, 32)
+
+			snapshot.references[refId] = classPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		shape = 'vvv'
+		if not snapshot.kind is Kind.FULL_AOT:
+			shape += 'v'
+		if (not snapshot.isPrecompiled) and (not snapshot.kind is Kind.FULL_AOT):
+			shape += 'v'
+		StreamUtils.skipRecords(snapshot.stream, shape, self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		classPtr = RawPatchClass(ClassId.PATCH_CLASS, refId)
+		classPtr.patchedClass = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.originClass = StreamUtils.readUnsigned(snapshot.stream)
+		classPtr.script = StreamUtils.readUnsigned(snapshot.stream)
+		if not snapshot.kind is Kind.FULL_AOT:
+			classPtr.libraryKernelData = StreamUtils.readUnsigned(snapshot.stream)
+
+		return classPtr
+
+# Class ID: 6
+class FunctionDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		if snapshot.kind is Kind.FULL_AOT:
+			self._readFillAOT(snapshot)
 			return
+		for refId in range(self.startIndex, self.stopIndex):
+			funcPtr = self._readFromTo(snapshot, refId)
+			if (snapshot.kind is Kind.FULL):
+				#TODO
+				raise Exception('Not implemented')
+			elif (snapshot.kind is Kind.FULL_AOT):
+				funcPtr.code = StreamUtils.readRef(snapshot.stream)
+			else:
+				#TODO
+				raise Exception('Not implemented')
 
-	# Base class for deserializers with simple counting alloc stages
-	class CountDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				snapshot.assignRef('{} stub'.format(self.__class__.__name__))
-			self.stopIndex = snapshot.nextRefIndex
-
-	# Class ID: 4
-	class ClassDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.predefinedStartIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				classId = StreamUtils.readCid(snapshot.stream)
-				snapshot.assignRef('class')
-			self.predefinedStopIndex = snapshot.nextRefIndex
-
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				snapshot.assignRef('instance size')
-			self.stopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.predefinedStartIndex, self.predefinedStopIndex):
-				classPtr = self._readFromTo(snapshot)
-				classId = StreamUtils.readCid(snapshot.stream)
-				classPtr['id'] = classId
-				classPtr['refId'] = snapshot.nextRefIndex
-
-				if (not snapshot.isPrecompiled) and (not snapshot.kind is Kind.FULL_AOT):
-					classPtr['kernelOffset'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-
-				# The two next fields are skipped IsInternalVMdefinedClassId fails
-				# for the current class ID. Assigning them should be irrelevant.
-				classPtr['hostInstanceSizeInWords'] = StreamUtils.readInt(snapshot.stream, 32)
-				classPtr['hostNextFieldOffsetInWords'] = StreamUtils.readInt(snapshot.stream, 32)
-				classPtr['hostTypeArgumentsFieldOffsetInWords'] = StreamUtils.readInt(snapshot.stream, 32)
-
-				if not snapshot.isPrecompiled:
-					classPtr['targetInstanceSizeInWords'] = classPtr['hostInstanceSizeInWords']
-					classPtr['targetNextFieldOffsetInWords'] = classPtr['hostNextFieldOffsetInWords']
-					classPtr['targetTypeArgumentsFieldOffsetInWords'] = classPtr['hostTypeArgumentsFieldOffsetInWords']
-
-				classPtr['numTypeArguments'] = StreamUtils.readInt(snapshot.stream, 16)
-				classPtr['numNativeFields'] = StreamUtils.readUnsigned(snapshot.stream, 16)
-				classPtr['tokenPos'] = StreamUtils.readTokenPosition(snapshot.stream)
-				classPtr['endTokenPos'] = StreamUtils.readTokenPosition(snapshot.stream)
-				classPtr['stateBits'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-
-				if snapshot.isPrecompiled:
-					StreamUtils.readUnsigned(snapshot.stream, 64)
-
-				snapshot.references[refId] = classPtr
-				snapshot.classes[classId] = classPtr
-
-			for refId in range(self.startIndex, self.stopIndex):
-				classPtr = self._readFromTo(snapshot)
-				classId = StreamUtils.readCid(snapshot.stream)
-				classPtr['id'] = classId
-				#TODO: verify necessity
-				classPtr['refId'] = snapshot.nextRefIndex
-
-				if (not snapshot.isPrecompiled) and (not snapshot.kind is Kind.FULL_AOT):
-					classPtr['kernelOffset'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-				classPtr['hostInstanceSizeInWords'] = StreamUtils.readInt(snapshot.stream, 32)
-				classPtr['hostNextFieldOffsetInWords'] = StreamUtils.readInt(snapshot.stream, 32)
-				classPtr['hostTypeArgumentsFieldOffsetInWords'] = StreamUtils.readInt(snapshot.stream, 32)
-
-				if not snapshot.isPrecompiled:
-					classPtr['targetInstanceSizeInWords'] = classPtr['hostInstanceSizeInWords']
-					classPtr['targetNextFieldOffsetInWords'] = classPtr['hostNextFieldOffsetInWords']
-					classPtr['targetTypeArgumentsFieldOffsetInWords'] = classPtr['hostTypeArgumentsFieldOffsetInWords']
-
-				classPtr['numTypeArguments'] = StreamUtils.readInt(snapshot.stream, 16)
-				classPtr['numNativeFields'] = StreamUtils.readUnsigned(snapshot.stream, 16)
-				classPtr['tokenPos'] = StreamUtils.readTokenPosition(snapshot.stream)
-				classPtr['endTokenPos'] = StreamUtils.readTokenPosition(snapshot.stream)
-				classPtr['stateBits'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-
-				if snapshot.isPrecompiled and not isTopLevelCid(classId):
-					snapshot.unboxedFieldsMapAt[classId] = UnboxedFieldBitmap(StreamUtils.readUnsigned(snapshot.stream, 64))
-
-				snapshot.references[refId] = classPtr
-				snapshot.classes[classId] = classPtr
-
-		def _readFromTo(self, snapshot):
-			classPtr = { 'cid': ClassId.CLASS }
-			classPtr['name'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['userName'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['functions'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['functionsHashTable'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['fields'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['offsetInWordsToField'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['interfaces'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['script'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['library'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['typeParameters'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['superType'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['constants'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['declarationType'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['invocationDispatcherCache'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['allocationStub'] = StreamUtils.readUnsigned(snapshot.stream)
-			if not (snapshot.kind is Kind.FULL_AOT):
-				classPtr['directImplementors'] = StreamUtils.readUnsigned(snapshot.stream)
-				if not (snapshot.kind is Kind.FULL or snapshot.kind is Kind.FULL_CORE):
-					classPtr['directSubclasses'] = StreamUtils.readUnsigned(snapshot.stream)
-					if not (snapshot.kind is Kind.FULL_JIT):
-						classPtr['dependentCode'] = StreamUtils.readUnsigned(snapshot.stream)
-			return classPtr
-
-	# Class ID: 5
-	class PatchClassDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				classPtr = self._readFromTo(snapshot, refId)
-				if (not snapshot.isPrecompiled) and (not snapshot.kind is Kind.FULL_AOT):
-					classPtr['libraryKernelOffset'] = StreamUtils.readInt(snapshot.stream, 32)
-
-				snapshot.references[refId] = classPtr
-
-		def _readFromTo(self, snapshot, refId):
-			classPtr = { 'cid': ClassId.PATCH_CLASS, 'refId': refId }
-			classPtr['patchedClass'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['originClass'] = StreamUtils.readUnsigned(snapshot.stream)
-			classPtr['script'] = StreamUtils.readUnsigned(snapshot.stream)
-			if not snapshot.kind is Kind.FULL_AOT:
-				classPtr['libraryKernelData'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return classPtr
-
-	# Class ID: 6
-	class FunctionDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				funcPtr = self._readFromTo(snapshot, refId)
-				if (snapshot.kind is Kind.FULL):
-					#TODO
-					raise Exception('Not implemented')
-				elif (snapshot.kind is Kind.FULL_AOT):
-					funcPtr['code'] = StreamUtils.readRef(snapshot.stream)
-				else:
-					#TODO
-					raise Exception('Not implemented')
-
-				#TODO: if debug
-
-				if not snapshot.isPrecompiled:
-					if not snapshot.kind is Kind.FULL_AOT:
-						funcPtr['tokenPos'] = StreamUtils.readTokenPosition(snapshot.stream)
-						funcPtr['endTokenPos'] = StreamUtils.readTokenPosition(snapshot.stream)
-						funcPtr['kernelOffset'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-					#TODO: reset
-
-				funcPtr['packedFields'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-				funcPtr['kindTag'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-
-				if (not snapshot.kind is Kind.FULL_AOT) and (not snapshot.isPrecompiled):
-					funcPtr['usageCounter'] = 0
-					funcPtr['optimizedInstructionCount'] = 0
-					funcPtr['optimizedCallSiteCount'] = 0
-					funcPtr['deoptimizationCounter'] = 0
-					funcPtr['stateBits'] = 0
-					funcPtr['inliningDepth'] = 0
-
-				snapshot.references[refId] = funcPtr
-
-		def _readFromTo(self, snapshot, refId):
-			funcPtr = { 'cid': ClassId.FUNCTION, 'refId': refId }
-			funcPtr['name'] = StreamUtils.readUnsigned(snapshot.stream)
-			funcPtr['owner'] = StreamUtils.readUnsigned(snapshot.stream)
-			funcPtr['parameterNames'] = StreamUtils.readUnsigned(snapshot.stream)
-			funcPtr['signature'] = StreamUtils.readUnsigned(snapshot.stream)
-			funcPtr['data'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return funcPtr
-
-	# Class ID: 7
-	class ClosureDataDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				closureDataPtr = { 'cid': ClassId.CLOSURE_DATA, 'refId': refId }
-
-				if (snapshot.kind is Kind.FULL_AOT):
-					closureDataPtr['contextScope'] = None
-				else:
-					closureDataPtr['contextScope'] = StreamUtils.readRef(snapshot.stream)
-
-				closureDataPtr['parentFunction'] = StreamUtils.readRef(snapshot.stream)
-				closureDataPtr['closure'] = StreamUtils.readRef(snapshot.stream)
-				closureDataPtr['defaultTypeArguments'] = StreamUtils.readRef(snapshot.stream)
-				closureDataPtr['defaultTypeArgumentsInfo'] = StreamUtils.readRef(snapshot.stream)
-
-				snapshot.references[refId] = closureDataPtr
-
-	# Class ID: 10
-	class FfiTrampolineDataDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				dataPtr = self._readFromTo(snapshot, refId)
-				dataPtr['callbackId'] = StreamUtils.readUnsigned(snapshot.stream) if snapshot.kind is Kind.FULL_AOT else 0
-
-				snapshot.references[refId] = dataPtr
-			
-		def _readFromTo(self, snapshot, refId):
-			dataPtr = { 'cid': ClassId.FFI_TRAMPOLINE_DATA, 'refId': refId }
-			dataPtr['signatureType'] = StreamUtils.readUnsigned(snapshot.stream)
-			dataPtr['CSignature'] = StreamUtils.readUnsigned(snapshot.stream)
-			dataPtr['callbackTarget'] = StreamUtils.readUnsigned(snapshot.stream)
-			dataPtr['callbackExceptionalReturn'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return dataPtr
-
-	# Class ID: 11
-	class FieldDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				fieldPtr = self._readFromTo(snapshot, refId)
-
-				if snapshot.kind is not Kind.FULL_AOT:
-					fieldPtr['guardedListLength'] = StreamUtils.readRef(snapshot.stream)
-
-				if snapshot.kind is Kind.FULL_JIT:
-					fieldPtr['dependentCode'] = StreamUtils.readRef(snapshot.stream)
-
-				if snapshot.kind is not Kind.FULL_AOT:
-					fieldPtr['tokenPos'] = StreamUtils.readTokenPosition(snapshot.stream)
-					fieldPtr['endTokenPos'] = StreamUtils.readTokenPosition(snapshot.stream)
-					fieldPtr['guardedCid'] = StreamUtils.readCid(snapshot.stream)
-					fieldPtr['isNullable'] = StreamUtils.readCid(snapshot.stream)
-					staticTypeExactnessState = StreamUtils.readInt(snapshot.stream, 8)
-					if snapshot.arch == 'X64':
-						fieldPtr['staticTypeExactnessState'] = staticTypeExactnessState
-					if not snapshot.isPrecompiled:
-						fieldPtr['kernelOffset'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-
-				fieldPtr['kindBits'] = StreamUtils.readUnsigned(snapshot.stream, 16)
-
-				valueOrOffset = StreamUtils.readRef(snapshot.stream)
-				if DecodeUtils.decodeStaticBit(fieldPtr['kindBits']):
-					fieldId = StreamUtils.readUnsigned(snapshot.stream)
-					fieldPtr['hostOffsetOrFieldId'] = ('Smi', fieldId)
-				else:
-					fieldPtr['hostOffsetOrFieldId'] = ('Smi', valueOrOffset)
-					if not snapshot.isPrecompiled:
-						fieldPtr['targetOffset'] = ('Smi', fieldPtr['hostOffsetOrFieldId'])
+			#TODO: if debug
 
-				snapshot.references[refId] = fieldPtr
+			if not snapshot.isPrecompiled:
+				if not snapshot.kind is Kind.FULL_AOT:
+					funcPtr.tokenPos = StreamUtils.readTokenPosition(snapshot.stream)
+					funcPtr.endTokenPos = StreamUtils.readTokenPosition(snapshot.stream)
+					funcPtr.kernelOffset = StreamUtils.readUnsigned(snapshot.stream, 32)
+				#TODO: reset
 
-		def _readFromTo(self, snapshot, refId):
-			fieldPtr = { 'cid': ClassId.FIELD, 'refId': refId }
-			fieldPtr['name'] = StreamUtils.readUnsigned(snapshot.stream)
-			fieldPtr['owner'] = StreamUtils.readUnsigned(snapshot.stream)
-			fieldPtr['type'] = StreamUtils.readUnsigned(snapshot.stream)
-			fieldPtr['initializerFunction'] = StreamUtils.readUnsigned(snapshot.stream)
+			funcPtr.packedFields = StreamUtils.readUnsigned(snapshot.stream, 32)
+			funcPtr.kindTag = StreamUtils.readUnsigned(snapshot.stream, 32)
 
-			return fieldPtr
+			if (not snapshot.kind is Kind.FULL_AOT) and (not snapshot.isPrecompiled):
+				funcPtr.usageCounter = 0
+				funcPtr.optimizedInstructionCount = 0
+				funcPtr.optimizedCallSiteCount = 0
+				funcPtr.deoptimizationCounter = 0
+				funcPtr.stateBits = 0
+				funcPtr.inliningDepth = 0
 
-	# Class ID: 12
-	class ScriptDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				scriptPtr = self._readFromTo(snapshot, refId)
+			snapshot.references[refId] = funcPtr
 
-				scriptPtr['lineOffset'] = StreamUtils.readInt(snapshot.stream, 32)
-				scriptPtr['colOffset'] = StreamUtils.readInt(snapshot.stream, 32)
-				if not snapshot.isPrecompiled:
-					scriptPtr['flagsAndMaxPosition'] = StreamUtils.readInt(snapshot.stream, 32)
-				scriptPtr['kernelScriptIndex'] = StreamUtils.readInt(snapshot.stream, 32)
-				scriptPtr['loadTimestamp'] = 0
-
-				snapshot.references[refId] = scriptPtr
-
-		def _readFromTo(self, snapshot, refId):
-			scriptPtr = { 'cid': ClassId.SCRIPT, 'refId': refId }
-			scriptPtr['url'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			if snapshot.kind is Kind.FULL or snapshot.kind is Kind.FULL_JIT:
-				scriptPtr['resolvedUrl'] = StreamUtils.readUnsigned(snapshot.stream)
-				scriptPtr['compileTimeConstants'] = StreamUtils.readUnsigned(snapshot.stream)
-				scriptPtr['lineStarts'] = StreamUtils.readUnsigned(snapshot.stream)
-				scriptPtr['debugPositions'] = StreamUtils.readUnsigned(snapshot.stream)
-				scriptPtr['kernelProgramInfo'] = StreamUtils.readUnsigned(snapshot.stream)
-				scriptPtr['source'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return scriptPtr
-
-	# Class ID: 13
-	class LibraryDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				libraryPtr = self._readFromTo(snapshot, refId)
-				libraryPtr['nativeEntryResolver'] = None
-				libraryPtr['nativeEntrySymbolResolver'] = None
-				libraryPtr['index'] = StreamUtils.readInt(snapshot.stream, 32)
-				libraryPtr['numImports'] = StreamUtils.readUnsigned(snapshot.stream, 16)
-				libraryPtr['loadState'] = StreamUtils.readInt(snapshot.stream, 8)
-
-				#TODO: missing update
-				libraryPtr['flags'] = StreamUtils.readUnsigned(snapshot.stream, 8)
-
-				if (not snapshot.isPrecompiled) and (snapshot.kind is not Kind.FULL_AOT):
-					libraryPtr['binaryDeclaration'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-
-				snapshot.references[refId] = libraryPtr
-
-		def _readFromTo(self, snapshot, refId):
-			libraryPtr = { 'cid': ClassId.LIBRARY, 'refId': refId }
-			libraryPtr['name'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['url'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['privateKey'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['dictionary'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['metadata'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['toplevelClass'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['usedScripts'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['loadingUnit'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['imports'] = StreamUtils.readUnsigned(snapshot.stream)
-			libraryPtr['exports'] = StreamUtils.readUnsigned(snapshot.stream)
-			if (snapshot.kind is Kind.FULL) or (snapshot.kind is Kind.FULL_JIT):
-				libraryPtr['dependencies'] = StreamUtils.readUnsigned(snapshot.stream)
-				libraryPtr['kernelData'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return libraryPtr
-
-	# Class ID: 14
-	class NamespaceDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				namespacePtr = { 'cid': ClassId.NAMESPACE, 'refId': refId }
-				namespacePtr['target'] = StreamUtils.readUnsigned(snapshot.stream)
-				namespacePtr['showNames'] = StreamUtils.readUnsigned(snapshot.stream)
-				namespacePtr['hideNames'] = StreamUtils.readUnsigned(snapshot.stream)
-				namespacePtr['owner'] = StreamUtils.readUnsigned(snapshot.stream)
-
-				snapshot.references[refId] = namespacePtr
-
-	# Class ID: 16
-	class CodeDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				snapshot.assignRef('code')
-			self.stopIndex = self.deferredStartIndex = snapshot.nextRefIndex
-			deferredCount = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(deferredCount):
-				snapshot.assignRef('code')
-			self.deferredStopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				codePtr = self._innerRead(snapshot, refId, False)
-
-				snapshot.references[refId] = codePtr
-
-			for refId in range(self.deferredStartIndex, self.deferredStopIndex):
-				codePtr = self._innerRead(snapshot, refId, True)
-
-				snapshot.references[refId] = codePtr
-
-		def _innerRead(self, snapshot, refId, deferred):
-			codePtr = { 'cid': ClassId.CODE, 'refId': refId }
-			self._readInstructions(snapshot, codePtr, deferred)
-
-			if not (snapshot.kind is Kind.FULL_AOT and snapshot.useBareInstructions):
-				codePtr['objectPool'] = StreamUtils.readRef(snapshot.stream)
+	def skipFill(self, snapshot, isCanonical):
+		if not snapshot.kind is Kind.FULL_AOT:
+			#TODO
+			raise Exception('Not implemented')
+		StreamUtils.skipRecords(snapshot.stream, 'vvvvvvvv', self.stopIndex - self.startIndex)
+
+	# Precompiled functions are eight varints: the fields read by _readFromTo,
+	# then their code, packed fields and kind tag. They are decoded for the
+	# whole cluster as a single run
+	def _readFillAOT(self, snapshot):
+		values = StreamUtils.readUnsignedRun(snapshot.stream, 8 * (self.stopIndex - self.startIndex))
+		references = snapshot.references
+		for i, refId in enumerate(range(self.startIndex, self.stopIndex)):
+			funcPtr = RawFunction(ClassId.FUNCTION, refId)
+			(funcPtr.name, funcPtr.owner, funcPtr.parameterNames, funcPtr.signature, funcPtr.data,
+				funcPtr.code, funcPtr.packedFields, funcPtr.kindTag) = values[8 * i:8 * i + 8]
+			references[refId] = funcPtr
+
+	def _readFromTo(self, snapshot, refId):
+		funcPtr = RawFunction(ClassId.FUNCTION, refId)
+		funcPtr.name = StreamUtils.readUnsigned(snapshot.stream)
+		funcPtr.owner = StreamUtils.readUnsigned(snapshot.stream)
+		funcPtr.parameterNames = StreamUtils.readUnsigned(snapshot.stream)
+		funcPtr.signature = StreamUtils.readUnsigned(snapshot.stream)
+		funcPtr.data = StreamUtils.readUnsigned(snapshot.stream)
+
+		return funcPtr
+
+# Class ID: 7
+class ClosureDataDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			closureDataPtr = RawClosureData(ClassId.CLOSURE_DATA, refId)
+
+			if (snapshot.kind is Kind.FULL_AOT):
+				closureDataPtr.contextScope = None
 			else:
-				codePtr['objectPool'] = None
-			codePtr['owner'] = StreamUtils.readRef(snapshot.stream)
-			codePtr['exceptionHandlers'] = StreamUtils.readRef(snapshot.stream)
-			codePtr['pcDescriptors'] = StreamUtils.readRef(snapshot.stream)
-			codePtr['catchEntry'] = StreamUtils.readRef(snapshot.stream)
-			codePtr['compressedStackMaps'] = StreamUtils.readRef(snapshot.stream)
-			codePtr['inlinedIdToFunction'] = StreamUtils.readRef(snapshot.stream)
-			codePtr['codeSourceMap'] = StreamUtils.readRef(snapshot.stream)
-
-			if (not snapshot.isPrecompiled) and (snapshot.kind is Kind.FULL_JIT):
-				codePtr['deoptInfoArray'] = StreamUtils.readRef(snapshot.stream)
-				codePtr['staticCallsTargetTable'] = StreamUtils.readRef(snapshot.stream)
-
-			if not snapshot.isProduct:
-				codePtr['returnAddressMetadata'] = StreamUtils.readRef(snapshot.stream)
-				codePtr['varDescriptors'] = None
-				codePtr['comments'] = StreamUtils.readRef(snapshot.stream) if snapshot.hasComments else []
-				codePtr['compileTimestamp'] = 0
-
-			codePtr['stateBits'] = StreamUtils.readInt(snapshot.stream, 32)
-
-			return codePtr
-
-		def _readInstructions(self, snapshot, codePtr, deferred):
-			if deferred:
-				if snapshot.isPrecompiled and snapshot.useBareInstructions:
-					codePtr['entryPoint'] = 'entryPoint'
-					codePtr['uncheckedEntryPoint'] = 'entryPoint'
-					codePtr['monomorphicEntryPoint'] = 'entryPoint'
-					codePtr['monomorphicUncheckedEntryPoint'] = 'entryPoint'
-					codePtr['instructionsLength'] = 0
-					return
-				codePtr['uncheckedOffset'] = 0
-				#TODO: cahed entry points
-				return
-
-			if snapshot.isPrecompiled and snapshot.useBareInstructions:
-				snapshot.previousTextOffset += StreamUtils.readUnsigned(snapshot.stream)
-				payloadStart = snapshot.instructionsImage + snapshot.previousTextOffset
-				payloadInfo = StreamUtils.readUnsigned(snapshot.stream)
-				uncheckedOffset = payloadInfo >> 1
-				hasMonomorphicEntrypoint = (payloadInfo & 1) == 1
-
-				entryOffset = Constants.kPolymorphicEntryOffsetAOT if hasMonomorphicEntrypoint else 0
-				monomorphicEntryOffset = Constants.kMonomorphicEntryOffsetAOT if hasMonomorphicEntrypoint else 0
-				entryPoint = payloadStart + entryOffset
-				monomorphicEntryPoint = payloadStart + monomorphicEntryOffset
-
-				codePtr['entryPoint'] = entryPoint
-				codePtr['uncheckedEntryPoint'] = entryPoint + uncheckedOffset
-				codePtr['monomorphicEntryPoint'] = monomorphicEntryPoint
-				codePtr['monomorphicUncheckedEntryPoint'] = monomorphicEntryPoint + uncheckedOffset
+				closureDataPtr.contextScope = StreamUtils.readRef(snapshot.stream)
+
+			closureDataPtr.parentFunction = StreamUtils.readRef(snapshot.stream)
+			closureDataPtr.closure = StreamUtils.readRef(snapshot.stream)
+			closureDataPtr.defaultTypeArguments = StreamUtils.readRef(snapshot.stream)
+			closureDataPtr.defaultTypeArgumentsInfo = StreamUtils.readRef(snapshot.stream)
+
+			snapshot.references[refId] = closureDataPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		shape = 'vvvv' if snapshot.kind is Kind.FULL_AOT else 'vvvvv'
+		StreamUtils.skipRecords(snapshot.stream, shape, self.stopIndex - self.startIndex)
+
+# Class ID: 10
+class FfiTrampolineDataDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			dataPtr = self._readFromTo(snapshot, refId)
+			dataPtr.callbackId = StreamUtils.readUnsigned(snapshot.stream) if snapshot.kind is Kind.FULL_AOT else 0
+
+			snapshot.references[refId] = dataPtr
+		
+	def skipFill(self, snapshot, isCanonical):
+		shape = 'vvvvv' if snapshot.kind is Kind.FULL_AOT else 'vvvv'
+		StreamUtils.skipRecords(snapshot.stream, shape, self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		dataPtr = RawFfiTrampolineData(ClassId.FFI_TRAMPOLINE_DATA, refId)
+		dataPtr.signatureType = StreamUtils.readUnsigned(snapshot.stream)
+		dataPtr.CSignature = StreamUtils.readUnsigned(snapshot.stream)
+		dataPtr.callbackTarget = StreamUtils.readUnsigned(snapshot.stream)
+		dataPtr.callbackExceptionalReturn = StreamUtils.readUnsigned(snapshot.stream)
+
+		return dataPtr
+
+# Class ID: 11
+class FieldDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			fieldPtr = self._readFromTo(snapshot, refId)
+
+			if snapshot.kind is not Kind.FULL_AOT:
+				fieldPtr.guardedListLength = StreamUtils.readRef(snapshot.stream)
+
+			if snapshot.kind is Kind.FULL_JIT:
+				fieldPtr.dependentCode = StreamUtils.readRef(snapshot.stream)
+
+			if snapshot.kind is not Kind.FULL_AOT:
+				fieldPtr.tokenPos = StreamUtils.readTokenPosition(snapshot.stream)
+				fieldPtr.endTokenPos = StreamUtils.readTokenPosition(snapshot.stream)
+				fieldPtr.guardedCid = StreamUtils.readCid(snapshot.stream)
+				fieldPtr.isNullable = StreamUtils.readCid(snapshot.stream)
+				staticTypeExactnessState = StreamUtils.readInt(snapshot.stream, 8)
+				if snapshot.arch == 'X64':
+					fieldPtr.staticTypeExactnessState = staticTypeExactnessState
+				if not snapshot.isPrecompiled:
+					fieldPtr.kernelOffset = StreamUtils.readUnsigned(snapshot.stream, 32)
 
-				return
+			fieldPtr.kindBits = StreamUtils.readUnsigned(snapshot.stream, 16)
 
+			valueOrOffset = StreamUtils.readRef(snapshot.stream)
+			if DecodeUtils.decodeStaticBit(fieldPtr.kindBits):
+				fieldId = StreamUtils.readUnsigned(snapshot.stream)
+				fieldPtr.hostOffsetOrFieldId = ('Smi', fieldId)
+			else:
+				fieldPtr.hostOffsetOrFieldId = ('Smi', valueOrOffset)
+				if not snapshot.isPrecompiled:
+					fieldPtr.targetOffset = ('Smi', fieldPtr.hostOffsetOrFieldId)
+
+			snapshot.references[refId] = fieldPtr
+
+	# Fields are skipped up to their kind bits, which tell whether a field ID
+	# follows its value or offset
+	def skipFill(self, snapshot, isCanonical):
+		shape = 'vvvv'
+		if snapshot.kind is not Kind.FULL_AOT:
+			shape += 'v'
+		if snapshot.kind is Kind.FULL_JIT:
+			shape += 'v'
+		if snapshot.kind is not Kind.FULL_AOT:
+			shape += 'vvvvb'
+			if not snapshot.isPrecompiled:
+				shape += 'v'
+		stream = snapshot.stream
+		for _ in range(self.stopIndex - self.startIndex):
+			StreamUtils.skipRecords(stream, shape, 1)
+			kindBits = StreamUtils.readUnsigned(stream, 16)
+			StreamUtils.skipVarints(stream, 2 if DecodeUtils.decodeStaticBit(kindBits) else 1)
+
+	def _readFromTo(self, snapshot, refId):
+		fieldPtr = RawField(ClassId.FIELD, refId)
+		fieldPtr.name = StreamUtils.readUnsigned(snapshot.stream)
+		fieldPtr.owner = StreamUtils.readUnsigned(snapshot.stream)
+		fieldPtr.type = StreamUtils.readUnsigned(snapshot.stream)
+		fieldPtr.initializerFunction = StreamUtils.readUnsigned(snapshot.stream)
+
+		return fieldPtr
+
+# Class ID: 12
+class ScriptDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			scriptPtr = self._readFromTo(snapshot, refId)
+
+			scriptPtr.lineOffset = StreamUtils.readInt(snapshot.stream, 32)
+			scriptPtr.colOffset = StreamUtils.readInt(snapshot.stream, 32)
+			if not snapshot.isPrecompiled:
+				scriptPtr.flagsAndMaxPosition = StreamUtils.readInt(snapshot.stream, 32)
+			scriptPtr.kernelScriptIndex = StreamUtils.readInt(snapshot.stream, 32)
+			scriptPtr.loadTimestamp = 0
+
+			snapshot.references[refId] = scriptPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		shape = 'v'
+		if snapshot.kind is Kind.FULL or snapshot.kind is Kind.FULL_JIT:
+			shape += 'vvvvvv'
+		shape += 'vv'
+		if not snapshot.isPrecompiled:
+			shape += 'v'
+		shape += 'v'
+		StreamUtils.skipRecords(snapshot.stream, shape, self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		scriptPtr = RawScript(ClassId.SCRIPT, refId)
+		scriptPtr.url = StreamUtils.readUnsigned(snapshot.stream)
+
+		if snapshot.kind is Kind.FULL or snapshot.kind is Kind.FULL_JIT:
+			scriptPtr.resolvedUrl = StreamUtils.readUnsigned(snapshot.stream)
+			scriptPtr.compileTimeConstants = StreamUtils.readUnsigned(snapshot.stream)
+			scriptPtr.lineStarts = StreamUtils.readUnsigned(snapshot.stream)
+			scriptPtr.debugPositions = StreamUtils.readUnsigned(snapshot.stream)
+			scriptPtr.kernelProgramInfo = StreamUtils.readUnsigned(snapshot.stream)
+			scriptPtr.source = StreamUtils.readUnsigned(snapshot.stream)
+
+		return scriptPtr
+
+# Class ID: 13
+class LibraryDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			libraryPtr = self._readFromTo(snapshot, refId)
+			libraryPtr.nativeEntryResolver = None
+			libraryPtr.nativeEntrySymbolResolver = None
+			libraryPtr.index = StreamUtils.readInt(snapshot.stream, 32)
+			libraryPtr.numImports = StreamUtils.readUnsigned(snapshot.stream, 16)
+			libraryPtr.loadState = StreamUtils.readInt(snapshot.stream, 8)
+
+			#TODO: missing update
+			libraryPtr.flags = StreamUtils.readUnsigned(snapshot.stream, 8)
+
+			if (not snapshot.isPrecompiled) and (snapshot.kind is not Kind.FULL_AOT):
+				libraryPtr.binaryDeclaration = StreamUtils.readUnsigned(snapshot.stream, 32)
+
+			snapshot.references[refId] = libraryPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		shape = 'vvvvvvvvvv'
+		if (snapshot.kind is Kind.FULL) or (snapshot.kind is Kind.FULL_JIT):
+			shape += 'vv'
+		shape += 'vvbb'
+		if (not snapshot.isPrecompiled) and (snapshot.kind is not Kind.FULL_AOT):
+			shape += 'v'
+		StreamUtils.skipRecords(snapshot.stream, shape, self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		libraryPtr = RawLibrary(ClassId.LIBRARY, refId)
+		libraryPtr.name = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.url = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.privateKey = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.dictionary = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.metadata = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.toplevelClass = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.usedScripts = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.loadingUnit = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.imports = StreamUtils.readUnsigned(snapshot.stream)
+		libraryPtr.exports = StreamUtils.readUnsigned(snapshot.stream)
+		if (snapshot.kind is Kind.FULL) or (snapshot.kind is Kind.FULL_JIT):
+			libraryPtr.dependencies = StreamUtils.readUnsigned(snapshot.stream)
+			libraryPtr.kernelData = StreamUtils.readUnsigned(snapshot.stream)
+
+		return libraryPtr
+
+# Class ID: 14
+class NamespaceDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			namespacePtr = RawNamespace(ClassId.NAMESPACE, refId)
+			namespacePtr.target = StreamUtils.readUnsigned(snapshot.stream)
+			namespacePtr.showNames = StreamUtils.readUnsigned(snapshot.stream)
+			namespacePtr.hideNames = StreamUtils.readUnsigned(snapshot.stream)
+			namespacePtr.owner = StreamUtils.readUnsigned(snapshot.stream)
+
+			snapshot.references[refId] = namespacePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vvvv', self.stopIndex - self.startIndex)
+
+# Class ID: 16
+class CodeDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = self.deferredStartIndex = snapshot.nextRefIndex
+		deferredCount = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(deferredCount)
+		self.deferredStopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			codePtr = self._innerRead(snapshot, refId, False)
+
+			snapshot.references[refId] = codePtr
+
+		for refId in range(self.deferredStartIndex, self.deferredStopIndex):
+			codePtr = self._innerRead(snapshot, refId, True)
+
+			snapshot.references[refId] = codePtr
+
+	# Every field of a code object is a varint. Text offsets are only
+	# accumulated by readFill, so skipping leaves previousTextOffset untouched
+	def skipFill(self, snapshot, isCanonical):
+		if self.stopIndex > self.startIndex and not (snapshot.isPrecompiled and snapshot.useBareInstructions):
 			#TODO
 			raise Exception('Raw instructions deserialization missing')
+		numVarints = 8
+		if not (snapshot.kind is Kind.FULL_AOT and snapshot.useBareInstructions):
+			numVarints += 1
+		if (not snapshot.isPrecompiled) and (snapshot.kind is Kind.FULL_JIT):
+			numVarints += 2
+		if not snapshot.isProduct:
+			numVarints += 2 if snapshot.hasComments else 1
+		# Instructions of non-deferred code objects are a text offset delta and payload info
+		StreamUtils.skipVarints(snapshot.stream, (numVarints + 2) * (self.stopIndex - self.startIndex) + numVarints * (self.deferredStopIndex - self.deferredStartIndex))
+
+	def _innerRead(self, snapshot, refId, deferred):
+		codePtr = RawCode(ClassId.CODE, refId)
+		self._readInstructions(snapshot, codePtr, deferred)
+
+		if not (snapshot.kind is Kind.FULL_AOT and snapshot.useBareInstructions):
+			codePtr.objectPool = StreamUtils.readRef(snapshot.stream)
+		else:
+			codePtr.objectPool = None
+		codePtr.owner = StreamUtils.readRef(snapshot.stream)
+		codePtr.exceptionHandlers = StreamUtils.readRef(snapshot.stream)
+		codePtr.pcDescriptors = StreamUtils.readRef(snapshot.stream)
+		codePtr.catchEntry = StreamUtils.readRef(snapshot.stream)
+		codePtr.compressedStackMaps = StreamUtils.readRef(snapshot.stream)
+		codePtr.inlinedIdToFunction = StreamUtils.readRef(snapshot.stream)
+		codePtr.codeSourceMap = StreamUtils.readRef(snapshot.stream)
+
+		if (not snapshot.isPrecompiled) and (snapshot.kind is Kind.FULL_JIT):
+			codePtr.deoptInfoArray = StreamUtils.readRef(snapshot.stream)
+			codePtr.staticCallsTargetTable = StreamUtils.readRef(snapshot.stream)
+
+		if not snapshot.isProduct:
+			codePtr.returnAddressMetadata = StreamUtils.readRef(snapshot.stream)
+			codePtr.varDescriptors = None
+			codePtr.comments = StreamUtils.readRef(snapshot.stream) if snapshot.hasComments else []
+			codePtr.compileTimestamp = 0
+
+		codePtr.stateBits = StreamUtils.readInt(snapshot.stream, 32)
+
+		return codePtr
+
+	def _readInstructions(self, snapshot, codePtr, deferred):
+		if deferred:
+			if snapshot.isPrecompiled and snapshot.useBareInstructions:
+				codePtr.entryPoint = 'entryPoint'
+				codePtr.uncheckedEntryPoint = 'entryPoint'
+				codePtr.monomorphicEntryPoint = 'entryPoint'
+				codePtr.monomorphicUncheckedEntryPoint = 'entryPoint'
+				codePtr.instructionsLength = 0
+				return
+			codePtr.uncheckedOffset = 0
+			#TODO: cahed entry points
+			return
 
-	# Class ID: 20
-	class ObjectPoolDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				length = StreamUtils.readUnsigned(snapshot.stream)
-				snapshot.assignRef('object pool')
-			self.stopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				poolPtr = { 'cid': ClassId.OBJECT_POOL, 'refId': refId }
-				length = StreamUtils.readUnsigned(snapshot.stream)
-				poolPtr['length'] = length
-				poolPtr['entryBits'] = [ ]
-				poolPtr['data'] = [ ]
-				for j in range(length):
-					entryBits = StreamUtils.readUnsigned(snapshot.stream, 8)
-					poolPtr['entryBits'].append(entryBits)
-					entry = { }
-					decodedBits = DecodeUtils.decodeTypeBits(entryBits)
-					if decodedBits == Constants.kNativeEntryData or decodedBits == Constants.kTaggedObject:
-						entry['rawObj'] = StreamUtils.readRef(snapshot.stream)
-					elif decodedBits == Constants.kImmediate:
-						entry['rawValue'] = StreamUtils.readInt(snapshot.stream, 64)
-					elif decodedBits == Constants.kNativeFunction:
-						entry['rawValue'] = 'native call entry'
-					else:
-						raise Exception('No type associated to decoded type bits')
-					poolPtr['data'].append(entry)
-
-				snapshot.references[refId] = poolPtr
-
-	if includesCode:
-		# Class ID: 21
-		class PcDescriptorsDeserializer(RODataDeserializer):
-			def __init__(self):
-				self.cid = ClassId.PC_DESCRIPTORS
-
-			def _readAlloc(self, snapshot, isCanonical):
-				super()._readAlloc(snapshot, isCanonical)
-
-			def getObjectAt(self, stream):
-				return 'pc descriptor'
-
-		# Class ID: 22
-		class CodeSourceMapDeserializer(RODataDeserializer):
-			def __init__(self):
-				self.cid = ClassId.CODE_SOURCE_MAP
-
-			def _readAlloc(self, snapshot, isCanonical):
-				super()._readAlloc(snapshot, isCanonical)
-
-			def getObjectAt(self, stream):
-				return 'code source map'
+		if snapshot.isPrecompiled and snapshot.useBareInstructions:
+			snapshot.previousTextOffset += StreamUtils.readUnsigned(snapshot.stream)
+			payloadStart = snapshot.instructionsImage + snapshot.previousTextOffset
+			payloadInfo = StreamUtils.readUnsigned(snapshot.stream)
+			uncheckedOffset = payloadInfo >> 1
+			hasMonomorphicEntrypoint = (payloadInfo & 1) == 1
 
-		# Class ID: 23
-		class CompressedStackMapsDeserializer(RODataDeserializer):
-			def __init__(self):
-				self.cid = ClassId.COMPRESSED_STACK_MAPS
+			entryOffset = snapshot.layout.kPolymorphicEntryOffsetAOT if hasMonomorphicEntrypoint else 0
+			monomorphicEntryOffset = snapshot.layout.kMonomorphicEntryOffsetAOT if hasMonomorphicEntrypoint else 0
+			entryPoint = payloadStart + entryOffset
+			monomorphicEntryPoint = payloadStart + monomorphicEntryOffset
 
-			def _readAlloc(self, snapshot, isCanonical):
-				super()._readAlloc(snapshot, isCanonical)
+			codePtr.entryPoint = entryPoint
+			codePtr.uncheckedEntryPoint = entryPoint + uncheckedOffset
+			codePtr.monomorphicEntryPoint = monomorphicEntryPoint
+			codePtr.monomorphicUncheckedEntryPoint = monomorphicEntryPoint + uncheckedOffset
 
-			def getObjectAt(self, stream):
-				return 'compressed stack maps'
-	else:
-		# Class ID: 21
-		class PcDescriptorsDeserializer(LoggingDeserializer):
-			def __init__(self):
-				self.cid = ClassId.PC_DESCRIPTORS
-
-			def _readAlloc(self, snapshot, isCanonical):
-				self.startIndex = snapshot.nextRefIndex
-				count = StreamUtils.readUnsigned(snapshot.stream)
-				for _ in range(count):
-					length = StreamUtils.readUnsigned(snapshot.stream)
-					snapshot.assignRef('pc descriptors')
-				self.stopIndex = snapshot.nextRefIndex
-
-			def _readFill(self, snapshot, isCanonical):
-				for refId in range(self.startIndex, self.stopIndex):
-					length = StreamUtils.readUnsigned(snapshot.stream)
-					descPtr = { 'cid': ClassId.PC_DESCRIPTORS, 'refId': refId }
-					descPtr['length'] = length
-					descPtr['data'] = snapshot.stream.read(length)
-
-					snapshot.references[refId] = descPtr
-
-	# Class ID: 25
-	class ExceptionHandlersDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				length = StreamUtils.readUnsigned(snapshot.stream)
-				snapshot.assignRef('exception')
-			self.stopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				length = StreamUtils.readUnsigned(snapshot.stream)
-				handlersPtr = { 'cid': ClassId.EXCEPTION_HANDLERS, 'refId': refId }
-				handlersPtr['numEntries'] = length
-				handlersPtr['handledTypesData'] = StreamUtils.readRef(snapshot.stream)
-				data = []
-				for j in range(length):
-					info = { }
-					info['handlerPcOffset'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-					info['outerTryIndex'] = StreamUtils.readInt(snapshot.stream, 16)
-					# Original code has read int8
-					info['needsStacktrace'] = StreamUtils.readBool(snapshot.stream)
-					info['hasCatchAll'] = StreamUtils.readBool(snapshot.stream)
-					info['isGenerated'] = StreamUtils.readBool(snapshot.stream)
-					data.append(info)
-				handlersPtr['data'] = data
-
-				snapshot.references[refId] = handlersPtr
-
-	# Class ID: 30
-	class UnlinkedCallDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				unlinkedPtr = self._readFromTo(snapshot, refId)
-				unlinkedPtr['canPatchToMonomorphic'] = StreamUtils.readBool(snapshot.stream)
-
-				snapshot.references[refId] = unlinkedPtr
-
-		def _readFromTo(self, snapshot, refId):
-			unlinkedPtr = { 'cid': ClassId.UNLINKED_CALL, 'refId': refId }
-			unlinkedPtr['targetName'] = StreamUtils.readUnsigned(snapshot.stream)
-			unlinkedPtr['argsDescriptor'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return unlinkedPtr
-
-	# Class ID: 34
-	class MegamorphicCacheDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				cachePtr = self._readFromTo(snapshot, refId)
-				cachePtr['filledEntryCount'] = StreamUtils.readInt(snapshot.stream, 32)
-
-				snapshot.references[refId] = cachePtr
-
-		def _readFromTo(self, snapshot, refId):
-			cachePtr = { 'cid': ClassId.MEGAMORPHIC_CACHE, 'refId': refId }
-			cachePtr['targetName'] = StreamUtils.readUnsigned(snapshot.stream)
-			cachePtr['argsDescriptor'] = StreamUtils.readUnsigned(snapshot.stream)
-			cachePtr['buckets'] = StreamUtils.readUnsigned(snapshot.stream)
-			cachePtr['mask'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return cachePtr
-
-	# Class ID: 35
-	class SubtypeTestCacheDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				cachePtr = { 'cid': ClassId.SUBTYPE_TEST_CACHE, 'refId': refId }
-				cachePtr['cache'] = StreamUtils.readRef(snapshot.stream)
-
-				snapshot.references[refId] = cachePtr
-
-	# Class ID: 35
-	class LoadingUnitDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				unitPtr = { 'cid': ClassId.LOADING_UNIT, 'refId': refId }
-				unitPtr['parent'] = StreamUtils.readRef(snapshot.stream)
-				unitPtr['baseObjects'] = None
-				unitPtr['id'] = StreamUtils.readInt(snapshot.stream, 32)
-				unitPtr['loaded'] = False
-				unitPtr['loadOutstanding'] = False
-
-				snapshot.references[refId] = unitPtr
-
-	# Class ID: 42
-	class InstanceDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			self.nextFieldOffsetInWords = StreamUtils.readInt(snapshot.stream, 32)
-			self.instanceSizeInWords = StreamUtils.readInt(snapshot.stream, 32)
-			for _ in range(count):
-				snapshot.assignRef('instance')
-			self.stopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
-			nextFieldOffset = self.nextFieldOffsetInWords << Constants.kWordSizeLog2
-			instanceSize = NumericUtils.roundUp(self.instanceSizeInWords * Constants.kWordSize, Constants.kObjectAlignment)
-			unboxedFieldsBitmap = UnboxedFieldBitmap(StreamUtils.readUnsigned(snapshot.stream, 64))
-			for refId in range(self.startIndex, self.stopIndex):
-				instancePtr = { 'cid': ClassId.INSTANCE, 'refId': refId }
-				instancePtr['data'] = []
-				offset = 8 if snapshot.is64 else 4
-				while offset < nextFieldOffset:
-					if unboxedFieldsBitmap.get(int(offset / Constants.kWordSize)):
-						#TODO: verify
-						instancePtr['data'].append(StreamUtils.readWordWith32BitReads(snapshot.stream))
-					else:
-						#TODO: verify
-						instancePtr['data'].append(StreamUtils.readRef(snapshot.stream))
-					offset += Constants.kWordSize
-				if offset < instanceSize:
-					#TODO: verify
-					instancePtr['data'].append(None)
-					offset += Constants.kWordSize
-				
-				snapshot.references[refId] = instancePtr
-
-	# Class ID: 44
-	class TypeArgumentsDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				length = StreamUtils.readUnsigned(snapshot.stream) # Length is read again during fill
-				snapshot.assignRef('type args')
-			self.stopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				length = StreamUtils.readUnsigned(snapshot.stream)
-				typeArgsPtr = { 'cid': ClassId.TYPE_ARGUMENTS, 'refId': refId }
-				typeArgsPtr['length'] = length
-				typeArgsPtr['hash'] = StreamUtils.readInt(snapshot.stream, 32)
-				typeArgsPtr['nullability'] = StreamUtils.readUnsigned(snapshot.stream)
-				typeArgsPtr['instantiations'] = StreamUtils.readRef(snapshot.stream)
-				typeArgsPtr['types'] = []
-				for j in range(length):
-					typeArgsPtr['types'].append(StreamUtils.readRef(snapshot.stream))
-
-				snapshot.references[refId] = typeArgsPtr
-
-	# Class ID: 46
-	class TypeDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				typePtr = self._readFromTo(snapshot, refId)
-				combined = StreamUtils.readUnsigned(snapshot.stream, 8)
-				typePtr['typeState'] = combined >> Constants.kNullabilityBitSize
-				typePtr['nullability'] = combined & Constants.kNullabilityBitMask
-
-				snapshot.references[refId] = typePtr
-
-		def _readFromTo(self, snapshot, refId):
-			typePtr = { 'cid': ClassId.TYPE, 'refId': refId, 'isBase': False }
-			typePtr['typeTestStub'] = StreamUtils.readUnsigned(snapshot.stream)
-			typePtr['typeClassId'] = StreamUtils.readUnsigned(snapshot.stream)
-			typePtr['arguments'] = StreamUtils.readUnsigned(snapshot.stream)
-			typePtr['hash'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return typePtr
-
-	# Class ID 53
-	class FunctionTypeDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				functionTypePtr = self._readFromTo(snapshot, refId)
-				combined = StreamUtils.readUnsigned(snapshot.stream, 8)
-				functionTypePtr['typeState'] = combined >> Constants.kNullabilityBitSize
-				functionTypePtr['nullability'] = combined & Constants.kNullabilityBitMask
-				functionTypePtr['packedFields'] = StreamUtils.readUnsigned(snapshot.stream, 32)
-
-				snapshot.references[refId] = functionTypePtr
-
-		def _readFromTo(self, snapshot, refId):
-			functionTypePtr = { 'cid': ClassId.FUNCTION_TYPE, 'refId': refId }
-			functionTypePtr['typeTestStub'] = StreamUtils.readUnsigned(snapshot.stream)
-			functionTypePtr['typeParameters'] = StreamUtils.readUnsigned(snapshot.stream)
-			functionTypePtr['resultType'] = StreamUtils.readUnsigned(snapshot.stream)
-			functionTypePtr['parameterTypes'] = StreamUtils.readUnsigned(snapshot.stream)
-			functionTypePtr['parameterNames'] = StreamUtils.readUnsigned(snapshot.stream)
-			functionTypePtr['hash'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return functionTypePtr
-
-	# Class ID: 54
-	class TypeRefDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				typePtr = { 'cid': ClassId.TYPE_REF, 'refId': refId }
-				typePtr['typeTestStub'] = StreamUtils.readUnsigned(snapshot.stream)
-				typePtr['type'] = StreamUtils.readUnsigned(snapshot.stream)
-
-				snapshot.references[refId] = typePtr
-
-	# Class ID: 48
-	class TypeParameterDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				typePtr = self._readFromTo(snapshot, refId)
-				typePtr['parametrizedClassId'] = StreamUtils.readInt(snapshot.stream, 32)
-				typePtr['base'] = StreamUtils.readUnsigned(snapshot.stream, 16)
-				typePtr['index'] = StreamUtils.readUnsigned(snapshot.stream, 16)
-				combined = StreamUtils.readUnsigned(snapshot.stream, 8)
-				typePtr['flags'] = combined >> Constants.kNullabilityBitSize
-				typePtr['nullability'] = combined & Constants.kNullabilityBitMask
-
-				snapshot.references[refId] = typePtr
-
-		def _readFromTo(self, snapshot, refId):
-			typePtr = { 'cid': ClassId.TYPE_PARAMETER, 'refId': refId, 'isBase': False }
-			typePtr['typeTestStub'] = StreamUtils.readUnsigned(snapshot.stream)
-			typePtr['name'] = StreamUtils.readUnsigned(snapshot.stream)
-			typePtr['hash'] = StreamUtils.readUnsigned(snapshot.stream)
-			typePtr['bound'] = StreamUtils.readUnsigned(snapshot.stream)
-			typePtr['defaultArgument'] = StreamUtils.readUnsigned(snapshot.stream)
-
-			return typePtr
-
-
-	# Class ID: 49
-	class ClosureDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				closurePtr = { 'cid': ClassId.CLOSURE, 'refId': refId }
-				closurePtr['instantiatorTypeArguments'] = StreamUtils.readUnsigned(snapshot.stream)
-				closurePtr['functionTypeArguments'] = StreamUtils.readUnsigned(snapshot.stream)
-				closurePtr['delayedTypeArguments'] = StreamUtils.readUnsigned(snapshot.stream)
-				closurePtr['function'] = StreamUtils.readUnsigned(snapshot.stream)
-				closurePtr['context'] = StreamUtils.readUnsigned(snapshot.stream)
-				closurePtr['hash'] = StreamUtils.readUnsigned(snapshot.stream)
-
-				snapshot.references[refId] = closurePtr
-
-	# Class ID: 53
-	class MintDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for i in range(count):
-				value = StreamUtils.readInt(snapshot.stream, 64)
-				snapshot.assignRef({ 'cid': ClassId.MINT, 'isCanonical': isCanonical, 'value': value})
-
-		def _readFill(self, snapshot, isCanonical):
 			return
 
-	# Class ID: 54
-	class DoubleDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				value = StreamUtils.readInt(snapshot.stream, 64)
-				snapshot.references[refId] = { 'cid': ClassId.DOUBLE, 'refId': refId, 'isCanonical': isCanonical,  'value': value }
-
-	# Class ID: 56
-	class GrowableObjectArrayDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				listPtr = { 'cid': ClassId.GROWABLE_OBJECT_ARRAY, 'refId': refId }
-				listPtr['typeArguments'] = StreamUtils.readUnsigned(snapshot.stream)
-				listPtr['length'] = StreamUtils.readUnsigned(snapshot.stream)
-				listPtr['data'] = StreamUtils.readUnsigned(snapshot.stream)
-
-				snapshot.references[refId] = listPtr
-
-	# Class ID: 77
-	class WeakSerializationReferenceDeserializer(CountDeserializer):
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				refPtr = { 'cid': ClassId.WEAK_SERIALIZATION_REFERENCE, 'refId': refId }
-				refPtr['id'] = StreamUtils.readCid(snapshot.stream)
-
-				snapshot.references[refId] = refPtr
-
-	# Aggregate deserializer for class IDs: 78, 79
-	class ArrayDeserializer(LoggingDeserializer):
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				StreamUtils.readUnsigned(snapshot.stream) # Length is read again during fill
-				snapshot.assignRef('array')
-			self.stopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
-			arrayPtr = {}
-			for refId in range(self.startIndex, self.stopIndex):
-				arrayPtr = { 'cid': ClassId.ARRAY, 'refId': refId }
-				length = StreamUtils.readUnsigned(snapshot.stream)
-				arrayPtr['typeArguments'] = StreamUtils.readRef(snapshot.stream)
-				arrayPtr['length'] = length
-				arrayPtr['data'] = []
-				for _ in range(length):
-					arrayPtr['data'].append(StreamUtils.readRef(snapshot.stream))
-
-				snapshot.references[refId] = arrayPtr
-
-	if includesCode:
-		# Class ID: 81
-		class OneByteStringDeserializer(RODataDeserializer):
-			def __init__(self):
-				self.cid = ClassId.ONE_BYTE_STRING
-
-			def _readAlloc(self, snapshot, isCanonical):
-				super()._readAlloc(snapshot, isCanonical)
-
-			def getObjectAt(self, snapshot):
-				stream = snapshot.rodata
-				tags = int.from_bytes(stream.read(4), 'little')
-				if snapshot.is64:
-					hsh = int.from_bytes(stream.read(4), 'little')
-					length = int.from_bytes(stream.read(8), 'little')
+		#TODO
+		raise Exception('Raw instructions deserialization missing')
+
+# Pattern of an object pool entry, for skipping it: its type bits, followed by an
+# object reference or immediate value unless it is a native function
+def _entryBitsPattern(types):
+	return b'[' + b''.join(re.escape(bytes([bits])) for bits in range(256) if DecodeUtils.decodeTypeBits(bits) in types) + b']'
+
+kPoolEntryPattern = b'(?:%s%s|%s)' % (
+	_entryBitsPattern((Constants.kTaggedObject, Constants.kImmediate, Constants.kNativeEntryData)),
+	StreamUtils.kShapePatterns['v'],
+	_entryBitsPattern((Constants.kNativeFunction,)))
+
+# Class ID: 20
+class ObjectPoolDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		for _ in range(count):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			poolPtr = RawObjectPool(ClassId.OBJECT_POOL, refId)
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			poolPtr.length = length
+			# Entries are kept as two parallel arrays: the raw entry bits, and the
+			# object reference or immediate value selected by the decoded type bits
+			entryBits = array('B')
+			data = array('q')
+			for j in range(length):
+				bits = StreamUtils.readUnsigned(snapshot.stream, 8)
+				entryBits.append(bits)
+				decodedBits = DecodeUtils.decodeTypeBits(bits)
+				if decodedBits == Constants.kNativeEntryData or decodedBits == Constants.kTaggedObject:
+					data.append(StreamUtils.readRef(snapshot.stream))
+				elif decodedBits == Constants.kImmediate:
+					data.append(StreamUtils.readInt(snapshot.stream, 64))
+				elif decodedBits == Constants.kNativeFunction:
+					data.append(0) # Native call entry, bound at runtime
 				else:
-					length = int.from_bytes(stream.read(4), 'little')
-					hsh = int.from_bytes(stream.read(4), 'little')
-				return ''.join(chr(x) for x in stream.read(length // 2))
-
-		# Class ID: 82
-		class TwoByteStringDeserializer(RODataDeserializer):
-			def __init__(self):
-				self.cid = ClassId.TWO_BYTE_STRING
-
-			def _readAlloc(self, snapshot, isCanonical):
-				super()._readAlloc(snapshot, isCanonical)
-
-			def getObjectAt(self, stream):
-				return 'two-byte string'
-
+					raise Exception('No type associated to decoded type bits')
+			poolPtr.entryBits = entryBits
+			poolPtr.data = data
+
+			snapshot.references[refId] = poolPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		for _ in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			StreamUtils.skipMatching(snapshot.stream, kPoolEntryPattern, length)
+
+# Class ID: 21
+class RODataPcDescriptorsDeserializer(RODataDeserializer):
+	rawClass = RawPcDescriptors
+
+	def __init__(self):
+		self.cid = ClassId.PC_DESCRIPTORS
+
+	def _readAlloc(self, snapshot, isCanonical):
+		super()._readAlloc(snapshot, isCanonical)
+
+# Class ID: 22
+class RODataCodeSourceMapDeserializer(RODataDeserializer):
+	rawClass = RawCodeSourceMap
+
+	def __init__(self):
+		self.cid = ClassId.CODE_SOURCE_MAP
+
+	def _readAlloc(self, snapshot, isCanonical):
+		super()._readAlloc(snapshot, isCanonical)
+
+# Class ID: 23
+class RODataCompressedStackMapsDeserializer(RODataDeserializer):
+	rawClass = RawCompressedStackMaps
+
+	def __init__(self):
+		self.cid = ClassId.COMPRESSED_STACK_MAPS
+
+	def _readAlloc(self, snapshot, isCanonical):
+		super()._readAlloc(snapshot, isCanonical)
+
+	def readObjectAt(self, rodata, offset, objectPtr):
+		objectPtr.flags, objectPtr.length, dataOffset = rodata.readStackMaps(offset)
+		objectPtr.setLazyData(rodata.buffer, dataOffset)
+
+# Class ID: 21
+class PcDescriptorsDeserializer(LoggingDeserializer):
+	def __init__(self):
+		self.cid = ClassId.PC_DESCRIPTORS
+
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		for _ in range(count):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			descPtr = RawPcDescriptors(ClassId.PC_DESCRIPTORS, refId)
+			descPtr.length = length
+			descPtr.data = snapshot.stream.read(length)
+
+			snapshot.references[refId] = descPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		for _ in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			snapshot.stream.seek(snapshot.stream.tell() + length)
+
+# Class ID: 25
+class ExceptionHandlersDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		for _ in range(count):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			handlersPtr = RawExceptionHandlers(ClassId.EXCEPTION_HANDLERS, refId)
+			handlersPtr.numEntries = length
+			handlersPtr.handledTypesData = StreamUtils.readRef(snapshot.stream)
+			data = []
+			for j in range(length):
+				info = { }
+				info['handlerPcOffset'] = StreamUtils.readUnsigned(snapshot.stream, 32)
+				info['outerTryIndex'] = StreamUtils.readInt(snapshot.stream, 16)
+				# Original code has read int8
+				info['needsStacktrace'] = StreamUtils.readBool(snapshot.stream)
+				info['hasCatchAll'] = StreamUtils.readBool(snapshot.stream)
+				info['isGenerated'] = StreamUtils.readBool(snapshot.stream)
+				data.append(info)
+			handlersPtr.data = data
+
+			snapshot.references[refId] = handlersPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		for _ in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			StreamUtils.skipVarints(snapshot.stream, 1)
+			StreamUtils.skipRecords(snapshot.stream, 'vvbbb', length)
+
+# Class ID: 30
+class UnlinkedCallDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			unlinkedPtr = self._readFromTo(snapshot, refId)
+			unlinkedPtr.canPatchToMonomorphic = StreamUtils.readBool(snapshot.stream)
+
+			snapshot.references[refId] = unlinkedPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vvb', self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		unlinkedPtr = RawUnlinkedCall(ClassId.UNLINKED_CALL, refId)
+		unlinkedPtr.targetName = StreamUtils.readUnsigned(snapshot.stream)
+		unlinkedPtr.argsDescriptor = StreamUtils.readUnsigned(snapshot.stream)
+
+		return unlinkedPtr
+
+# Class ID: 34
+class MegamorphicCacheDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			cachePtr = self._readFromTo(snapshot, refId)
+			cachePtr.filledEntryCount = StreamUtils.readInt(snapshot.stream, 32)
+
+			snapshot.references[refId] = cachePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vvvvv', self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		cachePtr = RawMegamorphicCache(ClassId.MEGAMORPHIC_CACHE, refId)
+		cachePtr.targetName = StreamUtils.readUnsigned(snapshot.stream)
+		cachePtr.argsDescriptor = StreamUtils.readUnsigned(snapshot.stream)
+		cachePtr.buckets = StreamUtils.readUnsigned(snapshot.stream)
+		cachePtr.mask = StreamUtils.readUnsigned(snapshot.stream)
+
+		return cachePtr
+
+# Class ID: 35
+class SubtypeTestCacheDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			cachePtr = RawSubtypeTestCache(ClassId.SUBTYPE_TEST_CACHE, refId)
+			cachePtr.cache = StreamUtils.readRef(snapshot.stream)
+
+			snapshot.references[refId] = cachePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'v', self.stopIndex - self.startIndex)
+
+# Class ID: 35
+class LoadingUnitDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			unitPtr = RawLoadingUnit(ClassId.LOADING_UNIT, refId)
+			unitPtr.parent = StreamUtils.readRef(snapshot.stream)
+			unitPtr.baseObjects = None
+			unitPtr.id = StreamUtils.readInt(snapshot.stream, 32)
+			unitPtr.loaded = False
+			unitPtr.loadOutstanding = False
+
+			snapshot.references[refId] = unitPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vv', self.stopIndex - self.startIndex)
+
+# Field layout shared by the instances of a cluster: for each word after the
+# header, up to nextFieldOffsetInWords, whether it holds an unboxed field rather
+# than a reference. Instances without fields need no bitmap
+def compileInstanceLayout(cid, nextFieldOffsetInWords, unboxedFieldsBitmap):
+	if nextFieldOffsetInWords <= 1:
+		return ( )
+	if unboxedFieldsBitmap is None:
+		raise Exception('No unboxed fields bitmap for the instances of class ID {}, which have {} words of fields'.format(cid, nextFieldOffsetInWords - 1))
+	return tuple(unboxedFieldsBitmap.get(index) for index in range(1, nextFieldOffsetInWords))
+
+# Number of varints encoding the fields of an instance: one per reference, and
+# kNumRead32PerWord per unboxed field, which is written in 32-bit parts
+def countInstanceVarints(snapshot, layout):
+	return len(layout) + sum(layout) * (snapshot.layout.kNumRead32PerWord - 1)
+
+# Appends the fields of an instance, laid out as given by compileInstanceLayout,
+# to the words of its cluster
+def readInstanceFields(snapshot, layout, words):
+	stream = snapshot.stream
+	for unboxed in layout:
+		words.append(StreamUtils.readWordWith32BitReads(stream, snapshot.layout) if unboxed else StreamUtils.readRef(stream))
+
+# Class ID: 42
+class InstanceDeserializer(LoggingDeserializer):
+	def __init__(self, cid):
+		self.cid = cid
+
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		self.nextFieldOffsetInWords = StreamUtils.readInt(snapshot.stream, 32)
+		self.instanceSizeInWords = StreamUtils.readInt(snapshot.stream, 32)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	# Without a canonical flag per instance, the fields of all instances form a
+	# single run of references when none of them is unboxed
+	def _readFill(self, snapshot, isCanonical):
+		unboxedFieldsBitmap = UnboxedFieldBitmap(StreamUtils.readUnsigned(snapshot.stream, 64))
+		layout = compileInstanceLayout(self.cid, self.nextFieldOffsetInWords, unboxedFieldsBitmap)
+		numWords = len(layout)
+		hasUnboxedFields = any(layout)
+		if hasUnboxedFields:
+			words = array('Q')
+		else:
+			words = StreamUtils.readUnsignedRun(snapshot.stream, numWords * (self.stopIndex - self.startIndex))
+		for i, refId in enumerate(range(self.startIndex, self.stopIndex)):
+			instancePtr = RawInstance(ClassId.INSTANCE, refId)
+			instancePtr.setWords(words, i * numWords, numWords)
+			if hasUnboxedFields:
+				readInstanceFields(snapshot, layout, words)
+
+			snapshot.references[refId] = instancePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		unboxedFieldsBitmap = UnboxedFieldBitmap(StreamUtils.readUnsigned(snapshot.stream, 64))
+		layout = compileInstanceLayout(self.cid, self.nextFieldOffsetInWords, unboxedFieldsBitmap)
+		StreamUtils.skipVarints(snapshot.stream, countInstanceVarints(snapshot, layout) * (self.stopIndex - self.startIndex))
+
+# Class ID: 44
+class TypeArgumentsDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		# Varints of the fill stage: length, hash, nullability, instantiations and
+		# the types
+		self.fillLength = 0
+		for _ in range(count):
+			length = StreamUtils.readUnsigned(snapshot.stream) # Length is read again during fill
+			self.fillLength += 4 + length
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			typeArgsPtr = RawTypeArguments(ClassId.TYPE_ARGUMENTS, refId)
+			typeArgsPtr.length = length
+			typeArgsPtr.hash = StreamUtils.readInt(snapshot.stream, 32)
+			typeArgsPtr.nullability = StreamUtils.readUnsigned(snapshot.stream)
+			typeArgsPtr.instantiations = StreamUtils.readRef(snapshot.stream)
+			typeArgsPtr.types = StreamUtils.readRefs(snapshot.stream, length)
+
+			snapshot.references[refId] = typeArgsPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipVarints(snapshot.stream, self.fillLength)
+
+# Class ID: 46
+class TypeDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			typePtr = self._readFromTo(snapshot, refId)
+			combined = StreamUtils.readUnsigned(snapshot.stream, 8)
+			typePtr.typeState = combined >> Constants.kNullabilityBitSize
+			typePtr.nullability = combined & Constants.kNullabilityBitMask
+
+			snapshot.references[refId] = typePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vvvvb', self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		typePtr = RawType(ClassId.TYPE, refId)
+		typePtr.typeTestStub = StreamUtils.readUnsigned(snapshot.stream)
+		typePtr.typeClassId = StreamUtils.readUnsigned(snapshot.stream)
+		typePtr.arguments = StreamUtils.readUnsigned(snapshot.stream)
+		typePtr.hash = StreamUtils.readUnsigned(snapshot.stream)
+
+		return typePtr
+
+# Class ID 53
+class FunctionTypeDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			functionTypePtr = self._readFromTo(snapshot, refId)
+			combined = StreamUtils.readUnsigned(snapshot.stream, 8)
+			functionTypePtr.typeState = combined >> Constants.kNullabilityBitSize
+			functionTypePtr.nullability = combined & Constants.kNullabilityBitMask
+			functionTypePtr.packedFields = StreamUtils.readUnsigned(snapshot.stream, 32)
+
+			snapshot.references[refId] = functionTypePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vvvvvvbv', self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		functionTypePtr = RawFunctionType(ClassId.FUNCTION_TYPE, refId)
+		functionTypePtr.typeTestStub = StreamUtils.readUnsigned(snapshot.stream)
+		functionTypePtr.typeParameters = StreamUtils.readUnsigned(snapshot.stream)
+		functionTypePtr.resultType = StreamUtils.readUnsigned(snapshot.stream)
+		functionTypePtr.parameterTypes = StreamUtils.readUnsigned(snapshot.stream)
+		functionTypePtr.parameterNames = StreamUtils.readUnsigned(snapshot.stream)
+		functionTypePtr.hash = StreamUtils.readUnsigned(snapshot.stream)
+
+		return functionTypePtr
+
+# Class ID: 54
+class TypeRefDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			typePtr = RawTypeRef(ClassId.TYPE_REF, refId)
+			typePtr.typeTestStub = StreamUtils.readUnsigned(snapshot.stream)
+			typePtr.type = StreamUtils.readUnsigned(snapshot.stream)
+
+			snapshot.references[refId] = typePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vv', self.stopIndex - self.startIndex)
+
+# Class ID: 48
+class TypeParameterDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			typePtr = self._readFromTo(snapshot, refId)
+			typePtr.parametrizedClassId = StreamUtils.readInt(snapshot.stream, 32)
+			typePtr.base = StreamUtils.readUnsigned(snapshot.stream, 16)
+			typePtr.index = StreamUtils.readUnsigned(snapshot.stream, 16)
+			combined = StreamUtils.readUnsigned(snapshot.stream, 8)
+			typePtr.flags = combined >> Constants.kNullabilityBitSize
+			typePtr.nullability = combined & Constants.kNullabilityBitMask
+
+			snapshot.references[refId] = typePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vvvvvvvvb', self.stopIndex - self.startIndex)
+
+	def _readFromTo(self, snapshot, refId):
+		typePtr = RawTypeParameter(ClassId.TYPE_PARAMETER, refId)
+		typePtr.typeTestStub = StreamUtils.readUnsigned(snapshot.stream)
+		typePtr.name = StreamUtils.readUnsigned(snapshot.stream)
+		typePtr.hash = StreamUtils.readUnsigned(snapshot.stream)
+		typePtr.bound = StreamUtils.readUnsigned(snapshot.stream)
+		typePtr.defaultArgument = StreamUtils.readUnsigned(snapshot.stream)
+
+		return typePtr
+
+
+# Class ID: 49
+class ClosureDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			closurePtr = RawClosure(ClassId.CLOSURE, refId)
+			closurePtr.instantiatorTypeArguments = StreamUtils.readUnsigned(snapshot.stream)
+			closurePtr.functionTypeArguments = StreamUtils.readUnsigned(snapshot.stream)
+			closurePtr.delayedTypeArguments = StreamUtils.readUnsigned(snapshot.stream)
+			closurePtr.function = StreamUtils.readUnsigned(snapshot.stream)
+			closurePtr.context = StreamUtils.readUnsigned(snapshot.stream)
+			closurePtr.hash = StreamUtils.readUnsigned(snapshot.stream)
+
+			snapshot.references[refId] = closurePtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vvvvvv', self.stopIndex - self.startIndex)
+
+# Class ID: 53
+# The values of the cluster are decoded at once into a compact array, kept as
+# values (see getNumbers in Snapshot)
+# The values of the cluster are kept in a single array (see getNumbers), and
+# the objects of its references are only built once one of them is read
+class MintDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		self.values = StreamUtils.readIntRun(snapshot.stream, count)
+		snapshot.allocateRefs(count)
+		snapshot.references.defer(self.startIndex, snapshot.nextRefIndex, partial(self.buildObjects, snapshot, isCanonical))
+
+	def _readFill(self, snapshot, isCanonical):
+		return
+
+	def buildObjects(self, snapshot, isCanonical):
+		objects = [ ]
+		for value in self.values:
+			mintPtr = RawMint(ClassId.MINT)
+			mintPtr.isCanonical = isCanonical
+			mintPtr.value = value
+			objects.append(mintPtr)
+		snapshot.references.setRange(self.startIndex, objects)
+
+# Class ID: 54
+# Doubles are written as the bits of their IEEE 754 representation, read as a
+# signed 64-bit integer, so the decoded integers are reinterpreted as doubles.
+# As for mints, the objects of the cluster are only built once one is read
+class DoubleDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		self.values = array('d', StreamUtils.readIntRun(snapshot.stream, self.stopIndex - self.startIndex).tobytes())
+		snapshot.references.defer(self.startIndex, self.stopIndex, partial(self.buildObjects, snapshot, isCanonical))
+
+	def buildObjects(self, snapshot, isCanonical):
+		objects = [ ]
+		for refId, value in zip(range(self.startIndex, self.stopIndex), self.values):
+			doublePtr = RawDouble(ClassId.DOUBLE, refId)
+			doublePtr.isCanonical = isCanonical
+			doublePtr.value = value
+			objects.append(doublePtr)
+		snapshot.references.setRange(self.startIndex, objects)
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'v', self.stopIndex - self.startIndex)
+
+# Class ID: 56
+class GrowableObjectArrayDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			listPtr = RawGrowableObjectArray(ClassId.GROWABLE_OBJECT_ARRAY, refId)
+			listPtr.typeArguments = StreamUtils.readUnsigned(snapshot.stream)
+			listPtr.length = StreamUtils.readUnsigned(snapshot.stream)
+			listPtr.data = StreamUtils.readUnsigned(snapshot.stream)
+
+			snapshot.references[refId] = listPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'vvv', self.stopIndex - self.startIndex)
+
+# Class ID: 77
+class WeakSerializationReferenceDeserializer(CountDeserializer):
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			refPtr = RawWeakSerializationReference(ClassId.WEAK_SERIALIZATION_REFERENCE, refId)
+			refPtr.id = StreamUtils.readCid(snapshot.stream)
+
+			snapshot.references[refId] = refPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipRecords(snapshot.stream, 'v', self.stopIndex - self.startIndex)
+
+# Aggregate deserializer for class IDs: 78, 79
+class ArrayDeserializer(LoggingDeserializer):
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		self.fillLength = 0
+		for _ in range(count):
+			length = StreamUtils.readUnsigned(snapshot.stream) # Length is read again during fill
+			self.fillLength += 2 + length
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		# The fill stage of the whole cluster is a single run of unsigned varints
+		# (length, type arguments and elements of each array), decoded at once
+		values = StreamUtils.readUnsignedRun(snapshot.stream, self.fillLength)
+		i = 0
+		for refId in range(self.startIndex, self.stopIndex):
+			length = values[i]
+			arrayPtr = RawArray(ClassId.ARRAY, refId)
+			arrayPtr.typeArguments = values[i + 1]
+			arrayPtr.length = length
+			arrayPtr.data = values[i + 2:i + 2 + length]
+			i += 2 + length
+
+			snapshot.references[refId] = arrayPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		StreamUtils.skipVarints(snapshot.stream, self.fillLength)
+
+# Abstract deserializer for strings in the data image. The characters are left
+# there until first read (see RawString)
+class RODataStringDeserializer(RODataDeserializer):
+	def readObjectAt(self, rodata, offset, objectPtr):
+		objectPtr.length, objectPtr.hash, dataOffset = rodata.readString(offset)
+		objectPtr.setLazyData(rodata.buffer, dataOffset)
+
+# Class ID: 81
+class RODataOneByteStringDeserializer(RODataStringDeserializer):
+	rawClass = RawOneByteString
+
+	def __init__(self):
+		self.cid = ClassId.ONE_BYTE_STRING
+
+	def _readAlloc(self, snapshot, isCanonical):
+		super()._readAlloc(snapshot, isCanonical)
+
+# Class ID: 82
+class RODataTwoByteStringDeserializer(RODataStringDeserializer):
+	rawClass = RawTwoByteString
+
+	def __init__(self):
+		self.cid = ClassId.TWO_BYTE_STRING
+
+	def _readAlloc(self, snapshot, isCanonical):
+		super()._readAlloc(snapshot, isCanonical)
+
+# Class ID: 81
+class OneByteStringDeserializer(LoggingDeserializer):
+	def __init__(self):
+		self.cid = ClassId.ONE_BYTE_STRING
+
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		for _ in range(count):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			strPtr = RawOneByteString(ClassId.ONE_BYTE_STRING, refId)
+			strPtr.hash = StreamUtils.readInt(snapshot.stream, 32)
+			strPtr.length = length
+			strPtr.setLazyData(snapshot.stream.buffer, snapshot.stream.pos)
+			snapshot.stream.seek(snapshot.stream.pos + length)
+
+			snapshot.references[refId] = strPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		for _ in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			StreamUtils.skipVarints(snapshot.stream, 1)
+			snapshot.stream.seek(snapshot.stream.tell() + length)
+
+# Class ID: 82
+class TwoByteStringDeserializer(LoggingDeserializer):
+	def __init__(self):
+		self.cid = ClassId.TWO_BYTE_STRING
+
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		for _ in range(count):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	# The code units are stored as they are in memory, little-endian
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			strPtr = RawTwoByteString(ClassId.TWO_BYTE_STRING, refId)
+			strPtr.hash = StreamUtils.readInt(snapshot.stream, 32)
+			strPtr.length = length
+			strPtr.setLazyData(snapshot.stream.buffer, snapshot.stream.pos)
+			snapshot.stream.seek(snapshot.stream.pos + 2 * length)
+
+			snapshot.references[refId] = strPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		for _ in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			StreamUtils.skipVarints(snapshot.stream, 1)
+			snapshot.stream.seek(snapshot.stream.tell() + 2 * length)
+
+# Aggregate deserializer for class IDs: 108, 111, 114, 117, 120, 123, 126, 129, 132, 135, 138, 141, 144, 147
+class TypedDataDeserializer(LoggingDeserializer):
+	def __init__(self, cid):
+		self.elementSize = TypedData.elementSizeInBytes(cid)
+		self.cid = cid
+
+	def _readAlloc(self, snapshot, isCanonical):
+		self.startIndex = snapshot.nextRefIndex
+		count = StreamUtils.readUnsigned(snapshot.stream)
+		for _ in range(count):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+		snapshot.allocateRefs(count)
+		self.stopIndex = snapshot.nextRefIndex
+
+	def _readFill(self, snapshot, isCanonical):
+		for refId in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			lengthInBytes = length * self.elementSize
+			dataPtr = RawTypedData(self.cid, refId)
+			dataPtr.length = length
+			dataPtr.data = snapshot.stream.buffer[snapshot.stream.pos:snapshot.stream.pos + lengthInBytes]
+			snapshot.stream.seek(snapshot.stream.pos + lengthInBytes)
+
+			snapshot.references[refId] = dataPtr
+
+	def skipFill(self, snapshot, isCanonical):
+		for _ in range(self.startIndex, self.stopIndex):
+			length = StreamUtils.readUnsigned(snapshot.stream)
+			snapshot.stream.seek(snapshot.stream.tell() + length * self.elementSize)
+
+# Builds the table from class ID to deserializer factory for snapshots with or
+# without code. Instances are handled separately, since their class IDs are
+# not bounded by the predefined ones
+def _buildDeserializerTable(includesCode):
+	table = [ None ] * ClassId.NUM_PREDEFINED.value
+	table[ClassId.CLASS.value] = ClassDeserializer
+	table[ClassId.PATCH_CLASS.value] = PatchClassDeserializer
+	table[ClassId.FUNCTION.value] = FunctionDeserializer
+	table[ClassId.CLOSURE_DATA.value] = ClosureDataDeserializer
+	table[ClassId.FFI_TRAMPOLINE_DATA.value] = FfiTrampolineDataDeserializer
+	table[ClassId.FIELD.value] = FieldDeserializer
+	table[ClassId.SCRIPT.value] = ScriptDeserializer
+	table[ClassId.LIBRARY.value] = LibraryDeserializer
+	table[ClassId.NAMESPACE.value] = NamespaceDeserializer
+	table[ClassId.CODE.value] = CodeDeserializer
+	table[ClassId.OBJECT_POOL.value] = ObjectPoolDeserializer
+	table[ClassId.EXCEPTION_HANDLERS.value] = ExceptionHandlersDeserializer
+	table[ClassId.UNLINKED_CALL.value] = UnlinkedCallDeserializer
+	table[ClassId.MEGAMORPHIC_CACHE.value] = MegamorphicCacheDeserializer
+	table[ClassId.SUBTYPE_TEST_CACHE.value] = SubtypeTestCacheDeserializer
+	table[ClassId.LOADING_UNIT.value] = LoadingUnitDeserializer
+	table[ClassId.TYPE_ARGUMENTS.value] = TypeArgumentsDeserializer
+	table[ClassId.TYPE.value] = TypeDeserializer
+	table[ClassId.FUNCTION_TYPE.value] = FunctionTypeDeserializer
+	table[ClassId.TYPE_REF.value] = TypeRefDeserializer
+	table[ClassId.TYPE_PARAMETER.value] = TypeParameterDeserializer
+	table[ClassId.CLOSURE.value] = ClosureDeserializer
+	table[ClassId.MINT.value] = MintDeserializer
+	table[ClassId.DOUBLE.value] = DoubleDeserializer
+	table[ClassId.GROWABLE_OBJECT_ARRAY.value] = GrowableObjectArrayDeserializer
+	# FIXME: should only target precompiled AOT snapshots
+	table[ClassId.WEAK_SERIALIZATION_REFERENCE.value] = WeakSerializationReferenceDeserializer
+	table[ClassId.ARRAY.value] = ArrayDeserializer
+	table[ClassId.IMMUTABLE_ARRAY.value] = ArrayDeserializer
+	if includesCode:
+		table[ClassId.PC_DESCRIPTORS.value] = RODataPcDescriptorsDeserializer
+		table[ClassId.CODE_SOURCE_MAP.value] = RODataCodeSourceMapDeserializer
+		table[ClassId.COMPRESSED_STACK_MAPS.value] = RODataCompressedStackMapsDeserializer
+		table[ClassId.ONE_BYTE_STRING.value] = RODataOneByteStringDeserializer
+		table[ClassId.TWO_BYTE_STRING.value] = RODataTwoByteStringDeserializer
 	else:
-		# Class ID: 81
-		class OneByteStringDeserializer(LoggingDeserializer):
-			def __init__(self):
-				self.cid = ClassId.ONE_BYTE_STRING
-
-			def _readAlloc(self, snapshot, isCanonical):
-				self.startIndex = snapshot.nextRefIndex
-				count = StreamUtils.readUnsigned(snapshot.stream)
-				for _ in range(count):
-					length = StreamUtils.readUnsigned(snapshot.stream)
-					snapshot.assignRef('one byte string')
-				self.stopIndex = snapshot.nextRefIndex
-
-			def _readFill(self, snapshot, isCanonical):
-				for refId in range(self.startIndex, self.stopIndex):
-					length = StreamUtils.readUnsigned(snapshot.stream)
-					strPtr = { 'cid': ClassId.ONE_BYTE_STRING, 'refId': refId }
-					strPtr['hash'] = StreamUtils.readInt(snapshot.stream, 32)
-					strPtr['length'] = length
-					strPtr['data'] = ''.join(chr(x) for x in snapshot.stream.read(length))
-
-					snapshot.references[refId] = strPtr
-
-		# Class ID: 82
-		class TwoByteStringDeserializer(LoggingDeserializer):
-			def __init__(self):
-				self.cid = ClassId.TWO_BYTE_STRING
-
-			def _readAlloc(self, snapshot, isCanonical):
-				self.startIndex = snapshot.nextRefIndex
-				count = StreamUtils.readUnsigned(snapshot.stream)
-				for _ in range(count):
-					length = StreamUtils.readUnsigned(snapshot.stream)
-					snapshot.assignRef('two-byte string')
-				self.stopIndex = snapshot.nextRefIndex
-
-	# Aggregate deserializer for class IDs: 108, 111, 114, 117, 120, 123, 126, 129, 132, 135, 138, 141, 144, 147
-	class TypedDataDeserializer(LoggingDeserializer):
-		def __init__(self, cid):
-			self.elementSize = TypedData.elementSizeInBytes(cid)
-			self.cid = cid
-
-		def _readAlloc(self, snapshot, isCanonical):
-			self.startIndex = snapshot.nextRefIndex
-			count = StreamUtils.readUnsigned(snapshot.stream)
-			for _ in range(count):
-				length = StreamUtils.readUnsigned(snapshot.stream)
-				snapshot.assignRef('typed data')
-			self.stopIndex = snapshot.nextRefIndex
-
-		def _readFill(self, snapshot, isCanonical):
-			for refId in range(self.startIndex, self.stopIndex):
-				length = StreamUtils.readUnsigned(snapshot.stream)
-				lengthInBytes = length * self.elementSize
-				dataPtr = { 'cid': self.cid, 'refId': refId }
-				dataPtr['length'] = length
-				dataPtr['data'] = snapshot.stream.read(lengthInBytes)
-
-				snapshot.references[refId] = dataPtr
+		table[ClassId.PC_DESCRIPTORS.value] = PcDescriptorsDeserializer
+		table[ClassId.ONE_BYTE_STRING.value] = OneByteStringDeserializer
+		table[ClassId.TWO_BYTE_STRING.value] = TwoByteStringDeserializer
+	for cid in range(ClassId.NUM_PREDEFINED.value):
+		if ClassId.isTypedDataClass(cid):
+			table[cid] = partial(TypedDataDeserializer, cid)
+	return table
+
+kDeserializerTables = { includesCode: _buildDeserializerTable(includesCode) for includesCode in (False, True) }
 
+def getDeserializerForCid(includesCode, cid):
 	if cid >= ClassId.NUM_PREDEFINED.value or cid == ClassId.INSTANCE.value:
-		return InstanceDeserializer()
+		return InstanceDeserializer(cid)
+
+	factory = kDeserializerTables[bool(includesCode)][cid]
+	if factory is not None:
+		return factory()
 
 	if ClassId.isTypedDataViewClass(cid):
 		raise Exception('Typed data view deserializer not implemented')
@@ -948,78 +1264,36 @@ def getDeserializerForCid(includesCode, cid):
 	if ClassId.isExternalTypedDataClass(cid):
 		raise Exception('External typed data deserializer not implemented')
 
-	if ClassId.isTypedDataClass(cid):
-		return TypedDataDeserializer(cid)
-
-	cidEnum = ClassId(cid)
-	if cidEnum is ClassId.ILLEGAL:
+	if cid == ClassId.ILLEGAL.value:
 		raise Exception('Encountered illegal cluster')
-	if cidEnum is ClassId.CLASS:
-		return ClassDeserializer()
-	if cidEnum is ClassId.PATCH_CLASS:
-		return PatchClassDeserializer()
-	if cidEnum is ClassId.FUNCTION:
-		return FunctionDeserializer()
-	if cidEnum is ClassId.CLOSURE_DATA:
-		return ClosureDataDeserializer()
-	if cidEnum is ClassId.FFI_TRAMPOLINE_DATA:
-		return FfiTrampolineDataDeserializer()
-	if cidEnum is ClassId.FIELD:
-		return FieldDeserializer()
-	if cidEnum is ClassId.SCRIPT:
-		return ScriptDeserializer()
-	if cidEnum is ClassId.LIBRARY:
-		return LibraryDeserializer()
-	if cidEnum is ClassId.NAMESPACE:
-		return NamespaceDeserializer()
-	if cidEnum is ClassId.CODE:
-		return CodeDeserializer()
-	if cidEnum is ClassId.OBJECT_POOL:
-		return ObjectPoolDeserializer()
-	if cidEnum is ClassId.PC_DESCRIPTORS:
-		return PcDescriptorsDeserializer()
-	if cidEnum is ClassId.CODE_SOURCE_MAP:
-		return CodeSourceMapDeserializer()
-	if cidEnum is ClassId.COMPRESSED_STACK_MAPS:
-		return CompressedStackMapsDeserializer()
-	if cidEnum is ClassId.EXCEPTION_HANDLERS:
-		return ExceptionHandlersDeserializer()
-	if cidEnum is ClassId.UNLINKED_CALL:
-		return UnlinkedCallDeserializer()
-	if cidEnum is ClassId.MEGAMORPHIC_CACHE:
-		return MegamorphicCacheDeserializer()
-	if cidEnum is ClassId.SUBTYPE_TEST_CACHE:
-		return SubtypeTestCacheDeserializer()
-	if cidEnum is ClassId.LOADING_UNIT:
-		return LoadingUnitDeserializer()
-	if cidEnum is ClassId.TYPE_ARGUMENTS:
-		return TypeArgumentsDeserializer()
-	if cidEnum is ClassId.TYPE:
-		return TypeDeserializer()
-	if cidEnum is ClassId.FUNCTION_TYPE:
-		return FunctionTypeDeserializer()
-	if cidEnum is ClassId.TYPE_REF:
-		return TypeRefDeserializer()
-	if cidEnum is ClassId.TYPE_PARAMETER:
-		return TypeParameterDeserializer()
-	if cidEnum is ClassId.CLOSURE:
-		return ClosureDeserializer()
-	if cidEnum is ClassId.MINT:
-		return MintDeserializer()
-	if cidEnum is ClassId.DOUBLE:
-		return DoubleDeserializer()
-	if cidEnum is ClassId.GROWABLE_OBJECT_ARRAY:
-		return GrowableObjectArrayDeserializer()
-	# FIXME: should only target precompiled AOT snapshots
-	if cidEnum is ClassId.WEAK_SERIALIZATION_REFERENCE:
-		return WeakSerializationReferenceDeserializer()
-	if cidEnum is ClassId.ARRAY:
-		return ArrayDeserializer()
-	if cidEnum is ClassId.IMMUTABLE_ARRAY:
-		return ArrayDeserializer()
-	if cidEnum is ClassId.ONE_BYTE_STRING:
-		return OneByteStringDeserializer()
-	if cidEnum is ClassId.TWO_BYTE_STRING:
-		return TwoByteStringDeserializer()
-	
-	raise Exception('Deserializer missing for class {} (CID {})'.format(ClassId(cid).name, ClassId(cid).value))
\ No newline at end of file
+
+	raise Exception('Deserializer missing for class {} (CID {})'.format(ClassId(cid).name, ClassId(cid).value))
+
+# Object kinds that partial parses can be restricted to (see Snapshot), and the
+# class IDs of their clusters. Instances of classes whose IDs are not predefined
+# are of the 'instances' kind, and typed data of the 'typed-data' kind
+kObjectKinds = {
+	'classes': (ClassId.CLASS, ClassId.PATCH_CLASS),
+	'functions': (ClassId.FUNCTION, ClassId.CLOSURE_DATA, ClassId.FFI_TRAMPOLINE_DATA),
+	'code': (ClassId.CODE, ClassId.WEAK_SERIALIZATION_REFERENCE),
+	'fields': (ClassId.FIELD,),
+	'libraries': (ClassId.SCRIPT, ClassId.LIBRARY, ClassId.NAMESPACE, ClassId.LOADING_UNIT),
+	'strings': (ClassId.ONE_BYTE_STRING, ClassId.TWO_BYTE_STRING),
+	'types': (ClassId.TYPE_ARGUMENTS, ClassId.TYPE, ClassId.FUNCTION_TYPE, ClassId.TYPE_REF, ClassId.TYPE_PARAMETER),
+	'arrays': (ClassId.ARRAY, ClassId.IMMUTABLE_ARRAY, ClassId.GROWABLE_OBJECT_ARRAY),
+	'instances': (ClassId.INSTANCE, ClassId.CLOSURE, ClassId.MINT, ClassId.DOUBLE),
+	'typed-data': (),
+	'object-pools': (ClassId.OBJECT_POOL,),
+	'exception-handlers': (ClassId.EXCEPTION_HANDLERS,),
+	'descriptors': (ClassId.PC_DESCRIPTORS, ClassId.CODE_SOURCE_MAP, ClassId.COMPRESSED_STACK_MAPS),
+	'caches': (ClassId.UNLINKED_CALL, ClassId.MEGAMORPHIC_CACHE, ClassId.SUBTYPE_TEST_CACHE)
+}
+
+kKindOfCid = { cid.value: kind for kind, cids in kObjectKinds.items() for cid in cids }
+
+def getKindForCid(cid):
+	if cid >= ClassId.NUM_PREDEFINED.value:
+		return 'instances'
+	if ClassId.isTypedDataClass(cid):
+		return 'typed-data'
+	return kKindOfCid.get(cid)
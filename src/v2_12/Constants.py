@@ -1,3 +1,5 @@
+from collections import namedtuple
+
 kMagicOffset = 0
 kMagicSize = 4
 kLengthOffset = kMagicOffset + kMagicSize
@@ -9,11 +11,6 @@ hashSize = 32
 
 kMaxObjectAlignment = 16
 
-kWordSize = 8
-kWordSizeLog2 = 3
-kObjectAlignment = 16
-kObjectAlignmentLog2 = 4
-
 kTypedDataCidRemainderInternal = 0
 kTypedDataCidRemainderView = 1
 kTypedDataCidRemainderExternal = 2
@@ -24,9 +21,6 @@ kNumStubEntries = 97
 
 kTopLevelCidOffset = 65536
 
-kMonomorphicEntryOffsetAOT = 0
-kPolymorphicEntryOffsetAOT = 0
-
 kNativeEntryData = 4
 kTaggedObject = 0
 kImmediate = 1
@@ -37,9 +31,27 @@ kNullabilityBitMask = 3
 
 kBitsPerByte = 8
 kNumBytesPerRead32 = 4 # sizeof(uint32_t)
-kNumRead32PerWord = int(8 / kNumBytesPerRead32) # 8 = sizeof(uword)
 kNumBitsPerRead32 = kNumBytesPerRead32 * kBitsPerByte
 
+# Constants that depend on the target architecture. Each snapshot holds the
+# layout of its architecture, so snapshots of different architectures can be
+# parsed in the same process
+Layout = namedtuple('Layout', [
+	'kWordSize',
+	'kWordSizeLog2',
+	'kObjectAlignment',
+	'kObjectAlignmentLog2',
+	'kMonomorphicEntryOffsetAOT',
+	'kPolymorphicEntryOffsetAOT',
+	'kNumRead32PerWord' # sizeof(uword) / sizeof(uint32_t)
+])
+
+kLayouts = {
+	'X64': Layout(8, 3, 16, 4, 8, 22, 2),
+	'ARM': Layout(4, 2, 8, 3, 0, 12, 1),
+	'ARM64': Layout(8, 3, 16, 4, 8, 20, 2)
+}
+
 kAppAOTSymbols = [
     '_kDartVmSnapshotData',
     '_kDartVmSnapshotInstructions',
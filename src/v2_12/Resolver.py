@@ -1,16 +1,18 @@
 #FIXME: needs to be implemented decently from scratch
+import weakref
+
 from v2_12.ClassId import ClassId
 
 spacing = '    '
 
 class DartClass():
 	def __init__(self, snapshot, clazz):
-		self.name = DartString(snapshot, clazz['name'])
-		self.superType = DartType(snapshot, clazz['superType'])
-		self.typeParameters = list(map(lambda i: DartType(snapshot, i), DartType(snapshot, clazz['typeParameters']).types))
-		self.interfaces = list(map(lambda i: DartType(snapshot, i), DartArray(snapshot, clazz['interfaces']).data))
-		self.functions = list(map(lambda f: DartFunction(snapshot, f), DartArray(snapshot, clazz['functions']).data))
-		self.fields = list(map(lambda i: DartField(snapshot, i), DartArray(snapshot, clazz['fields']).data))
+		self.name = DartString(snapshot, clazz.name)
+		self.superType = resolveType(snapshot, clazz.superType)
+		self.typeParameters = list(map(lambda i: resolveType(snapshot, i), resolveType(snapshot, clazz.typeParameters).types))
+		self.interfaces = list(map(lambda i: resolveType(snapshot, i), DartArray(snapshot, clazz.interfaces).data))
+		self.functions = list(map(lambda f: DartFunction(snapshot, f), DartArray(snapshot, clazz.functions).data))
+		self.fields = list(map(lambda i: DartField(snapshot, i), DartArray(snapshot, clazz.fields).data))
 
 	def __str__(self):
 		s = 'class ' + str(self.name)
@@ -36,10 +38,10 @@ class DartClass():
 class DartFunction():
 	def __init__(self, snapshot, refId):
 		function = snapshot.references[refId]
-		self.name = snapshot.references[function['name']]['data']
-		self.resultType = DartType(snapshot, DartType(snapshot, function['signature']).resultType).name
-		self.typeParameters = list(map(lambda i: DartType(snapshot, i), DartArray(snapshot, DartType(snapshot, function['signature']).parameterTypes).data))
-		self.codeOffset = snapshot.instructionsOffset + snapshot.references[function['code']]['entryPoint']
+		self.name = snapshot.references[function.name].data
+		self.resultType = resolveType(snapshot, resolveType(snapshot, function.signature).resultType).name
+		self.typeParameters = list(map(lambda i: resolveType(snapshot, i), DartArray(snapshot, resolveType(snapshot, function.signature).parameterTypes).data))
+		self.codeOffset = snapshot.instructionsOffset + snapshot.references[function.code].entryPoint
 
 	def __str__(self):
 		s = str(self.resultType)
@@ -51,42 +53,85 @@ class DartFunction():
 		s += spacing + '}'
 		return s
 
+# Resolved types of a snapshot, by reference ID, with the number of lookups
+# that found a resolved type (hits) or had to resolve it (misses)
+class TypeCache():
+	def __init__(self):
+		self.types = { }
+		self.hits = 0
+		self.misses = 0
+
+# Type caches are dropped along with their snapshot
+typeCaches = weakref.WeakKeyDictionary()
+
+def getTypeCache(snapshot):
+	cache = typeCaches.get(snapshot)
+	if cache is None:
+		cache = typeCaches[snapshot] = TypeCache()
+	return cache
+
+# Resolves the type of a reference once per snapshot, all of its occurrences
+# sharing the same DartType, which must not be modified. The type is cached
+# before being resolved, so that a cycle of TypeRefs leads back to it instead
+# of recursing forever
+def resolveType(snapshot, refId):
+	cache = getTypeCache(snapshot)
+	dartType = cache.types.get(refId)
+	if dartType is not None:
+		cache.hits += 1
+		return dartType
+	cache.misses += 1
+	dartType = DartType.__new__(DartType)
+	cache.types[refId] = dartType
+	try:
+		dartType.__init__(snapshot, refId)
+	except BaseException:
+		del cache.types[refId]
+		raise
+	return dartType
+
 class DartType():
 	def __init__(self, snapshot, refId):
 		typee = snapshot.references[refId]
-		if typee['cid'] is ClassId.TYPE:
-			if typee['isBase']:
-				self.name = typee['name']
+		if typee.cid is ClassId.TYPE:
+			if typee.isBase:
+				self.name = typee.name
 				self.types = []
 				self.resultType = 1
 				self.parameterTypes = 1
 			else:
-				self.name = snapshot.references[snapshot.classes[snapshot.references[typee['typeClassId']]['value']]['name']]['data']
-		elif typee['cid'] is ClassId.TYPE_PARAMETER:
-			if typee['isBase']:
-				self.name = typee['name']
+				self.name = snapshot.references[snapshot.classes[snapshot.references[typee.typeClassId].value].name].data
+		elif typee.cid is ClassId.TYPE_PARAMETER:
+			if typee.isBase:
+				self.name = typee.name
 			else:
-				self.name = snapshot.references[typee['name']]['data']
+				self.name = snapshot.references[typee.name].data
 			try:
-				self.types = typee['types']
+				self.types = typee.types
 			except:
 				self.types = []
-		elif typee['cid'] is ClassId.FUNCTION_TYPE:
-			if 'isBase' in typee.keys() and typee['isBase']:
-				self.name = typee['name']
-				self.resultType = typee['name']
+		elif typee.cid is ClassId.FUNCTION_TYPE:
+			if typee.isBase:
+				self.name = typee.name
+				self.resultType = typee.name
 				self.types = []
 			else:
 				self.name = "FuncType"
-				self.resultType = typee['resultType']
-				self.parameterTypes = typee['parameterTypes']
-		elif typee['cid'] is ClassId.TYPE_ARGUMENTS:
-			if 'isBase' in typee.keys() and typee['isBase']:
-				self.name = typee['name']
+				self.resultType = typee.resultType
+				self.parameterTypes = typee.parameterTypes
+		elif typee.cid is ClassId.TYPE_ARGUMENTS:
+			if typee.isBase:
+				self.name = typee.name
 				self.types = []
 			else:
 				self.name = "TypeArgs"
-				self.types = typee['types']
+				self.types = typee.types
+		elif typee.cid is ClassId.TYPE_REF:
+			# A type still being resolved has no name yet, which only happens
+			# within a cycle of TypeRefs
+			target = resolveType(snapshot, typee.type)
+			self.name = getattr(target, 'name', 'DynamicType')
+			self.types = getattr(target, 'types', [])
 
 	def __str__(self):
 		return self.name
@@ -94,15 +139,15 @@ class DartType():
 class DartField():
 	def __init__(self, snapshot, refId):
 		field = snapshot.references[refId]
-		self.name = DartString(snapshot, field['name']).data
-		self.type = DartType(snapshot, field['type'])
+		self.name = DartString(snapshot, field.name).data
+		self.type = resolveType(snapshot, field.type)
 
 	def __str__(self):
 		return str(self.type) + ' ' + self.name
 
 class DartString():
 	def __init__(self, snapshot, refId):
-		self.data = snapshot.references[refId]['data']
+		self.data = snapshot.references[refId].data
 
 	def __str__(self):
 		return self.data
@@ -110,6 +155,6 @@ class DartString():
 class DartArray():
 	def __init__(self, snapshot, refId):
 		try:
-			self.data = snapshot.references[refId]['data']
+			self.data = snapshot.references[refId].data
 		except:
 			self.data = []
\ No newline at end of file
@@ -0,0 +1,96 @@
+# Encoders of snapshot data, a minimal snapshot and fills of hand-built clusters,
+# for the tests of the deserializers of both snapshot versions
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import v2_12.Constants
+import v2_12.Utils
+
+kDataBitsPerByte = 7
+kByteMask = (1 << kDataBitsPerByte) - 1
+kEndUnsignedByteMarker = 0x80
+kEndByteMarker = 0xc0
+kMinDataPerByte = -(1 << (kDataBitsPerByte - 1))
+kMaxDataPerByte = -kMinDataPerByte - 1
+
+def encodeUnsigned(value):
+	encoded = bytearray()
+	while value > kByteMask:
+		encoded.append(value & kByteMask)
+		value >>= kDataBitsPerByte
+	encoded.append(value + kEndUnsignedByteMarker)
+	return bytes(encoded)
+
+def encodeSigned(value):
+	encoded = bytearray()
+	while not kMinDataPerByte <= value <= kMaxDataPerByte:
+		encoded.append(value & kByteMask)
+		value >>= kDataBitsPerByte
+	encoded.append(value + kEndByteMarker)
+	return bytes(encoded)
+
+def encodeBool(value):
+	return b'\x01' if value else b'\x00'
+
+# Words of unboxed fields are written as kNumRead32PerWord signed 32-bit parts,
+# least significant first
+def encodeWord(word, layout):
+	parts = [ (word >> (32 * j)) & 0xffffffff for j in range(layout.kNumRead32PerWord) ]
+	return b''.join(encodeSigned(part - (1 << 32) if part >= 1 << 31 else part) for part in parts)
+
+# Snapshot holding what deserializers use outside of the header: a stream, a
+# reference table and the counter of allocated references
+class FakeSnapshot:
+	def __init__(self, utils, data, numRefs=1024, **fields):
+		self.stream = utils.Stream(data)
+		self.references = utils.ReferenceTable(numRefs)
+		self.nextRefIndex = 1
+		self.__dict__.update(fields)
+
+	def assignRef(self, obj):
+		self.references[self.nextRefIndex] = obj
+		self.nextRefIndex += 1
+
+	def allocateRefs(self, count):
+		self.nextRefIndex += count
+
+# Bytes following each hand-built cluster, which decoders must not consume
+kTrailer = b'\x80\x80'
+
+def encodeRefs(refs):
+	return b''.join(encodeUnsigned(ref) for ref in refs)
+
+# Checks of the v2_12 deserializers on hand-built clusters, against per-object
+# decoders reading one field at a time as the original deserializers did
+class ClusterTest(unittest.TestCase):
+	def setUp(self):
+		self.threshold = v2_12.Utils.StreamUtils.kNumPyMinRunLength
+
+	def tearDown(self):
+		v2_12.Utils.StreamUtils.kNumPyMinRunLength = self.threshold
+
+	# Objects of a cluster filled both right after its alloc stage and after
+	# being skipped when it can be (see skipFill), with the NumPy and the pure
+	# Python run decoders
+	def fillCluster(self, makeDeserializer, alloc, fill, archName='ARM64'):
+		results = [ ]
+		for threshold in (1, float('inf')):
+			v2_12.Utils.StreamUtils.kNumPyMinRunLength = threshold
+			for skipFirst in (False, True):
+				snapshot = FakeSnapshot(v2_12.Utils, alloc + fill + kTrailer, layout=v2_12.Constants.kLayouts[archName], arch=archName)
+				deserializer = makeDeserializer()
+				deserializer.readAlloc(snapshot, False)
+				self.assertEqual(snapshot.stream.pos, len(alloc))
+				if skipFirst and hasattr(deserializer, 'skipFill'):
+					deserializer.skipFill(snapshot, False)
+					self.assertEqual(snapshot.stream.pos, len(alloc + fill))
+					snapshot.stream.seek(len(alloc))
+				deserializer.readFill(snapshot, False)
+				self.assertEqual(snapshot.stream.pos, len(alloc + fill))
+				# The stream moves on before lazily decoded data is read
+				snapshot.stream.seek(len(alloc + fill + kTrailer))
+				results.append([ snapshot.references[refId] for refId in range(1, snapshot.nextRefIndex) ])
+		return results
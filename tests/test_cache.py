@@ -0,0 +1,119 @@
+# Checks of the parse cache: hits, misses and the eviction of the least recently
+# used entries, and the refusal of directories and entries that do not belong to
+# the current user or that other users can write to
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+import helpers
+
+from Cache import ParseCache, keyFor
+
+kKey = 'entry'
+
+class ParseCacheTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.directory = os.path.join(self.tmp.name, 'cache')
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def testHitAndMiss(self):
+		cache = ParseCache(self.directory)
+		self.assertIsNone(cache.load(kKey))
+		cache.store(kKey, { 'value': [ 1, 2 ] })
+		self.assertEqual(cache.load(kKey), { 'value': [ 1, 2 ] })
+		# Another cache over the same directory sees the entry
+		self.assertEqual(ParseCache(self.directory).load(kKey), { 'value': [ 1, 2 ] })
+
+	# An entry evicted by another process once read is still a hit
+	def testEvictedWhileLoading(self):
+		cache = ParseCache(self.directory)
+		cache.store(kKey, [ 1, 2 ])
+		with mock.patch('os.utime', side_effect=FileNotFoundError):
+			self.assertEqual(cache.load(kKey), [ 1, 2 ])
+
+	def testUnreadableEntry(self):
+		cache = ParseCache(self.directory)
+		with open(cache.path(kKey), 'wb') as f:
+			f.write(b'not a cache entry')
+		self.assertIsNone(cache.load(kKey))
+		self.assertFalse(os.path.exists(cache.path(kKey)))
+
+	def testEviction(self):
+		entry = bytes(range(256)) * 64
+		cache = ParseCache(self.directory)
+		cache.store('probe', entry)
+		entrySize = os.path.getsize(cache.path('probe'))
+		os.remove(cache.path('probe'))
+		# Room for three entries, whose last use is set apart by their times
+		cache.maxSize = 3 * entrySize
+		for index, key in enumerate(('a', 'b', 'c')):
+			cache.store(key, entry)
+			os.utime(cache.path(key), (index, index))
+		# Reading an entry makes it the most recently used one
+		self.assertEqual(cache.load('a'), entry)
+		cache.store('d', entry)
+		self.assertEqual(sorted(name for name in os.listdir(self.directory)), [ 'a.snapshot', 'c.snapshot', 'd.snapshot' ])
+		self.assertIsNone(cache.load('b'))
+
+	def testOversizedEntry(self):
+		cache = ParseCache(self.directory, maxSize=16)
+		cache.store(kKey, bytes(range(256)))
+		self.assertEqual(os.listdir(self.directory), [ ])
+
+	# Keys depend on the content of the blobs and on their load addresses,
+	# whether blobs are bytes or views of a mapped file
+	def testKeys(self):
+		blobs = [ b'vm data', b'vm instructions', b'isolate data', b'isolate instructions' ]
+		key = keyFor(blobs, [ 0x1000, 0x2000, 0x3000, 0x4000 ])
+		self.assertEqual(keyFor([ memoryview(blob) for blob in blobs ], [ 0x1000, 0x2000, 0x3000, 0x4000 ]), key)
+		self.assertNotEqual(keyFor(blobs, [ 0x1000, 0x2000, 0x3000, 0x5000 ]), key)
+		self.assertNotEqual(keyFor(blobs[:3] + [ b'isolate instructionz' ], [ 0x1000, 0x2000, 0x3000, 0x4000 ]), key)
+
+@unittest.skipUnless(hasattr(os, 'getuid'), 'ownership is only checked on platforms with user IDs')
+class PermissionTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+		self.directory = os.path.join(self.tmp.name, 'cache')
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def testCreatedPrivate(self):
+		ParseCache(self.directory)
+		self.assertEqual(stat.S_IMODE(os.stat(self.directory).st_mode), 0o700)
+
+	def testWritableDirectory(self):
+		os.mkdir(self.directory)
+		for mode in (0o720, 0o702, 0o777):
+			os.chmod(self.directory, mode)
+			with self.assertRaisesRegex(Exception, 'writable by other users'):
+				ParseCache(self.directory)
+
+	def testWritableEntry(self):
+		cache = ParseCache(self.directory)
+		cache.store(kKey, [ 1, 2 ])
+		self.assertEqual(stat.S_IMODE(os.stat(cache.path(kKey)).st_mode) & 0o077, 0)
+		self.assertEqual(cache.load(kKey), [ 1, 2 ])
+		os.chmod(cache.path(kKey), 0o666)
+		self.assertIsNone(cache.load(kKey))
+		# Entries that are not trusted are left for their owner to deal with
+		self.assertTrue(os.path.exists(cache.path(kKey)))
+
+	@unittest.skipUnless(os.getuid() == 0, 'files can only be given to another user by root')
+	def testForeignOwner(self):
+		cache = ParseCache(self.directory)
+		cache.store(kKey, [ 1, 2 ])
+		os.chown(cache.path(kKey), os.getuid() + 1, -1)
+		self.assertIsNone(cache.load(kKey))
+		self.assertTrue(os.path.exists(cache.path(kKey)))
+		os.chown(self.directory, os.getuid() + 1, -1)
+		with self.assertRaisesRegex(Exception, 'owned by user ID'):
+			ParseCache(self.directory)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,86 @@
+# Golden checks of the class dump of the fixtures, against the dumps written
+# before any of the optimizations of the parser (the .dol file next to each
+# fixture), when parsed from the binary, from a snapshot container, through the
+# parse cache and with partial parsing
+import os
+import tempfile
+import unittest
+
+import helpers
+
+import main
+from Cache import ParseCache, keyFor, vmKeyFor
+
+kFixtures = os.path.dirname(os.path.abspath(__file__))
+kArchs = ( 'arm64v8', 'x64', 'armv7' )
+# Object kinds read by the class dump
+kDumpKinds = [ 'classes', 'functions', 'code', 'fields', 'strings', 'types', 'arrays' ]
+
+def fixture(arch, extension):
+	return os.path.join(kFixtures, 'libapp-v2_10-{}.{}'.format(arch, extension))
+
+class DumpTest(unittest.TestCase):
+	def setUp(self):
+		self.tmp = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.tmp.cleanup()
+
+	def assertDumpEqual(self, snapshot, arch):
+		output = os.path.join(self.tmp.name, arch + '.dol')
+		main.dump(snapshot, output)
+		with open(output) as f, open(fixture(arch, 'dol')) as golden:
+			self.assertEqual(f.read(), golden.read())
+
+	def testBinary(self):
+		for arch in kArchs:
+			with self.subTest(arch=arch):
+				self.assertDumpEqual(main.parseFile(fixture(arch, 'so')), arch)
+
+	def testPartial(self):
+		for arch in kArchs:
+			with self.subTest(arch=arch):
+				self.assertDumpEqual(main.parseFile(fixture(arch, 'so'), only=kDumpKinds), arch)
+
+	# Containers hold the same blobs and load addresses as the binary
+	def testContainer(self):
+		for arch in kArchs:
+			with self.subTest(arch=arch):
+				container = os.path.join(self.tmp.name, arch + '.bin')
+				blobs, offsets = main.readELFBlobs(fixture(arch, 'so'))
+				main.writeContainer(container, blobs, offsets)
+				self.assertTrue(main.isContainer(container))
+				self.assertFalse(main.isContainer(fixture(arch, 'so')))
+				containerBlobs, containerOffsets = main.readContainerBlobs(container)
+				self.assertEqual([ bytes(blob) for blob in containerBlobs ], [ bytes(blob) for blob in blobs ])
+				self.assertEqual(containerOffsets, offsets)
+				self.assertDumpEqual(main.parseFile(container), arch)
+
+	# Parses a fixture through the cache, checking its dump, and returns the
+	# messages logged by the cache
+	def parseLogged(self, arch, cache):
+		with self.assertLogs(level='INFO') as logs:
+			snapshot = main.parseFile(fixture(arch, 'so'), cache)
+		self.assertDumpEqual(snapshot, arch)
+		return [ record.getMessage() for record in logs.records if record.getMessage().startswith('Cache') ]
+
+	# The first parse stores the VM and isolate snapshots, and the next ones load
+	# them instead of parsing them
+	def testCache(self):
+		cache = ParseCache(os.path.join(self.tmp.name, 'cache'))
+		for arch in kArchs:
+			with self.subTest(arch=arch):
+				blobs, offsets = main.readELFBlobs(fixture(arch, 'so'))
+				isolateKey, vmKey = keyFor(blobs, offsets), vmKeyFor(blobs[0], blobs[1])
+				# VM snapshots parsed by other tests would not be stored
+				main.vmSnapshots.clear()
+				self.assertEqual(self.parseLogged(arch, cache), [ 'Cache miss: ' + isolateKey, 'Cache miss: ' + vmKey ])
+				self.assertEqual(self.parseLogged(arch, cache), [ 'Cache hit: ' + isolateKey ])
+				# Without the isolate entry, nor the VM snapshot in memory, the VM
+				# snapshot is loaded from its own entry
+				os.remove(cache.path(isolateKey))
+				main.vmSnapshots.clear()
+				self.assertEqual(self.parseLogged(arch, cache), [ 'Cache miss: ' + isolateKey, 'Cache hit: ' + vmKey ])
+
+if __name__ == '__main__':
+	unittest.main()
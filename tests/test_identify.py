@@ -0,0 +1,33 @@
+# Checks of the identification of snapshots from their header alone
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import BaseConstants
+import main
+
+kFixture = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'libapp-v2_10-x64.so')
+
+# Isolate data blob of the fixture, with its snapshot hash replaced
+def blobWithHash(snapshotHash):
+	blob = bytearray(main.readELFBlobs(kFixture)[0][2])
+	blob[BaseConstants.kHeaderSize:BaseConstants.kHeaderSize + BaseConstants.hashSize] = snapshotHash.encode('UTF-8')
+	return bytes(blob)
+
+class IdentifyTest(unittest.TestCase):
+	def testSupported(self):
+		identity = main.identifyFile(kFixture)
+		self.assertEqual((identity.status, identity.version, identity.kind, identity.arch), ('supported', 'v2_10', 'FULL_AOT', 'X64'))
+		self.assertEqual((identity.numBaseObjects, identity.numObjects, identity.numClusters, identity.fieldTableLength), (1012, 58366, 257, 3324))
+
+	def testNotSupported(self):
+		for snapshotHash, status in (('e4a09dbf2bb120fe4674e0576617a0dc', 'work in progress'), ('0' * BaseConstants.hashSize, 'unsupported')):
+			identity = main.identifyBlob(blobWithHash(snapshotHash))
+			self.assertEqual(identity.status, status)
+			self.assertEqual(identity.kind, 'unknown')
+			self.assertEqual((identity.numBaseObjects, identity.numObjects, identity.numClusters, identity.fieldTableLength), (None, None, None, None))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,30 @@
+# Checks of the field layouts of instance clusters in both snapshot versions
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import v2_10.Cluster
+import v2_12.Cluster
+from v2_12.UnboxedFieldBitmap import UnboxedFieldBitmap
+
+kClusters = ( v2_10.Cluster, v2_12.Cluster )
+
+class InstanceLayoutTest(unittest.TestCase):
+	def testLayout(self):
+		for cluster in kClusters:
+			# Words 1 and 3 are unboxed
+			self.assertEqual(cluster.compileInstanceLayout(100, 5, UnboxedFieldBitmap(0b1010)), (True, False, True, False))
+
+	def testWithoutFields(self):
+		for cluster in kClusters:
+			self.assertEqual(cluster.compileInstanceLayout(100, 1, None), ( ))
+
+	def testMissingBitmap(self):
+		for cluster in kClusters:
+			with self.assertRaisesRegex(Exception, 'No unboxed fields bitmap for the instances of class ID 100'):
+				cluster.compileInstanceLayout(100, 3, None)
+
+if __name__ == '__main__':
+	unittest.main()
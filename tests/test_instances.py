@@ -0,0 +1,154 @@
+# Checks of the instance views of both snapshot versions, over a synthetic
+# snapshot holding a class Point extending Base, the fields of both, and a
+# cluster of two points
+import unittest
+
+from helpers import encodeBool, encodeSigned, encodeUnsigned, encodeWord
+
+import v2_10.ClassId
+import v2_10.Cluster
+import v2_10.Constants
+import v2_10.RawObject
+import v2_10.Snapshot
+import v2_10.UnboxedFieldBitmap
+import v2_10.Utils
+import v2_12.ClassId
+import v2_12.Cluster
+import v2_12.Constants
+import v2_12.RawObject
+import v2_12.Snapshot
+import v2_12.UnboxedFieldBitmap
+import v2_12.Utils
+
+kBaseCid = 200
+kPointCid = 201
+# Word 2 of points is unboxed, word 4 has no field left in the snapshot
+kUnboxedBitmap = 0b100
+kNumRefs = 64
+
+# Fills of the instance cluster: v2_10 writes a canonical flag per instance,
+# v2_12 writes the unboxed fields bitmap once
+def fillV2_10(instances, layout):
+	return b''.join(encodeBool(False) + encodeInstance(words, layout) for words in instances)
+
+def fillV2_12(instances, layout):
+	return encodeUnsigned(kUnboxedBitmap) + b''.join(encodeInstance(words, layout) for words in instances)
+
+def encodeInstance(words, layout):
+	return b''.join(encodeWord(word, layout) if (kUnboxedBitmap >> index) & 1 else encodeUnsigned(word) for index, word in enumerate(words, 1))
+
+kVersions = (
+	(v2_10.Snapshot.Snapshot, v2_10.Utils, v2_10.RawObject, v2_10.ClassId.ClassId, v2_10.Cluster, v2_10.Constants, v2_10.UnboxedFieldBitmap, fillV2_10, ()),
+	(v2_12.Snapshot.Snapshot, v2_12.Utils, v2_12.RawObject, v2_12.ClassId.ClassId, v2_12.Cluster, v2_12.Constants, v2_12.UnboxedFieldBitmap, fillV2_12, (False, ))
+)
+
+class Objects:
+	pass
+
+# Snapshot after the alloc and fill stages of its clusters, along with its
+# objects by name. Base has a field id at offset 1, and Point a field color at
+# offset 2, declared in a patch of Point, a field label at offset 3 and a static
+# field count, which is not part of instances
+def makeSnapshot(version):
+	Snapshot, utils, raw, ClassId, Cluster, Constants, bitmaps, fill, isCanonical = version
+	snapshot = Snapshot.__new__(Snapshot)
+	snapshot.references = utils.ReferenceTable(kNumRefs)
+	snapshot.nextRefIndex = 1
+	snapshot.allocations = [ ]
+	snapshot.classes = { }
+	snapshot.unboxedFieldsMapAt = { kPointCid: bitmaps.UnboxedFieldBitmap(kUnboxedBitmap) }
+	snapshot.instanceFieldIndices = { }
+	snapshot.instanceFieldsByOwner = None
+	snapshot.layout = Constants.kLayouts['ARM64']
+	snapshot.arch = 'ARM64'
+
+	def add(obj, **fields):
+		obj.refId = snapshot.nextRefIndex
+		for name, value in fields.items():
+			setattr(obj, name, value)
+		snapshot.assignRef(obj)
+		return obj
+
+	def addString(data):
+		return add(raw.RawOneByteString(ClassId.ONE_BYTE_STRING), data=data)
+
+	def addMint(value):
+		return add(raw.RawMint(ClassId.MINT), value=value, isCanonical=False)
+
+	objects = Objects()
+	objects.origin = addString('origin')
+	objects.other = addString('other')
+	objects.answer = addMint(42)
+	baseCid, pointCid = addMint(kBaseCid), addMint(kPointCid)
+	# Object is the superclass of Base, and is not in the snapshot
+	objectType = add(raw.RawType(ClassId.TYPE))
+	baseType = add(raw.RawType(ClassId.TYPE), typeClassId=baseCid.refId)
+	base = add(raw.RawClass(ClassId.CLASS), id=kBaseCid, name=addString('Base').refId, superType=objectType.refId)
+	point = add(raw.RawClass(ClassId.CLASS), id=kPointCid, name=addString('Point').refId, superType=baseType.refId)
+	patch = add(raw.RawPatchClass(ClassId.PATCH_CLASS), patchedClass=point.refId)
+	snapshot.classes.update({ kBaseCid: base, kPointCid: point })
+
+	fields = [ (addString(name).refId, owner.refId, addMint(offset).refId, kindBits) for name, owner, offset, kindBits in
+		(('id', base, 1, 0), ('color', patch, 2, 0), ('label', point, 3, 0), ('count', point, 42, 0b10)) ]
+	fieldsStart = snapshot.nextRefIndex
+	for name, owner, offset, kindBits in fields:
+		add(raw.RawField(ClassId.FIELD), name=name, owner=owner, hostOffsetOrFieldId=('Smi', offset), kindBits=kindBits)
+	snapshot.allocations.append((None, ) + isCanonical + (ClassId.FIELD.value, fieldsStart, snapshot.nextRefIndex))
+
+	objects.instances = [
+		[ objects.answer.refId, 0xff1e88e5, objects.origin.refId, objects.other.refId ],
+		[ baseCid.refId, (1 << 63) | 5, objects.other.refId, objects.origin.refId ]
+	]
+	nextFieldOffsetInWords = len(objects.instances[0]) + 1
+	alloc = encodeUnsigned(len(objects.instances)) + encodeSigned(nextFieldOffsetInWords) + encodeSigned(nextFieldOffsetInWords)
+	snapshot.stream = utils.Stream(alloc + fill(objects.instances, snapshot.layout))
+	deserializer = Cluster.InstanceDeserializer(kPointCid)
+	startRef = snapshot.nextRefIndex
+	deserializer.readAlloc(snapshot, *isCanonical)
+	snapshot.allocations.append((deserializer, ) + isCanonical + (kPointCid, startRef, snapshot.nextRefIndex))
+	deserializer.readFill(snapshot, *isCanonical)
+	return snapshot, objects
+
+class InstanceViewTest(unittest.TestCase):
+	def testFields(self):
+		for version in kVersions:
+			snapshot, objects = makeSnapshot(version)
+			views = list(snapshot.getInstances())
+			self.assertEqual(len(views), 2)
+			first, second = views
+			self.assertEqual(first.getClassName(), 'Point')
+			# Fields of superclasses come first, and static fields are left out
+			self.assertEqual(list(first), [ 'id', 'color', 'label' ])
+			self.assertEqual(len(first), 3)
+			self.assertNotIn('count', first)
+			with self.assertRaises(KeyError):
+				first['count']
+			# References resolve to their object, unboxed words are the word itself
+			self.assertIs(first['id'], objects.answer)
+			self.assertEqual(first['color'], 0xff1e88e5)
+			self.assertIs(first['label'], objects.origin)
+			self.assertEqual(dict(second), { 'id': snapshot.references[objects.instances[1][0]], 'color': (1 << 63) | 5, 'label': objects.other })
+
+	# Offset 1 is the first word after the header, and words without a field
+	# are still read by offset
+	def testWords(self):
+		for version in kVersions:
+			snapshot, objects = makeSnapshot(version)
+			first, second = snapshot.getInstances()
+			self.assertIs(first.getWord(1), objects.answer)
+			self.assertEqual(first.getWord(2), 0xff1e88e5)
+			self.assertIs(first.getWord(4), objects.other)
+			self.assertIs(second.getWord(4), objects.origin)
+			index = snapshot.getInstanceFieldIndex(kPointCid)
+			self.assertEqual(index.offsets, { 'id': 1, 'color': 2, 'label': 3 })
+			self.assertEqual(index.unboxed, frozenset({ 2 }))
+			self.assertIs(first.index, index)
+
+	def testByCid(self):
+		for version in kVersions:
+			snapshot, _ = makeSnapshot(version)
+			self.assertEqual([ view.refId for view in snapshot.getInstances(kPointCid) ], [ view.refId for view in snapshot.getInstances() ])
+			self.assertEqual(list(snapshot.getInstances(kBaseCid)), [ ])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,21 @@
+# Checks that every kind of deserialized object of both snapshot versions is
+# a __slots__ record, without a dictionary of its own
+import inspect
+import unittest
+
+import helpers
+
+import v2_10.RawObject
+import v2_12.RawObject
+
+class SlotsTest(unittest.TestCase):
+	def testNoDictionaries(self):
+		for module in ( v2_10.RawObject, v2_12.RawObject ):
+			classes = [ cls for cls in vars(module).values() if inspect.isclass(cls) and issubclass(cls, module.RawObject) ]
+			self.assertGreater(len(classes), 30)
+			for cls in classes:
+				with self.subTest(module=module.__name__, cls=cls.__name__):
+					self.assertFalse(hasattr(cls.__new__(cls), '__dict__'))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,95 @@
+# Checks of the memoized type resolution of both snapshot versions: one DartType
+# per reference and snapshot, counted hits and misses, cycles of TypeRefs, and
+# caches dropped along with their snapshot
+import gc
+import unittest
+
+from helpers import FakeSnapshot
+
+import v2_10.ClassId
+import v2_10.RawObject
+import v2_10.Resolver
+import v2_10.Utils
+import v2_12.ClassId
+import v2_12.RawObject
+import v2_12.Resolver
+import v2_12.Utils
+
+kVersions = (
+	(v2_10.Utils, v2_10.RawObject, v2_10.ClassId.ClassId, v2_10.Resolver),
+	(v2_12.Utils, v2_12.RawObject, v2_12.ClassId.ClassId, v2_12.Resolver)
+)
+
+kClassCid = 200
+# References of the snapshot built by makeSnapshot
+kClassNameRef, kClassIdRef, kTypeRef, kTypeRefRef, kCycleStartRef, kCycleEndRef = range(1, 7)
+
+# Snapshot holding a class named Color, its type, a TypeRef to that type and
+# two TypeRefs pointing at each other
+def makeSnapshot(utils, raw, ClassId):
+	snapshot = FakeSnapshot(utils, b'', 16, classes={ })
+	name = raw.RawOneByteString(ClassId.ONE_BYTE_STRING, kClassNameRef)
+	name.data = 'Color'
+	clazz = raw.RawClass(ClassId.CLASS)
+	clazz.name = kClassNameRef
+	snapshot.classes[kClassCid] = clazz
+	classId = raw.RawMint(ClassId.MINT, kClassIdRef)
+	classId.value = kClassCid
+	typePtr = raw.RawType(ClassId.TYPE, kTypeRef)
+	typePtr.typeClassId = kClassIdRef
+	objects = [ name, classId, typePtr ]
+	for refId, target in ((kTypeRefRef, kTypeRef), (kCycleStartRef, kCycleEndRef), (kCycleEndRef, kCycleStartRef)):
+		typeRef = raw.RawTypeRef(ClassId.TYPE_REF, refId)
+		typeRef.type = target
+		objects.append(typeRef)
+	for obj in objects:
+		snapshot.assignRef(obj)
+	return snapshot
+
+class ResolverTest(unittest.TestCase):
+	def testRepeatedLookup(self):
+		for utils, raw, ClassId, resolver in kVersions:
+			snapshot = makeSnapshot(utils, raw, ClassId)
+			dartType = resolver.resolveType(snapshot, kTypeRef)
+			self.assertEqual(str(dartType), 'Color')
+			cache = resolver.getTypeCache(snapshot)
+			self.assertEqual((cache.misses, cache.hits), (1, 0))
+			for hits in range(1, 4):
+				self.assertIs(resolver.resolveType(snapshot, kTypeRef), dartType)
+				self.assertEqual((cache.misses, cache.hits), (1, hits))
+			# Each snapshot has its own cache
+			self.assertIsNot(resolver.resolveType(makeSnapshot(utils, raw, ClassId), kTypeRef), dartType)
+
+	def testTypeRef(self):
+		for utils, raw, ClassId, resolver in kVersions:
+			snapshot = makeSnapshot(utils, raw, ClassId)
+			self.assertEqual(str(resolver.resolveType(snapshot, kTypeRefRef)), 'Color')
+			cache = resolver.getTypeCache(snapshot)
+			self.assertEqual((cache.misses, cache.hits), (2, 0))
+			self.assertEqual(str(resolver.resolveType(snapshot, kTypeRef)), 'Color')
+			self.assertEqual((cache.misses, cache.hits), (2, 1))
+
+	# The second TypeRef finds the first one still being resolved, and falls
+	# back to DynamicType instead of recursing forever
+	def testTypeRefCycle(self):
+		for utils, raw, ClassId, resolver in kVersions:
+			snapshot = makeSnapshot(utils, raw, ClassId)
+			self.assertEqual(str(resolver.resolveType(snapshot, kCycleStartRef)), 'DynamicType')
+			self.assertEqual(str(resolver.resolveType(snapshot, kCycleEndRef)), 'DynamicType')
+			cache = resolver.getTypeCache(snapshot)
+			self.assertEqual((cache.misses, cache.hits), (2, 2))
+
+	def testDroppedWithSnapshot(self):
+		for utils, raw, ClassId, resolver in kVersions:
+			snapshot = makeSnapshot(utils, raw, ClassId)
+			resolver.resolveType(snapshot, kTypeRef)
+			self.assertIn(snapshot, resolver.typeCaches)
+			# Snapshots left unreachable by other tests are collected first
+			gc.collect()
+			count = len(resolver.typeCaches)
+			del snapshot
+			gc.collect()
+			self.assertEqual(len(resolver.typeCaches), count - 1)
+
+if __name__ == '__main__':
+	unittest.main()
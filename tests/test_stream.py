@@ -0,0 +1,50 @@
+# Checks that the varint readers of both snapshot versions decode by indexing
+# the buffer of a Stream, without going through byte reads. Run them with:
+#   python3 -m pytest tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import v2_10.Utils
+import v2_12.Utils
+
+kUtils = ( v2_10.Utils, v2_12.Utils )
+
+# Stream whose reads fail, so that values can only be decoded by indexing
+def indexOnlyStream(utils, data):
+	class IndexOnlyStream(utils.Stream):
+		def read(self, size):
+			raise AssertionError('Varints must be decoded by indexing the buffer, not with Stream.read')
+	return IndexOnlyStream(data)
+
+class FastPathTest(unittest.TestCase):
+	def testSingleByteVarints(self):
+		for utils in kUtils:
+			stream = indexOnlyStream(utils, b'\x80\x81\xff\xc0\xbf\xff')
+			self.assertEqual([ utils.StreamUtils.readUnsigned(stream) for _ in range(3) ], [ 0, 1, 127 ])
+			self.assertEqual(stream.pos, 3)
+			self.assertEqual([ utils.StreamUtils.readInt(stream, 32) for _ in range(3) ], [ 0, -1, 63 ])
+			self.assertEqual(stream.pos, 6)
+
+	def testMultiByteVarints(self):
+		for utils in kUtils:
+			# 300 unsigned, then -300 and 2^40 signed
+			stream = indexOnlyStream(utils, b'\x2c\x82\x54\xbd\x00\x00\x00\x00\x00\xe0')
+			self.assertEqual(utils.StreamUtils.readRef(stream), 300)
+			self.assertEqual(utils.StreamUtils.readCid(stream), -300)
+			self.assertEqual(utils.StreamUtils.readInt(stream, 64), 1 << 40)
+			self.assertEqual(stream.pos, 10)
+
+	def testRawBytes(self):
+		for utils in kUtils:
+			stream = indexOnlyStream(utils, b'\x01\x00\xff\xff')
+			self.assertIs(utils.StreamUtils.readBool(stream), True)
+			self.assertIs(utils.StreamUtils.readBool(stream), False)
+			self.assertEqual(utils.StreamUtils.readUnsigned(stream, 8), 255)
+			self.assertEqual(utils.StreamUtils.readInt(stream, 8), -1)
+			self.assertEqual(stream.pos, 4)
+
+if __name__ == '__main__':
+	unittest.main()
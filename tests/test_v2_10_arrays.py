@@ -0,0 +1,74 @@
+# Checks of the v2_10 array deserializer, which decodes the fill of a cluster
+# as a single run of varints, with the canonical flag byte of each array packed
+# into the type arguments ref that follows it
+import unittest
+
+from helpers import FakeSnapshot, encodeBool, encodeUnsigned
+
+import v2_10.Utils as Utils
+from v2_10.Cluster import ArrayDeserializer
+from v2_10.Utils import StreamUtils
+
+# Canonical flag, type arguments ref and elements of each array, with refs of
+# one to five bytes, and more elements than kNumPyMinRunLength
+kArrays = [
+	(False, 0, [ ]),
+	(True, 5, [ 1, 2 ]),
+	(True, 300, [ 1 << 20, 127, 128 ]),
+	(False, (1 << 28) + 1, list(range(100, 200)))
+]
+
+def encodeArrays(arrays, flagByte=encodeBool):
+	alloc = encodeUnsigned(len(arrays)) + b''.join(encodeUnsigned(len(data)) for _, _, data in arrays)
+	fill = b''.join(encodeUnsigned(len(data)) + flagByte(isCanonical) + encodeUnsigned(typeArguments) + b''.join(encodeUnsigned(ref) for ref in data) for isCanonical, typeArguments, data in arrays)
+	return alloc, fill
+
+# Arrays decoded field by field, one object at a time
+def readArraysPerObject(stream, count):
+	arrays = [ ]
+	for _ in range(count):
+		length = StreamUtils.readUnsigned(stream)
+		isCanonical = StreamUtils.readBool(stream)
+		typeArguments = StreamUtils.readRef(stream)
+		arrays.append((isCanonical, typeArguments, [ StreamUtils.readRef(stream) for _ in range(length) ]))
+	return arrays
+
+class ArrayDeserializerTest(unittest.TestCase):
+	def setUp(self):
+		self.threshold = StreamUtils.kNumPyMinRunLength
+
+	def tearDown(self):
+		StreamUtils.kNumPyMinRunLength = self.threshold
+
+	def readArrays(self, data):
+		snapshot = FakeSnapshot(Utils, data)
+		deserializer = ArrayDeserializer()
+		deserializer.readAlloc(snapshot)
+		deserializer.readFill(snapshot)
+		self.assertEqual(snapshot.stream.pos, len(data))
+		return [ (arrayPtr.isCanonical, arrayPtr.typeArguments, list(arrayPtr.data)) for arrayPtr in (snapshot.references[refId] for refId in range(deserializer.startIndex, deserializer.stopIndex)) ]
+
+	def testMatchesPerObjectDecoding(self):
+		alloc, fill = encodeArrays(kArrays)
+		expected = readArraysPerObject(Utils.Stream(fill), len(kArrays))
+		self.assertEqual(expected, kArrays)
+		# Both the NumPy and the pure Python decoders, when NumPy is installed
+		for threshold in (1, float('inf')):
+			StreamUtils.kNumPyMinRunLength = threshold
+			self.assertEqual(self.readArrays(alloc + fill), expected)
+
+	def testNonBooleanFlag(self):
+		alloc, fill = encodeArrays(kArrays[:2], lambda isCanonical: b'\x02')
+		with self.assertRaisesRegex(Exception, 'Expected boolean'):
+			self.readArrays(alloc + fill)
+
+	def testSkipFill(self):
+		alloc, fill = encodeArrays(kArrays)
+		snapshot = FakeSnapshot(Utils, alloc + fill)
+		deserializer = ArrayDeserializer()
+		deserializer.readAlloc(snapshot)
+		deserializer.skipFill(snapshot)
+		self.assertEqual(snapshot.stream.pos, len(alloc + fill))
+
+if __name__ == '__main__':
+	unittest.main()
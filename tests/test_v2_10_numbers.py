@@ -0,0 +1,72 @@
+# Checks of the v2_10 deserializers of mints and doubles, which decode the
+# canonical flag and value of each number with readFlaggedIntRun, keep the
+# values of a cluster in one array and only build its objects once one is read
+from functools import partial
+import struct
+import unittest
+
+from helpers import FakeSnapshot, encodeBool, encodeSigned, encodeUnsigned
+
+import v2_10.Utils as Utils
+from v2_10.ClassId import ClassId
+from v2_10.Cluster import DoubleDeserializer, MintDeserializer
+from v2_10.Snapshot import Snapshot
+from v2_10.Utils import StreamUtils
+
+kMints = [ (True, -5), (False, 1 << 40), (True, -(1 << 63)) ]
+kDoubles = [ (True, 1.0), (False, -2.5), (True, 0.1), (False, float('-inf')) ]
+
+# Doubles are written as the bits of their IEEE 754 representation
+def encodeDouble(value):
+	return encodeSigned(struct.unpack('<q', struct.pack('<d', value))[0])
+
+# Snapshot holding a cluster of mints followed by a cluster of doubles, after
+# their alloc stages
+def allocNumbers():
+	data = encodeUnsigned(len(kMints)) + b''.join(encodeBool(isCanonical) + encodeSigned(value) for isCanonical, value in kMints)
+	data += encodeUnsigned(len(kDoubles))
+	data += b''.join(encodeBool(isCanonical) + encodeDouble(value) for isCanonical, value in kDoubles)
+	snapshot = FakeSnapshot(Utils, data, allocations=[ ])
+	for deserializer, cid in ((MintDeserializer(), ClassId.MINT), (DoubleDeserializer(), ClassId.DOUBLE)):
+		startRef = snapshot.nextRefIndex
+		deserializer.readAlloc(snapshot)
+		snapshot.allocations.append((deserializer, cid.value, startRef, snapshot.nextRefIndex))
+	return snapshot
+
+class NumberTest(unittest.TestCase):
+	def testFlaggedIntRun(self):
+		stream = Utils.Stream(b''.join(encodeBool(isCanonical) + encodeDouble(value) for isCanonical, value in kDoubles))
+		flags, bits = StreamUtils.readFlaggedIntRun(stream, len(kDoubles))
+		self.assertEqual(flags, [ isCanonical for isCanonical, _ in kDoubles ])
+		self.assertEqual(bits[0], 4607182418800017408)
+		self.assertEqual(stream.pos, len(stream.buffer))
+
+	def testNumbers(self):
+		snapshot = allocNumbers()
+		snapshot.allocations[1][0].readFill(snapshot)
+		self.assertEqual(snapshot.stream.pos, len(snapshot.stream.buffer))
+		# No object is built before one is read
+		self.assertEqual(snapshot.references.objects[1:snapshot.nextRefIndex], [ None ] * (len(kMints) + len(kDoubles)))
+		mints, doubles = Snapshot.getNumbers(snapshot)
+		self.assertEqual((mints.cid, mints.startRef, mints.stopRef, mints.values.typecode), (ClassId.MINT.value, 1, 4, 'q'))
+		self.assertEqual(list(mints.values), [ value for _, value in kMints ])
+		self.assertEqual((doubles.cid, doubles.startRef, doubles.stopRef, doubles.values.typecode), (ClassId.DOUBLE.value, 4, 8, 'd'))
+		self.assertEqual(list(doubles.values), [ value for _, value in kDoubles ])
+		self.assertEqual([ number.cid for number in Snapshot.getNumbers(snapshot, ClassId.DOUBLE.value) ], [ ClassId.DOUBLE.value ])
+		self.assertEqual(snapshot.references.objects[1], None)
+		self.assertEqual([ (snapshot.references[refId].isCanonical, snapshot.references[refId].value) for refId in range(1, 4) ], kMints)
+		self.assertEqual([ (snapshot.references[refId].isCanonical, snapshot.references[refId].value) for refId in range(4, 8) ], kDoubles)
+		self.assertIsInstance(snapshot.references[4].value, float)
+
+	# The values of a deferred cluster of doubles are decoded on demand
+	def testDeferredDoubles(self):
+		snapshot = allocNumbers()
+		deserializer = snapshot.allocations[1][0]
+		snapshot.references.defer(deserializer.startIndex, deserializer.stopIndex, partial(deserializer.readFill, snapshot))
+		_, doubles = Snapshot.getNumbers(snapshot)
+		self.assertEqual(list(doubles.values), [ value for _, value in kDoubles ])
+		self.assertEqual(snapshot.references.objects[4], None)
+		self.assertEqual(snapshot.references[5].value, -2.5)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,43 @@
+# Checks of the v2_12 deserializers of arrays and type arguments, which decode
+# their references as runs, against per-object decoders
+import unittest
+
+from helpers import ClusterTest, encodeRefs, encodeSigned, encodeUnsigned
+
+import v2_12.Utils as Utils
+from v2_12.Cluster import ArrayDeserializer, TypeArgumentsDeserializer
+from v2_12.Utils import StreamUtils
+
+def readTypeArguments(stream, count):
+	objects = [ ]
+	for _ in range(count):
+		length = StreamUtils.readUnsigned(stream)
+		objects.append((length, StreamUtils.readInt(stream, 32), StreamUtils.readUnsigned(stream), StreamUtils.readRef(stream), [ StreamUtils.readRef(stream) for _ in range(length) ]))
+	return objects
+
+def readArrays(stream, count):
+	objects = [ ]
+	for _ in range(count):
+		length = StreamUtils.readUnsigned(stream)
+		objects.append((length, StreamUtils.readRef(stream), [ StreamUtils.readRef(stream) for _ in range(length) ]))
+	return objects
+
+class ArrayTest(ClusterTest):
+	def testTypeArguments(self):
+		typeArguments = [ (0, -5, 0, 0, [ ]), (3, 1 << 30, 2, 300, [ 1, 200, 1 << 20 ]), (70, -(1 << 31), 1, 7, list(range(1000, 1070))) ]
+		alloc = encodeUnsigned(len(typeArguments)) + encodeRefs(length for length, *_ in typeArguments)
+		fill = b''.join(encodeUnsigned(length) + encodeSigned(hsh) + encodeUnsigned(nullability) + encodeUnsigned(instantiations) + encodeRefs(types) for length, hsh, nullability, instantiations, types in typeArguments)
+		self.assertEqual(readTypeArguments(Utils.Stream(fill), len(typeArguments)), typeArguments)
+		for objects in self.fillCluster(TypeArgumentsDeserializer, alloc, fill):
+			self.assertEqual([ (o.length, o.hash, o.nullability, o.instantiations, list(o.types)) for o in objects ], typeArguments)
+
+	def testArrays(self):
+		arrays = [ (0, 0, [ ]), (2, 1 << 28, [ 5, 6 ]), (100, 300, [ (i * 7919) % (1 << 21) for i in range(100) ]) ]
+		alloc = encodeUnsigned(len(arrays)) + encodeRefs(length for length, _, _ in arrays)
+		fill = b''.join(encodeUnsigned(length) + encodeUnsigned(typeArguments) + encodeRefs(data) for length, typeArguments, data in arrays)
+		self.assertEqual(readArrays(Utils.Stream(fill), len(arrays)), arrays)
+		for objects in self.fillCluster(ArrayDeserializer, alloc, fill):
+			self.assertEqual([ (o.length, o.typeArguments, list(o.data)) for o in objects ], arrays)
+
+if __name__ == '__main__':
+	unittest.main()
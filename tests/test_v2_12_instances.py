@@ -0,0 +1,45 @@
+# Checks of the v2_12 deserializer of instances, which reads their fields
+# through a precompiled layout, against a per-object decoder
+import unittest
+
+from helpers import ClusterTest, encodeSigned, encodeUnsigned, encodeWord
+
+import v2_12.Constants as Constants
+import v2_12.Utils as Utils
+from v2_12.Cluster import InstanceDeserializer
+from v2_12.Utils import StreamUtils
+
+kInstanceCid = 200
+
+def readInstances(stream, count, nextFieldOffsetInWords, layout):
+	bitmap = StreamUtils.readUnsigned(stream, 64)
+	objects = [ ]
+	for _ in range(count):
+		words = [ ]
+		for index in range(1, nextFieldOffsetInWords):
+			if (bitmap >> index) & 1:
+				words.append(StreamUtils.readWordWith32BitReads(stream, layout))
+			else:
+				words.append(StreamUtils.readRef(stream))
+		objects.append(words)
+	return objects
+
+class InstanceTest(ClusterTest):
+	def testInstances(self):
+		# Instances with only references, which are decoded as a single run, and
+		# with unboxed words 2 and 4, on both 64-bit and 32-bit targets
+		for archName, bitmap, instances in (
+				('ARM64', 0, [ [ i, 1 << 20, 300 ] for i in range(40) ]),
+				('ARM64', 0b10100, [ [ 1, 0xff1e88e5, 2, (1 << 63) | 5 ], [ 1 << 30, 0, 3, 0xffffffffffffffff ] ]),
+				('ARM', 0b100, [ [ 7, 0xff1e88e5 ], [ 8, 0x7fffffff ] ])):
+			layout = Constants.kLayouts[archName]
+			nextFieldOffsetInWords = len(instances[0]) + 1
+			alloc = encodeUnsigned(len(instances)) + encodeSigned(nextFieldOffsetInWords) + encodeSigned(nextFieldOffsetInWords)
+			fill = encodeUnsigned(bitmap) + b''.join(encodeWord(word, layout) if (bitmap >> index) & 1 else encodeUnsigned(word) for words in instances for index, word in enumerate(words, 1))
+			self.assertEqual(readInstances(Utils.Stream(fill), len(instances), nextFieldOffsetInWords, layout), instances)
+			for objects in self.fillCluster(lambda: InstanceDeserializer(kInstanceCid), alloc, fill, archName):
+				self.assertEqual([ list(o.data) for o in objects ], instances)
+				self.assertEqual([ [ o.getWord(index) for index in range(len(words)) ] for o, words in zip(objects, instances) ], instances)
+
+if __name__ == '__main__':
+	unittest.main()
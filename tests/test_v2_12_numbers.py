@@ -0,0 +1,37 @@
+# Checks of the v2_12 deserializers of mints and doubles, which decode their
+# values in bulk, against per-object decoders
+import struct
+import unittest
+
+from helpers import ClusterTest, encodeSigned, encodeUnsigned
+
+import v2_12.Utils as Utils
+from v2_12.Cluster import DoubleDeserializer, MintDeserializer
+from v2_12.Utils import StreamUtils
+
+def encodeDouble(value):
+	return encodeSigned(struct.unpack('<q', struct.pack('<d', value))[0])
+
+def readDoubles(stream, count):
+	return [ struct.unpack('<d', struct.pack('<q', StreamUtils.readInt(stream, 64)))[0] for _ in range(count) ]
+
+class NumberTest(ClusterTest):
+	def testMints(self):
+		values = [ 0, -1, 63, -64, 1 << 40, (1 << 63) - 1, -(1 << 63) ] * 12
+		alloc = encodeUnsigned(len(values)) + b''.join(encodeSigned(value) for value in values)
+		stream = Utils.Stream(alloc)
+		count = StreamUtils.readUnsigned(stream)
+		self.assertEqual([ StreamUtils.readInt(stream, 64) for _ in range(count) ], values)
+		for objects in self.fillCluster(MintDeserializer, alloc, b''):
+			self.assertEqual([ o.value for o in objects ], values)
+
+	def testDoubles(self):
+		values = [ 0.0, -0.0, 1.5, -2.25e-300, float('inf'), 6.02e23 ]
+		alloc = encodeUnsigned(len(values))
+		fill = b''.join(encodeDouble(value) for value in values)
+		self.assertEqual(readDoubles(Utils.Stream(fill), len(values)), values)
+		for objects in self.fillCluster(DoubleDeserializer, alloc, fill):
+			self.assertEqual([ struct.pack('<d', o.value) for o in objects ], [ struct.pack('<d', value) for value in values ])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,34 @@
+# Checks of the v2_12 deserializers of strings, whose data is decoded lazily
+# from the snapshot buffer, against per-object decoders
+import unittest
+
+from helpers import ClusterTest, encodeRefs, encodeSigned, encodeUnsigned
+
+import v2_12.Utils as Utils
+from v2_12.Cluster import OneByteStringDeserializer, TwoByteStringDeserializer
+from v2_12.Utils import StreamUtils
+
+def readStrings(stream, count, itemSize, encoding):
+	objects = [ ]
+	for _ in range(count):
+		length = StreamUtils.readUnsigned(stream)
+		objects.append((length, StreamUtils.readInt(stream, 32), stream.read(length * itemSize).decode(encoding)))
+	return objects
+
+class StringTest(ClusterTest):
+	def checkStrings(self, makeDeserializer, itemSize, encoding, strings):
+		expected = [ (len(string), -len(string) * 1000, string) for string in strings ]
+		alloc = encodeUnsigned(len(strings)) + encodeRefs(len(string) for string in strings)
+		fill = b''.join(encodeUnsigned(length) + encodeSigned(hsh) + string.encode(encoding) for length, hsh, string in expected)
+		self.assertEqual(readStrings(Utils.Stream(fill), len(strings), itemSize, encoding), expected)
+		for objects in self.fillCluster(makeDeserializer, alloc, fill):
+			self.assertEqual([ (o.length, o.hash, o.data) for o in objects ], expected)
+
+	def testOneByteStrings(self):
+		self.checkStrings(OneByteStringDeserializer, 1, 'latin-1', [ '', 'main', 'caf\xe9' * 40 ])
+
+	def testTwoByteStrings(self):
+		self.checkStrings(TwoByteStringDeserializer, 2, 'utf-16-le', [ '', '日本語', 'h\xe9llo ☃' * 30 ])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,35 @@
+# Checks of the v2_12 deserializer of typed data, whose payloads are views of
+# the snapshot buffer, against a per-object decoder
+import struct
+import unittest
+
+from helpers import ClusterTest, encodeRefs, encodeUnsigned
+
+import v2_12.Utils as Utils
+from v2_12.Cluster import TypedDataDeserializer
+from v2_12.TypedData import elementSizeInBytes
+from v2_12.Utils import StreamUtils
+
+kUint8ArrayCid = 103
+kFloat64ArrayCid = 130
+
+def readTypedData(stream, count, elementSize):
+	objects = [ ]
+	for _ in range(count):
+		length = StreamUtils.readUnsigned(stream)
+		objects.append((length, stream.read(length * elementSize)))
+	return objects
+
+class TypedDataTest(ClusterTest):
+	def testTypedData(self):
+		for cid, elements in ((kUint8ArrayCid, [ b'', b'\x00\x80\xff', bytes(range(256)) ]), (kFloat64ArrayCid, [ struct.pack('<3d', 1.5, -0.0, float('inf')) ])):
+			elementSize = elementSizeInBytes(cid)
+			expected = [ (len(data) // elementSize, data) for data in elements ]
+			alloc = encodeUnsigned(len(elements)) + encodeRefs(length for length, _ in expected)
+			fill = b''.join(encodeUnsigned(length) + data for length, data in expected)
+			self.assertEqual(readTypedData(Utils.Stream(fill), len(elements), elementSize), expected)
+			for objects in self.fillCluster(lambda: TypedDataDeserializer(cid), alloc, fill):
+				self.assertEqual([ (o.length, bytes(o.data)) for o in objects ], expected)
+
+if __name__ == '__main__':
+	unittest.main()
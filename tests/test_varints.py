@@ -0,0 +1,108 @@
+# Round trips of the varint readers of both snapshot versions, on the edge cases
+# of the encoding, and checks that long runs decode the same with NumPy as with
+# the pure Python decoder, on both sides of kNumPyMinRunLength
+import unittest
+
+from helpers import encodeSigned, encodeUnsigned
+
+import v2_10.Utils
+import v2_12.Utils
+
+kUtils = ( v2_10.Utils, v2_12.Utils )
+
+# Values on each side of the boundaries between varint lengths, up to 64 bits
+kUnsignedValues = [ 0, 1, 0x7f, 0x80, 0x3fff, 0x4000, (1 << 32) - 1, 1 << 32, (1 << 35) - 1, 1 << 35, (1 << 63) - 1, 1 << 63, (1 << 64) - 1 ]
+kSignedValues = [ 0, 1, -1, 63, 64, -64, -65, 8191, -8192, (1 << 31) - 1, -(1 << 31), 1 << 40, -(1 << 40), (1 << 63) - 1, -(1 << 63) ]
+
+class RoundTripTest(unittest.TestCase):
+	def testUnsigned(self):
+		for utils in kUtils:
+			stream = utils.Stream(b''.join(encodeUnsigned(value) for value in kUnsignedValues))
+			self.assertEqual([ utils.StreamUtils.readUnsigned(stream) for _ in kUnsignedValues ], kUnsignedValues)
+			self.assertEqual(stream.pos, len(stream.buffer))
+
+	def testSigned(self):
+		for utils in kUtils:
+			stream = utils.Stream(b''.join(encodeSigned(value) for value in kSignedValues))
+			self.assertEqual([ utils.StreamUtils.readInt(stream, 64) for _ in kSignedValues ], kSignedValues)
+			self.assertEqual(stream.pos, len(stream.buffer))
+
+	# A lone end marker is a zero, and the byte right below it continues the
+	# varint. Unsigned varints end on 0x80, signed ones are centred on 0xc0
+	def testMarkers(self):
+		for utils in kUtils:
+			stream = utils.Stream(b'\x80\xc0\xbf\x80\xff\xff\x7f\x80')
+			self.assertEqual(utils.StreamUtils.readUnsigned(stream), 0)
+			self.assertEqual(utils.StreamUtils.readInt(stream, 32), 0)
+			self.assertEqual(utils.StreamUtils.readInt(stream, 32), -1)
+			self.assertEqual(utils.StreamUtils.readInt(stream, 32), -64)
+			self.assertEqual(utils.StreamUtils.readUnsigned(stream), 0x7f)
+			self.assertEqual(utils.StreamUtils.readInt(stream, 32), 0x3f)
+			self.assertEqual(utils.StreamUtils.readUnsigned(stream), 0x7f)
+			self.assertEqual(stream.pos, 8)
+
+	def testEncoding(self):
+		self.assertEqual(encodeUnsigned(0), b'\x80')
+		self.assertEqual(encodeUnsigned(300), b'\x2c\x82')
+		self.assertEqual(encodeSigned(0), b'\xc0')
+		self.assertEqual(encodeSigned(-1), b'\xbf')
+		self.assertEqual(encodeSigned(-300), b'\x54\xbd')
+
+class RunTest(unittest.TestCase):
+	def setUp(self):
+		self.thresholds = [ utils.StreamUtils.kNumPyMinRunLength for utils in kUtils ]
+
+	def tearDown(self):
+		for utils, threshold in zip(kUtils, self.thresholds):
+			utils.StreamUtils.kNumPyMinRunLength = threshold
+
+	# Decodes the same run with the NumPy decoder, when installed, and the pure
+	# Python one, and checks that both give the same array and stream position
+	def readRun(self, utils, values, trailer=b'\x80'):
+		data = b''.join(encodeUnsigned(value) for value in values) + trailer
+		runs = [ ]
+		for threshold in (self.thresholds[kUtils.index(utils)], float('inf')):
+			utils.StreamUtils.kNumPyMinRunLength = threshold
+			stream = utils.Stream(data)
+			runs.append(utils.StreamUtils.readUnsignedRun(stream, len(values)))
+			self.assertEqual(stream.pos, len(data) - len(trailer))
+		self.assertEqual(runs[0].typecode, runs[1].typecode)
+		self.assertEqual(runs[0], runs[1])
+		return runs[0]
+
+	def testAroundThreshold(self):
+		for utils in kUtils:
+			threshold = utils.StreamUtils.kNumPyMinRunLength
+			for count in (threshold - 1, threshold, threshold + 1):
+				# Values that fit in 32 bits
+				values = [ kUnsignedValues[i % 7] for i in range(count) ]
+				run = self.readRun(utils, values)
+				self.assertEqual(list(run), values)
+				self.assertEqual(run.typecode, 'I')
+
+	def testWideValues(self):
+		for utils in kUtils:
+			for count in (8, utils.StreamUtils.kNumPyMinRunLength + 1):
+				values = [ kUnsignedValues[i % len(kUnsignedValues)] for i in range(count) ]
+				run = self.readRun(utils, values)
+				self.assertEqual(list(run), values)
+				self.assertEqual(run.typecode, 'Q')
+
+	# The terminators of a run are first searched for in a window sized for
+	# references, and in the rest of the buffer when its varints are longer
+	def testBeyondWindow(self):
+		for utils in kUtils:
+			values = [ (1 << 63) + i for i in range(utils.StreamUtils.kNumPyMinRunLength * 2) ]
+			self.assertEqual(list(self.readRun(utils, values, b'\x00' * 4 + b'\x80')), values)
+
+	def testTruncated(self):
+		if v2_12.Utils.numpy is None:
+			self.skipTest('NumPy is not installed')
+		for utils in kUtils:
+			count = utils.StreamUtils.kNumPyMinRunLength
+			stream = utils.Stream(b''.join(encodeUnsigned(i) for i in range(count - 1)))
+			with self.assertRaisesRegex(Exception, 'Unexpected end of stream'):
+				utils.StreamUtils.readUnsignedRun(stream, count)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,81 @@
+# Checks of the VM snapshot shared by the isolate snapshots of an engine build,
+# which isolates read through without modifying it, whatever file they come from
+import os
+import re
+import tempfile
+import unittest
+from unittest import mock
+
+import helpers
+
+import main
+
+kFixtures = os.path.dirname(os.path.abspath(__file__))
+kFixture = os.path.join(kFixtures, 'libapp-v2_10-arm64v8.so')
+kGoldenDump = os.path.join(kFixtures, 'libapp-v2_10-arm64v8.dol')
+# Shift of the load addresses of a container holding the blobs of the fixture
+kShift = 0x100000
+
+def dumpToString(snapshot, directory):
+	output = os.path.join(directory, 'dump.dol')
+	main.dump(snapshot, output)
+	with open(output) as f:
+		return f.read()
+
+def shiftCodeOffsets(dump, shift):
+	return re.sub(r'(Code at absolute offset: )(0x[0-9a-f]+)', lambda match: match.group(1) + hex(int(match.group(2), 16) + shift), dump)
+
+# Every reference of a snapshot, with its fields
+def referenceStates(snapshot):
+	return [ (obj, repr(obj)) for obj in snapshot.references ]
+
+class SharedVMTest(unittest.TestCase):
+	def setUp(self):
+		main.vmSnapshots.clear()
+
+	def testNotModified(self):
+		blobs, offsets = main.readELFBlobs(kFixture)
+		main.loadLibraries(blobs[0])
+		vm = main.loadVMSnapshot(blobs, offsets)
+		before = referenceStates(vm)
+		nextRefIndex = vm.nextRefIndex
+		isolate = main.parseBlobs(blobs, offsets)
+		self.assertIs(isolate.references.base, vm.references)
+		self.assertGreater(len(isolate.references), len(vm.references))
+		after = referenceStates(vm)
+		self.assertEqual(len(after), len(before))
+		for (objectBefore, stateBefore), (objectAfter, stateAfter) in zip(before, after):
+			self.assertIs(objectAfter, objectBefore)
+			self.assertEqual(stateAfter, stateBefore)
+		self.assertEqual(vm.nextRefIndex, nextRefIndex)
+
+	# A container holding the same blobs as the fixture, at other addresses,
+	# reuses its VM snapshot, but its code is at its own offsets
+	def testTwoBinaries(self):
+		with open(kGoldenDump) as f:
+			golden = f.read()
+		with tempfile.TemporaryDirectory() as directory:
+			first = main.parseFile(kFixture)
+			blobs, offsets = main.readELFBlobs(kFixture)
+			container = os.path.join(directory, 'shifted.bin')
+			main.writeContainer(container, blobs, [ offset + kShift for offset in offsets ])
+			second = main.parseFile(container)
+			self.assertIs(second.references.base, first.references.base)
+			self.assertEqual(len(main.vmSnapshots), 1)
+			vm, = main.vmSnapshots.values()
+			self.assertIsNone(vm.instructionsOffset)
+			self.assertIsNone(vm.stream)
+			self.assertEqual(dumpToString(first, directory), golden)
+			self.assertNotEqual(shiftCodeOffsets(golden, kShift), golden)
+			self.assertEqual(dumpToString(second, directory), shiftCodeOffsets(golden, kShift))
+
+	# Only the most recently used VM snapshots are kept
+	def testBounded(self):
+		blobs = { arch: main.readELFBlobs(os.path.join(kFixtures, 'libapp-v2_10-{}.so'.format(arch))) for arch in ( 'arm64v8', 'x64', 'armv7' ) }
+		with mock.patch.object(main, 'kMaxVMSnapshots', 2):
+			for arch in ( 'arm64v8', 'x64', 'arm64v8', 'armv7' ):
+				main.parseBlobs(*blobs[arch])
+		self.assertEqual(list(main.vmSnapshots), [ main.vmKeyFor(*blobs[arch][0][:2]) for arch in ( 'arm64v8', 'armv7' ) ])
+
+if __name__ == '__main__':
+	unittest.main()